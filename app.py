@@ -21,8 +21,11 @@ Based on KAIRA DNA specifications (2017-2025 post-Despacito era).
 
 import streamlit as st
 from dotenv import load_dotenv
+import logging
+import os
 import sys
 import json
+from datetime import datetime
 from pathlib import Path
 
 # Add project root to path
@@ -30,11 +33,15 @@ sys.path.append(str(Path(__file__).parent))
 
 # Import configurations
 from config import GENRES, SONG_TYPES, VIBES, STRUCTURES, DEFAULT_STRUCTURE
-from core import LLMClient, PromptBuilder, ResponseParser, validate_payload
+from core import LLMClient, get_hedged_client, hedging_stats, SectionEngine, RevisionEngine, PromptBuilder, ResponseParser, IncrementalParser, validate_payload, get_client_pool, get_response_cache, get_retry_policy, get_rate_limiter, get_codec, get_tracer, get_ledger, usage_context, get_song_store, get_duplicate_index, screen_candidates, plan_token_budget
+from core.batch import BATCH_KEY_PREFIX
 from utils import build_json_payload, format_download_txt, format_download_json
 
 # Load environment variables
 load_dotenv()
+logging.basicConfig(level=logging.INFO)
+tracer = get_tracer()
+song_store = get_song_store()
 
 # Page configuration
 st.set_page_config(
@@ -534,6 +541,39 @@ model_mapping = {
 # Get actual model identifier
 selected_model = model_mapping.get(selected_model_display, selected_model_display)
 
+stream_output = st.sidebar.checkbox(
+    "Stream Output",
+    value=True,
+    help="Show lyrics section by section while they are being written"
+)
+
+num_candidates = st.sidebar.slider(
+    "Candidates",
+    min_value=1,
+    max_value=4,
+    value=1,
+    help="Generate several options in one round trip and page through them (turns off streaming)"
+)
+
+backup_provider = st.sidebar.selectbox(
+    "Backup Provider",
+    ["None", "OpenAI", "Anthropic", "Google"],
+    index=0,
+    help="Fire the same request at a backup provider when the primary is slow (turns off streaming)"
+)
+
+parallel_sections = st.sidebar.checkbox(
+    "Parallel Sections",
+    value=False,
+    help="Write the chorus first, then all other sections at once (Full Song in the default structure; turns off streaming)"
+)
+
+use_cache = st.sidebar.checkbox(
+    "Reuse Cached Results",
+    value=True,
+    help="Return the saved result when the exact same request was already generated"
+)
+
 st.sidebar.markdown("---")
 
 # Core Parameters
@@ -678,6 +718,61 @@ length = st.sidebar.selectbox(
     help="Overall length preference"
 )
 
+st.sidebar.markdown("---")
+
+# Song history (persistent song store)
+st.sidebar.subheader("📚 HISTORY")
+
+
+def _reset_history_page():
+    st.session_state.history_cursors = [None]
+
+
+def _open_song(song_id):
+    st.session_state.song_id = song_id
+    st.session_state.candidate_ix = 0
+    st.session_state.generated = True
+
+
+history_query = st.sidebar.text_input(
+    "Search Songs",
+    placeholder="e.g., playa, moto",
+    help="Matches lyrics, titles, keywords and notes",
+    on_change=_reset_history_page
+)
+history_genre = st.sidebar.selectbox(
+    "Filter by Genre",
+    ["All"] + list(GENRES),
+    on_change=_reset_history_page
+)
+history_cursors = st.session_state.setdefault("history_cursors", [None])
+history_page = song_store.search(
+    query=history_query or None,
+    genre=None if history_genre == "All" else history_genre,
+    limit=10,
+    cursor=history_cursors[-1]
+)
+for item in history_page["items"]:
+    created = datetime.fromtimestamp(item["created"]).strftime("%b %d %H:%M")
+    st.sidebar.button(
+        f"{item['title']} · {item['genre']} · {created}",
+        key=f"history_{item['id']}",
+        on_click=_open_song,
+        args=(item["id"],),
+        help=item.get("snippet"),
+        use_container_width=True
+    )
+if not history_page["items"]:
+    st.sidebar.caption("No saved songs yet." if len(history_cursors) == 1 else "No more songs.")
+
+history_prev, history_next = st.sidebar.columns(2)
+if history_prev.button("◀ Newer", disabled=len(history_cursors) == 1, use_container_width=True):
+    history_cursors.pop()
+    st.rerun()
+if history_next.button("Older ▶", disabled=history_page["next_cursor"] is None, use_container_width=True):
+    history_cursors.append(history_page["next_cursor"])
+    st.rerun()
+
 # Main content area
 col1, col2 = st.columns([2, 1])
 
@@ -746,161 +841,335 @@ if generate_button:
     slang_value = slang_density.split()[0]  # "Low", "Medium", or "High"
     
     # Build payload
-    payload = build_json_payload(
-        genre=genre,
-        song_type=song_type,
-        vibe=vibe,
-        energy=energy,
-        language=language,
-        slang_density=slang_value,
-        singer_gender=singer_gender,
-        singer_nationality=singer_nationality,
-        singer_vocal_style=singer_vocal_style,
-        include_chanteo=include_chanteo,
-        include_bridge=include_bridge,
-        include_phonetics=include_phonetics,
-        structure_override=structure_override,
-        lyrics_part=lyrics_part,
-        notes=notes,
-        length=length,
-        keywords=keywords,
-        forbidden_words=forbidden_words
-    )
+    with tracer.span("payload.build", provider=provider.lower(), lyrics_part=lyrics_part):
+        payload = build_json_payload(
+            genre=genre,
+            song_type=song_type,
+            vibe=vibe,
+            energy=energy,
+            language=language,
+            slang_density=slang_value,
+            singer_gender=singer_gender,
+            singer_nationality=singer_nationality,
+            singer_vocal_style=singer_vocal_style,
+            include_chanteo=include_chanteo,
+            include_bridge=include_bridge,
+            include_phonetics=include_phonetics,
+            structure_override=structure_override,
+            lyrics_part=lyrics_part,
+            notes=notes,
+            length=length,
+            keywords=keywords,
+            forbidden_words=forbidden_words
+        )
     
-    # Validate payload
-    is_valid, errors = validate_payload(payload)
+        # Validate payload
+        is_valid, errors = validate_payload(payload)
     
     if not is_valid:
         st.error("❌ Invalid configuration:")
         for error in errors:
             st.error(f"• {error}")
     else:
-        # Store payload in session state
-        st.session_state.payload = payload
-        
-        with st.spinner("🎵 Generating lyrics... This may take 30-60 seconds."):
+        sectioned = parallel_sections and num_candidates == 1 and SectionEngine.supports(payload)
+        streaming = stream_output and backup_provider == "None" and num_candidates == 1 and not sectioned
+        spinner_text = "🎵 Writing lyrics..." if streaming else "🎵 Generating lyrics... This may take 30-60 seconds."
+        with st.spinner(spinner_text), usage_context(payload, source="app"), \
+                tracer.span("app.generate", provider=provider.lower(), lyrics_part=payload["lyrics_part"]) as generate_span:
             try:
                 # Initialize client
-                client = LLMClient(provider=provider, model=selected_model)
+                client = LLMClient(
+                    provider=provider,
+                    model=selected_model,
+                    cache=get_response_cache() if use_cache else None
+                )
                 
                 # Build prompts
-                system_prompt = PromptBuilder.get_system_prompt()
-                user_prompt = PromptBuilder.build_user_prompt(payload)
+                with tracer.span("prompt.build", provider=provider.lower(), lyrics_part=payload["lyrics_part"]) as prompt_span:
+                    system_prompt = PromptBuilder.get_system_prompt()
+                    user_prompt = PromptBuilder.build_user_prompt(payload)
+                
+                    # Size the response for the requested sections
+                    temperature = float(os.getenv("DEFAULT_TEMPERATURE", "0.8"))
+                    budget = plan_token_budget(payload, client.provider, client.model, system_prompt, user_prompt)
+                    for warning in budget["warnings"]:
+                        st.warning(f"⚠️ {warning}")
+                    prompt_span.set(prompt_tokens=budget["prompt_tokens"], max_tokens=budget["max_tokens"])
+                
+                # Tell the writer when the client-side rate limit will hold the request back
+                if client.rate_limiter is not None:
+                    wait = client.rate_limiter.wait_time(
+                        client.provider, client.model, budget["prompt_tokens"] + budget["max_tokens"] * num_candidates
+                    )
+                    if wait >= 1:
+                        st.info(f"⏳ Waiting about {wait:.0f}s for the {provider} rate limit (KAIRA_RATE_LIMITS) before sending.")
                 
                 # Generate lyrics
-                response = client.generate_lyrics(
-                    system_prompt=system_prompt,
-                    user_prompt=user_prompt,
-                    temperature=0.8,
-                    max_tokens=2500
-                )
+                if num_candidates > 1:
+                    response = client.generate_lyrics(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        temperature=temperature,
+                        max_tokens=budget["max_tokens"],
+                        n=num_candidates
+                    )
+                elif sectioned:
+                    response = SectionEngine(client).generate(payload)
+                elif backup_provider != "None":
+                    # Partial songs have no verse_1/chorus pair, so only require lyrics
+                    accept = None if payload["lyrics_part"] == "Full Song" else (
+                        lambda r: bool(ResponseParser.parse(r)["lyrics"])
+                    )
+                    hedged = get_hedged_client(
+                        client,
+                        [LLMClient(provider=backup_provider, cache=client.cache)],
+                        hedge_delay=float(os.getenv("KAIRA_HEDGE_DELAY", "20"))
+                    )
+                    response = hedged.generate_lyrics(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        temperature=temperature,
+                        max_tokens=budget["max_tokens"],
+                        accept=accept
+                    )
+                elif streaming:
+                    st.markdown('<div class="section-header">📝 LYRICS (LIVE)</div>', unsafe_allow_html=True)
+                    live_lyrics = st.empty()
+                    stream_parser = IncrementalParser()
+                    partial = {}
+                    
+                    for event in client.stream_lyrics(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        temperature=temperature,
+                        max_tokens=budget["max_tokens"]
+                    ):
+                        if event["type"] == "delta":
+                            # Re-render only when a section has been completed
+                            sections = [e for e in stream_parser.feed(event["text"]) if e["type"] == "lyrics"]
+                            if sections:
+                                partial.update((e["section"], e["text"]) for e in sections)
+                                live_lyrics.text(ResponseParser.format_lyrics_display(partial))
+                        else:
+                            response = event["response"]
+                    
+                    live_lyrics.empty()
+                else:
+                    response = client.generate_lyrics(
+                        system_prompt=system_prompt,
+                        user_prompt=user_prompt,
+                        temperature=temperature,
+                        max_tokens=budget["max_tokens"]
+                    )
                 
-                # Parse response
-                parsed = ResponseParser.parse(response)
+                # Parse response (one entry per candidate)
+                responses = response if isinstance(response, list) else [response]
+                candidates = [ResponseParser.parse(r) for r in responses]
                 
-                # Store results in session state
-                st.session_state.lyrics = parsed.get("lyrics", {})
-                st.session_state.phonetics = parsed.get("phonetics", {})
-                st.session_state.qa_log = parsed.get("qa_log", {})
-                st.session_state.metadata = parsed.get("metadata", {})
-                st.session_state.generated = True
+                # Check against saved songs before anything is saved or shown
+                duplicate_index = get_duplicate_index()
+                candidates = screen_candidates(candidates, duplicate_index)
+                generate_span.set(model=client.model, candidates=len(responses), sectioned=sectioned, streaming=streaming)
                 
-                st.success("✅ Lyrics generated successfully! 🎉")
-                st.balloons()
+                if not candidates:
+                    st.warning("⚠️ Every result was a near-duplicate of a saved song and was discarded. Try again or adjust the brief.")
+                    st.session_state.generated = False
+                else:
+                    # Persist the song; the session only keeps its id
+                    song_id = song_store.save(payload, candidates, provider=client.provider, model=client.model)
+                    for candidate in candidates:
+                        duplicate_index.add_lyrics(song_id, candidate.get("lyrics"))
+                    st.session_state.song_id = song_id
+                    st.session_state.candidate_ix = 0
+                    st.session_state.generated = True
+                    
+                    for i, candidate in enumerate(candidates):
+                        metadata = candidate.get("metadata") if isinstance(candidate.get("metadata"), dict) else {}
+                        for match in metadata.get("duplicate_of", [])[:1]:
+                            if match["key"].startswith(BATCH_KEY_PREFIX):
+                                source = f"batch result {match['key'][len(BATCH_KEY_PREFIX):][:12]}"
+                            else:
+                                source = f"saved song {match['key']}"
+                            st.warning(f"⚠️ Option {i + 1}: the {match['part']} is {match['similarity']:.0%} similar to {source}.")
+                    st.success("✅ Lyrics generated successfully! 🎉")
+                    st.balloons()
                 
             except Exception as e:
+                generate_span.set(error=type(e).__name__)
                 st.error(f"❌ An error occurred: {str(e)}")
                 st.error("Please check your API key and try again.")
                 st.session_state.generated = False
 
-# Display results
-if st.session_state.get('generated', False):
+# Display results (loaded from the song store on every rerun)
+song = song_store.get(st.session_state.song_id) if st.session_state.get('generated', False) else None
+if song is not None:
     st.markdown("---")
     st.markdown('<div class="section-header">🎵 MASTER OUTPUT</div>', unsafe_allow_html=True)
     
+    # Candidate pager (best-of-N)
+    candidates = song["candidates"]
+    song_payload = song["payload"]
+    translation = song["translation"]
+    candidate_ix = 0
+    if len(candidates) > 1:
+        candidate_ix = st.radio(
+            "Candidate",
+            list(range(len(candidates))),
+            format_func=lambda i: f"Option {i + 1}",
+            horizontal=True,
+            key="candidate_ix"
+        )
+    selected = candidates[candidate_ix]
+    lyrics = selected.get("lyrics", {})
+    phonetics = selected.get("phonetics", {})
+    qa_log = selected.get("qa_log", {})
+    metadata = selected.get("metadata", {})
+    
     # Create tabs for different outputs
-    tab1, tab2, tab3, tab4 = st.tabs(["📝 LYRICS", "🗣️ PHONETICS", "📊 QA LOG", "ℹ️ METADATA"])
+    with tracer.span("app.render", lyrics_part=song_payload.get("lyrics_part")):
+        tab1, tab2, tab3, tab4 = st.tabs(["📝 LYRICS", "🗣️ PHONETICS", "📊 QA LOG", "ℹ️ METADATA"])
     
-    with tab1:
-        st.subheader("Generated Lyrics")
-        lyrics = st.session_state.get('lyrics', {})
+        with tab1:
+            st.subheader("Generated Lyrics")
         
-        if lyrics:
-            # Format for display
-            formatted_lyrics = ResponseParser.format_lyrics_display(lyrics)
-            st.text_area(
-                "Lyrics",
-                value=formatted_lyrics,
-                height=500,
-                key="lyrics_display"
-            )
-        else:
-            st.warning("No lyrics generated.")
+            if lyrics:
+                # Format for display
+                formatted_lyrics = ResponseParser.format_lyrics_display(lyrics)
+                st.text_area(
+                    "Lyrics",
+                    value=formatted_lyrics,
+                    height=500,
+                    key=f"lyrics_display_{candidate_ix}"
+                )
+            else:
+                st.warning("No lyrics generated.")
     
-    with tab2:
-        st.subheader("Phonetics Guide")
-        phonetics = st.session_state.get('phonetics', {})
+        with tab2:
+            st.subheader("Phonetics Guide")
         
-        if phonetics and st.session_state.payload.get('include_phonetics'):
-            formatted_phonetics = ResponseParser.format_phonetics_display(phonetics)
-            st.text_area(
-                "Phonetics",
-                value=formatted_phonetics,
-                height=400,
-                key="phonetics_display"
-            )
-        else:
-            st.info("No phonetics generated. Enable 'Include Phonetics' to get pronunciation guidance.")
+            if phonetics and song_payload.get('include_phonetics'):
+                formatted_phonetics = ResponseParser.format_phonetics_display(phonetics)
+                st.text_area(
+                    "Phonetics",
+                    value=formatted_phonetics,
+                    height=400,
+                    key=f"phonetics_display_{candidate_ix}"
+                )
+            else:
+                st.info("No phonetics generated. Enable 'Include Phonetics' to get pronunciation guidance.")
     
-    with tab3:
-        st.subheader("Quality Assurance Log")
-        qa_log = st.session_state.get('qa_log', {})
+        with tab3:
+            st.subheader("Quality Assurance Log")
         
-        if qa_log:
-            formatted_qa = ResponseParser.format_qa_log_display(qa_log)
-            st.text_area(
-                "QA Log",
-                value=formatted_qa,
-                height=400,
-                key="qa_log_display"
-            )
-        else:
-            st.info("No QA log available.")
+            if qa_log:
+                formatted_qa = ResponseParser.format_qa_log_display(qa_log)
+                st.text_area(
+                    "QA Log",
+                    value=formatted_qa,
+                    height=400,
+                    key=f"qa_log_display_{candidate_ix}"
+                )
+            else:
+                st.info("No QA log available.")
     
-    with tab4:
-        st.subheader("Metadata")
-        metadata = st.session_state.get('metadata', {})
+        with tab4:
+            st.subheader("Metadata")
         
-        if metadata:
-            st.json(metadata)
-        else:
-            st.info("No metadata available.")
+            if metadata:
+                st.json(metadata)
+            else:
+                st.info("No metadata available.")
 
     # Translation Feature
     st.markdown("---")
     st.subheader("🌍 TRANSLATION")
     
     if st.button("Translate Lyrics to English", key="translate_btn"):
-        lyrics_text = ResponseParser.format_lyrics_display(st.session_state.get('lyrics', {}))
+        lyrics_text = ResponseParser.format_lyrics_display(lyrics)
         if lyrics_text:
-            with st.spinner("Translating..."):
+            with st.spinner("Translating..."), usage_context(song_payload, source="app"), \
+                    tracer.span("app.translate", provider=provider.lower(), text_chars=len(lyrics_text)):
                 try:
-                    client = LLMClient(provider=provider, model=selected_model)
+                    client = LLMClient(
+                        provider=provider,
+                        model=selected_model,
+                        cache=get_response_cache() if use_cache else None
+                    )
                     translation = client.translate_text(lyrics_text)
-                    st.session_state.translation = translation
+                    song_store.update(song["id"], translation=translation)
                     st.success("Translation complete!")
                 except Exception as e:
                     st.error(f"Translation failed: {str(e)}")
         else:
             st.warning("No lyrics to translate.")
             
-    if st.session_state.get('translation'):
+    if translation:
         st.text_area(
             "English Translation",
-            value=st.session_state.translation,
+            value=translation,
             height=400
         )
     
+    # Revision Feature
+    st.markdown("---")
+    st.subheader("✏️ REVISION")
+    
+    revisable = [key for key, text in lyrics.items() if isinstance(text, str) and text.strip()]
+    revision_sections = st.multiselect(
+        "Sections to Revise",
+        revisable,
+        default=revisable,
+        help="Only these sections are sent; everything else stays exactly as it is"
+    )
+    revision_request = st.text_area(
+        "Revision Request",
+        placeholder="e.g., Make verse 2 more visual, swap the cliché in line 3 of the chorus",
+        height=100
+    )
+    
+    if st.button("Apply Revision", key="revise_btn"):
+        if not revision_request.strip() or not revision_sections:
+            st.warning("Describe the revision and pick at least one section.")
+        else:
+            with st.spinner("Revising..."), usage_context(song_payload, source="app.revise"):
+                try:
+                    client = LLMClient(
+                        provider=provider,
+                        model=selected_model,
+                        cache=get_response_cache() if use_cache else None
+                    )
+                    revision = RevisionEngine(client).revise(
+                        lyrics,
+                        song_payload,
+                        revision_request,
+                        sections=revision_sections
+                    )
+                    selected["lyrics"] = revision["lyrics"]
+                    selected.setdefault("metadata", {}).setdefault("revisions", []).append({
+                        "request": revision_request,
+                        "edits": len(revision["applied"]),
+                        "notes": revision["notes"],
+                        "usage": revision["usage"]
+                    })
+                    # The stored translation no longer matches the revised draft
+                    song_store.update(song["id"], candidates=candidates, translation="")
+                    duplicate_index = get_duplicate_index()
+                    duplicate_index.remove(song["id"])
+                    for candidate in candidates:
+                        duplicate_index.add_lyrics(song["id"], candidate.get("lyrics"))
+                    st.session_state.revision_status = (len(revision["applied"]), len(revision["rejected"]))
+                except Exception as e:
+                    st.error(f"Revision failed: {str(e)}")
+            if st.session_state.get('revision_status'):
+                # Re-render the tabs above with the revised draft
+                st.rerun()
+    
+    if st.session_state.get('revision_status'):
+        applied_count, rejected_count = st.session_state.pop('revision_status')
+        st.success(f"✅ Applied {applied_count} line edits.")
+        if rejected_count:
+            st.warning(f"Skipped {rejected_count} edits that did not match the draft.")
+    
     # Download section
     st.markdown("---")
     st.markdown('<div class="section-header">📥 EXPORT</div>', unsafe_allow_html=True)
@@ -910,11 +1179,11 @@ if st.session_state.get('generated', False):
     with col1:
         # TXT download
         txt_content = format_download_txt(
-            st.session_state.get('lyrics', {}),
-            st.session_state.get('phonetics', {}),
-            st.session_state.get('qa_log', {}),
-            st.session_state.get('metadata', {}),
-            st.session_state.get('payload', {})
+            lyrics,
+            phonetics,
+            qa_log,
+            metadata,
+            song_payload
         )
         st.download_button(
             label="📄 DOWNLOAD TXT",
@@ -927,11 +1196,11 @@ if st.session_state.get('generated', False):
     with col2:
         # JSON download
         json_content = format_download_json(
-            st.session_state.get('lyrics', {}),
-            st.session_state.get('phonetics', {}),
-            st.session_state.get('qa_log', {}),
-            st.session_state.get('metadata', {}),
-            st.session_state.get('payload', {})
+            lyrics,
+            phonetics,
+            qa_log,
+            metadata,
+            song_payload
         )
         st.download_button(
             label="📋 DOWNLOAD JSON",
@@ -1026,3 +1295,27 @@ with st.expander("🤖 AI Model Information"):
     - Use **Claude 3.5 Haiku** or **o3-mini** for rapid iteration
     - Higher temperature (0.8-0.9) for more creative, varied outputs
     """)
+
+# Connection pool expander
+ledger = get_ledger()
+with st.expander("🔌 Connection Pool & Cache"):
+    st.json({
+        "connection_pool": get_client_pool().stats(),
+        "response_cache": get_response_cache().stats(),
+        "retries": get_retry_policy().stats(),
+        "rate_limiter": get_rate_limiter().stats(),
+        "hedging": hedging_stats(),
+        "json_decode": get_codec().stats(),
+        "tracing": tracer.stats(),
+        "usage_ledger": ledger.stats() if ledger else {"enabled": False},
+        "song_store": song_store.stats(),
+        "duplicate_index": get_duplicate_index().stats()
+    })
+
+if ledger is not None:
+    with st.expander("💰 Token Spend"):
+        st.json({
+            "by_day_and_model": ledger.aggregate(by=("day", "model")),
+            "by_genre": ledger.aggregate(by="genre"),
+            "by_configuration": ledger.aggregate(by=("include_phonetics", "include_chanteo", "length"))
+        })
@@ -0,0 +1,98 @@
+"""
+Microbenchmark for JSON recovery in ResponseParser._extract_from_text.
+
+Compares the balanced-brace scanner + raw_decode against the previous
+two-level regex on prose-wrapped responses and adversarial inputs, reporting
+time per call and whether the full KAIRA object was recovered.
+
+Usage:
+    python benchmarks/bench_extract_json.py [--scale 1 4 16]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+for name in ("openai", "anthropic", "google", "google.generativeai"):
+    sys.modules.setdefault(name, MagicMock())
+
+from core.response_parser import ResponseParser
+
+
+_LEGACY_PATTERN = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
+
+RESPONSE = {
+    "lyrics": {"verse_1": "Me dejaste en visto\na las 3 AM", "chorus": "Baila {conmigo}\nno pares"},
+    "phonetics": {"difficult_phrases": [{"phrase": "te hablo", "phonetic": "tea-blo"}], "rhythm_notes": "short-long"},
+    "qa_log": {"creative_choices": "late night scenes"},
+    "metadata": {"total_lines": 32}
+}
+
+
+def legacy_extract(text: str):
+    """The previous implementation, kept for comparison."""
+    for match in re.findall(_LEGACY_PATTERN, text, re.DOTALL):
+        try:
+            return ResponseParser._validate_structure(json.loads(match))
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def inputs(scale: int):
+    """Named (text, object that should be recovered) pairs."""
+    body = json.dumps(RESPONSE, ensure_ascii=False, indent=2)
+    braces = {"lyrics": {"chorus": "{}{{}}" * (2000 * scale)}}
+    prose = "Here is your song, written with {care} and {intention}. " * (50 * scale)
+    return {
+        "prose-wrapped response": (prose + body + "\nLet me know if you want changes! " * (10 * scale), RESPONSE),
+        "unclosed braces in prose": (("{ note: " + "a" * 200 + " ") * (20 * scale) + body, RESPONSE),
+        "many small objects": ('{"x": 1} {"y": [1, {"z": 2}]} ' * (200 * scale) + body, RESPONSE),
+        "deep nesting, truncated": ('{"a": ' * (500 * scale) + "1" + body, RESPONSE),
+        "string full of braces": ("Sure: " + json.dumps(braces), braces)
+    }
+
+
+def measure(fn, text: str, min_time: float = 0.3) -> float:
+    best, spent = float("inf"), 0.0
+    while spent < min_time:
+        started = time.perf_counter()
+        fn(text)
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+    return best
+
+
+def recovered(result, expected) -> bool:
+    return result == ResponseParser._validate_structure(expected)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 4, 16], help="Input size multipliers")
+    args = parser.parse_args(argv)
+
+    print(f"{'input':>26} {'KB':>7} {'legacy ms':>10} {'ok':>3} {'scanner ms':>11} {'ok':>3}")
+    for scale in args.scale:
+        for name, (text, expected) in inputs(scale).items():
+            legacy_ms = measure(legacy_extract, text) * 1000
+            scanner_ms = measure(ResponseParser._extract_from_text, text) * 1000
+            legacy_ok = recovered(legacy_extract(text), expected)
+            scanner_ok = recovered(ResponseParser._extract_from_text(text), expected)
+            print(
+                f"{name:>26} {len(text) / 1024:>7.1f} "
+                f"{legacy_ms:>10.3f} {'y' if legacy_ok else 'n':>3} "
+                f"{scanner_ms:>11.3f} {'y' if scanner_ok else 'n':>3}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Startup benchmark for the core package and the app script.
+
+Each scenario runs in a fresh interpreter under `python -X importtime` and
+reports the best of N runs:
+  * wall: interpreter start to exit, as a replica cold start sees it
+  * imports: summed cumulative time of the top-level imports
+  * modules: number of modules imported
+  * sdks: provider SDKs that ended up in sys.modules
+Modules a bare interpreter already imports (the baseline row) are excluded
+from imports/modules in the other rows.
+
+Scenarios:
+  * core: `import core`
+  * core-client: `from core import LLMClient` (the app's first use)
+  * app: every module-level import in app.py, in order. Third-party packages
+    that are not installed here (e.g. streamlit) are skipped and listed.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+
+import argparse
+import ast
+import importlib.util
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+ROOT = Path(__file__).parent.parent
+LOCAL_PACKAGES = ("core", "utils", "config")
+SDKS = ("openai", "anthropic", "google.generativeai")
+
+# "import time:       123 |        456 |   package.module"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+REPORT = (
+    "import sys\n"
+    "print('SDKS=' + ','.join(m for m in {sdks!r} if m in sys.modules))\n"
+)
+
+
+def app_imports() -> Tuple[str, List[str]]:
+    """Module-level import statements of app.py, minus uninstalled third-party packages."""
+    source = (ROOT / "app.py").read_text(encoding="utf-8")
+    lines, skipped = [], []
+    for node in ast.parse(source).body:
+        if not isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else [node.module]
+        top = names[0].split(".")[0]
+        if top not in LOCAL_PACKAGES and importlib.util.find_spec(top) is None:
+            skipped.append(top)
+            continue
+        lines.append(ast.get_source_segment(source, node))
+    # Duplicate statements (e.g. repeated stdlib imports) are no-ops the second time
+    return "\n".join(dict.fromkeys(lines)), sorted(set(skipped))
+
+
+def run_once(code: str, exclude: Set[str]) -> Dict[str, object]:
+    """Run code in a fresh interpreter with -X importtime."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + "\n" + REPORT.format(sdks=SDKS)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent)))
+
+    # Modules the bare interpreter imports (site, encodings, ...) are not part
+    # of the code under test
+    modules = [m for m in modules if m[0] not in exclude]
+    top_indent = min((m[3] for m in modules), default=0)
+    sdks = proc.stdout.strip().split("SDKS=")[-1]
+    return {
+        "wall_ms": wall * 1000,
+        "imports_ms": sum(m[2] for m in modules if m[3] == top_indent) / 1000,
+        "modules": len(modules),
+        "names": {m[0] for m in modules},
+        "sdks": sdks or "-",
+        "slowest": sorted(modules, key=lambda m: m[1], reverse=True)
+    }
+
+
+def bench(code: str, runs: int, exclude: Set[str] = frozenset()) -> Dict[str, object]:
+    results = [run_once(code, exclude) for _ in range(runs)]
+    return min(results, key=lambda r: r["wall_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list per scenario (by self time)")
+    args = parser.parse_args()
+
+    app_code, skipped = app_imports()
+    scenarios = [
+        ("baseline", "pass"),
+        ("core", "import core"),
+        ("core-client", "from core import LLMClient"),
+        ("app", app_code)
+    ]
+
+    print(f"{'scenario':<12} {'wall ms':>9} {'imports ms':>11} {'modules':>8}  sdks")
+    results = {}
+    exclude: Set[str] = set()
+    for name, code in scenarios:
+        try:
+            result = bench(code, args.runs, exclude)
+        except RuntimeError as e:
+            print(f"{name:<12} failed: {e}")
+            continue
+        results[name] = result
+        if name == "baseline":
+            exclude = result["names"]
+        print(f"{name:<12} {result['wall_ms']:>9.1f} {result['imports_ms']:>11.1f} {result['modules']:>8}  {result['sdks']}")
+
+    if skipped:
+        print(f"\napp: skipped third-party packages not installed here: {', '.join(skipped)}")
+
+    for name, result in results.items():
+        if name == "baseline" or not args.top:
+            continue
+        print(f"\nslowest imports ({name}, self us):")
+        for module, self_us, _, _ in result["slowest"][:args.top]:
+            print(f"  {self_us:>8}  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Throughput benchmark for IncrementalParser.
+
+Compares, on multi-KB KAIRA responses streamed in small chunks:
+  * incremental: IncrementalParser.feed() per chunk + close()
+  * rescan: re-running a finished-section regex over the whole buffer
+    after every chunk (the previous streaming approach)
+  * batch: a single ResponseParser.parse on the complete text (lower bound)
+
+Usage:
+    python benchmarks/bench_stream_parser.py [--sizes 4 16 64] [--chunk 16]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Provider SDKs are not needed to parse
+for name in ("openai", "anthropic", "google", "google.generativeai"):
+    sys.modules.setdefault(name, MagicMock())
+
+from core.response_parser import IncrementalParser, ResponseParser
+
+
+# The previous streaming approach: complete "<section>": "<text>" pairs, rescanned per chunk
+PARTIAL_SECTION = re.compile(
+    r'"(intro|verse_1|pre_chorus|chorus|verse_2|chanteo|chorus_repeat|bridge|outro)"\s*:\s*"((?:[^"\\]|\\.)*)"'
+)
+
+LINE = "Me dejaste en visto a las 3 AM, \"otra vez\" la batería baja"
+
+
+def make_response(kilobytes: int) -> str:
+    """Build a KAIRA-shaped JSON response of roughly `kilobytes` KB."""
+    sections = ["verse_1", "chorus", "verse_2", "pre_chorus", "chorus_repeat", "bridge", "chanteo"]
+    lyrics, phrases = {}, []
+    size, n = 0, 0
+    while size < kilobytes * 1024:
+        section = sections[n % len(sections)] + ("" if n < len(sections) else f"_{n}")
+        lyrics[section] = "\n".join(f"{LINE} {i}" for i in range(8))
+        phrases.append({"phrase": "te hablo", "phonetic": "tea-blo", "note": f"sinalefa {n}"})
+        size += len(lyrics[section]) + 60
+        n += 1
+    return json.dumps({
+        "lyrics": lyrics,
+        "phonetics": {"difficult_phrases": phrases, "rhythm_notes": "short-long"},
+        "qa_log": {"creative_choices": "late night scenes", "slang_used": ["visto", "flow"]},
+        "metadata": {"total_lines": 8 * n}
+    }, ensure_ascii=False, indent=2)
+
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def run_incremental(chunks):
+    parser = IncrementalParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def run_rescan(chunks):
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        {m.group(1): json.loads(f'"{m.group(2)}"') for m in PARTIAL_SECTION.finditer(text)}
+    return ResponseParser.parse(text)
+
+
+def run_batch(chunks):
+    return ResponseParser.parse("".join(chunks))
+
+
+def measure(fn, chunks, min_time: float = 0.5) -> float:
+    """Best-of-runs seconds per call, repeating for at least min_time."""
+    best, spent = float("inf"), 0.0
+    while spent < min_time:
+        started = time.perf_counter()
+        fn(chunks)
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64], help="Response sizes in KB")
+    parser.add_argument("--chunk", type=int, default=16, help="Characters per streamed chunk")
+    args = parser.parse_args(argv)
+
+    print(f"{'size':>6} {'method':>12} {'ms':>9} {'MB/s':>8}")
+    for kilobytes in args.sizes:
+        text = make_response(kilobytes)
+        chunks = chunked(text, args.chunk)
+        assert run_incremental(chunks) == run_batch(chunks)
+        for name, fn in (("incremental", run_incremental), ("rescan", run_rescan), ("batch", run_batch)):
+            seconds = measure(fn, chunks)
+            print(f"{kilobytes:>4}KB {name:>12} {seconds * 1000:>9.2f} {len(text.encode()) / seconds / 1e6:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Microbenchmark suite for the CPU-side hot paths of one song.
+
+Covers prompt building, response parsing (clean, fenced, malformed and
+prose-wrapped fixtures), display and download formatting, validation, and
+near-duplicate signatures and lookups.
+Inputs are the recorded fixtures in benchmarks/fixtures/.
+
+Each case is calibrated to run for at least --min-time seconds per repeat;
+the median and minimum time per call over --repeats repeats are reported.
+
+Usage:
+    python benchmarks/bench_suite.py                                  # table
+    python benchmarks/bench_suite.py --save baseline.json             # record a baseline
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.25
+    python benchmarks/bench_suite.py --filter parse --json            # JSON to stdout
+
+With --baseline, the exit status is 1 when any case's median is slower than
+the baseline by more than the threshold (and by more than --min-delta-us,
+which keeps sub-microsecond noise from failing a run).
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import MagicMock
+
+ROOT = Path(__file__).parent.parent
+FIXTURES = Path(__file__).parent / "fixtures"
+
+sys.path.append(str(ROOT))
+
+# Provider SDKs are not needed for CPU-side work
+for name in ("openai", "anthropic", "google", "google.generativeai"):
+    sys.modules.setdefault(name, MagicMock())
+
+from core.dedup import DuplicateIndex
+from core.prompt_builder import PromptBuilder
+from core.response_parser import ResponseParser
+from core.validator import validate_payload, validate_response, validate_structure_compliance
+from utils.formatters import format_download_json, format_download_txt
+
+SCHEMA_VERSION = 1
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """Benchmark cases as (name, zero-argument callable)."""
+    payload = json.loads(_fixture("payload.json"))
+    responses = {
+        kind: _fixture(f"response_{kind}.{'json' if kind == 'clean' else 'txt'}")
+        for kind in ("clean", "fenced", "malformed", "prose")
+    }
+    parsed = ResponseParser.parse(responses["clean"])
+    lyrics, phonetics, qa_log, metadata = (parsed[key] for key in ("lyrics", "phonetics", "qa_log", "metadata"))
+    structure = payload["structure_override"]
+
+    # Lookup against an index of 1000 unrelated songs plus the fixture itself
+    dedup = DuplicateIndex()
+    for i in range(1000):
+        dedup.add(f"song-{i}", f"{i} " + " ".join(str(i * j) for j in range(60)))
+    dedup.add_lyrics("fixture", lyrics)
+    chorus_signature = dedup.signature(lyrics["chorus"])
+
+    result = [
+        ("prompt.system", PromptBuilder.get_system_prompt),
+        ("prompt.user", lambda: PromptBuilder.build_user_prompt(payload))
+    ]
+    result += [
+        (f"parse.{kind}", lambda text=text: ResponseParser.parse(text))
+        for kind, text in responses.items()
+    ]
+    result += [
+        ("display.lyrics", lambda: ResponseParser.format_lyrics_display(lyrics)),
+        ("display.phonetics", lambda: ResponseParser.format_phonetics_display(phonetics)),
+        ("display.qa_log", lambda: ResponseParser.format_qa_log_display(qa_log)),
+        ("download.txt", lambda: format_download_txt(lyrics, phonetics, qa_log, metadata, payload)),
+        ("download.json", lambda: format_download_json(lyrics, phonetics, qa_log, metadata, payload)),
+        ("validate.payload", lambda: validate_payload(payload)),
+        ("validate.response", lambda: validate_response(parsed)),
+        ("validate.structure", lambda: validate_structure_compliance(lyrics, structure)),
+        ("dedup.signature", lambda: dedup.signature(lyrics["chorus"])),
+        ("dedup.query", lambda: dedup.query(part="chorus", signature=chorus_signature))
+    ]
+    return result
+
+
+def measure(func: Callable[[], Any], repeats: int, min_time: float) -> Dict[str, Any]:
+    """
+    Time func like timeit: find a loop count that runs for min_time, then
+    take `repeats` samples of that many loops.
+
+    Returns:
+        Dictionary with median_us, min_us, stdev_us, loops and repeats
+    """
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed < min_time / 10 else max(2, int(min_time / max(elapsed, 1e-9)) + 1)
+
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops * 1e6)
+
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "stdev_us": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeats": repeats
+    }
+
+
+def run(name_filter: Optional[str], repeats: int, min_time: float) -> Dict[str, Any]:
+    """Run the (filtered) suite and return the machine-readable result document."""
+    results = {}
+    for name, func in cases():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, repeats, min_time)
+    return {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": _git_commit(),
+        "results": results
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float,
+    min_delta_us: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare medians against a baseline document.
+
+    Args:
+        current: Result document from run()
+        baseline: Stored result document
+        threshold: Allowed slowdown as a fraction (0.25 = 25% slower)
+        min_delta_us: Slowdowns smaller than this many microseconds never count
+
+    Returns:
+        One row per case present in both documents, with ratio and regressed flag
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        delta = result["median_us"] - base["median_us"]
+        rows.append({
+            "name": name,
+            "baseline_us": base["median_us"],
+            "current_us": result["median_us"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + threshold and delta > min_delta_us
+        })
+    return rows
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return proc.stdout.strip() or None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CPU-side microbenchmarks for KAIRA.")
+    parser.add_argument("--filter", default=None, help="Only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per repeat")
+    parser.add_argument("--json", action="store_true", help="Print the result document as JSON")
+    parser.add_argument("--save", default=None, help="Write the result document to this file")
+    parser.add_argument("--baseline", default=None, help="Result document to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs the baseline (fraction)")
+    parser.add_argument("--min-delta-us", type=float, default=1.0, help="Ignore slowdowns below this many microseconds")
+    args = parser.parse_args()
+
+    document = run(args.filter, args.repeats, args.min_time)
+    if args.save:
+        Path(args.save).write_text(json.dumps(document, indent=2) + "\n", encoding="utf-8")
+
+    rows = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        rows = compare(document, baseline, args.threshold, args.min_delta_us)
+        document["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "cases": rows}
+
+    if args.json:
+        print(json.dumps(document, indent=2))
+    elif rows is None:
+        print(f"{'case':<22} {'median us':>11} {'min us':>10} {'loops':>8}")
+        for name, result in document["results"].items():
+            print(f"{name:<22} {result['median_us']:>11.2f} {result['min_us']:>10.2f} {result['loops']:>8}")
+    else:
+        print(f"{'case':<22} {'baseline us':>12} {'current us':>11} {'ratio':>7}")
+        for row in rows:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['name']:<22} {row['baseline_us']:>12.2f} {row['current_us']:>11.2f} {row['ratio']:>7.2f}{flag}")
+
+    if rows and any(row["regressed"] for row in rows):
+        regressed = [row["name"] for row in rows if row["regressed"]]
+        print(f"\n{len(regressed)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,410 @@
+"""
+Headless load test: simulated writers replaying the app's session flow.
+
+Each simulated writer is a thread (Streamlit runs one script thread per
+session) looping over the app's generate -> translate -> export flow:
+
+  build      build_json_payload + validate_payload + PromptBuilder + plan_token_budget
+  generate   LLMClient.generate_lyrics (or stream_lyrics + IncrementalParser with --stream)
+  first_token  time to the first streamed delta (--stream only)
+  parse      ResponseParser.parse + format_lyrics_display
+  translate  LLMClient.translate_text (for --translate-rate of the songs)
+  export     format_download_txt + format_download_json
+
+Writers think between songs, following the --think distribution. The report
+gives throughput, p50/p95/p99 per stage and errors, plus process CPU and RSS
+sampled over the run. It also includes retry, rate-limiter and client-pool
+counters, and the mock server's counters when --mock is used.
+
+Usage:
+    # Against the built-in mock provider (no API quota spent)
+    python benchmarks/load_test.py --mock --users 50 --duration 120 --think exp:5
+
+    # Against any endpoint the SDK can reach
+    python benchmarks/load_test.py --provider anthropic --base-url http://10.0.0.5:8765 --users 20
+
+The shared client-side rate limiter applies just as it does in the app; set
+KAIRA_RATE_LIMITS to raise it when measuring the replica rather than the
+provider limits.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from config import GENRES, SONG_TYPES, STRUCTURES, VIBES
+from core import (
+    IncrementalParser, LLMClient, PromptBuilder, ResponseParser, get_client_pool,
+    get_rate_limiter, get_response_cache, get_retry_policy, plan_token_budget, validate_payload
+)
+from utils import build_json_payload, format_download_json, format_download_txt
+
+STAGES = ("build", "generate", "first_token", "parse", "translate", "export", "song")
+
+ENERGIES = ["Low", "Medium-Low", "Medium", "Medium-High", "High"]
+LANGUAGES = ["Spanish", "English", "Spanglish"]
+SLANG = ["Low", "Medium", "High"]
+LENGTHS = ["Short", "Medium", "Long"]
+# Most sessions write whole songs
+PARTS = ["Full Song"] * 6 + ["Chorus Only", "Verse 1 Only"]
+
+
+def think_time(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse a think-time distribution.
+
+    Args:
+        spec: 'none', 'fixed:S', 'uniform:LO:HI' or 'exp:MEAN' (seconds)
+
+    Returns:
+        Function drawing one think time from a Random instance
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(":")] if args else []
+    if kind == "none":
+        return lambda rng: 0.0
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(f"Invalid think time: {spec}. Use none, fixed:S, uniform:LO:HI or exp:MEAN")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Thread-safe collection of stage timings and errors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.timings[stage].append(seconds)
+
+    def error(self, stage: str, exc: BaseException):
+        with self._lock:
+            self.errors[stage][type(exc).__name__] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            timings = {stage: sorted(values) for stage, values in self.timings.items()}
+            errors = {stage: dict(counts) for stage, counts in self.errors.items()}
+
+        stages = {}
+        for stage in STAGES:
+            values = timings.get(stage)
+            if not values and stage not in errors:
+                continue
+            values = values or []
+            stages[stage] = {
+                "count": len(values),
+                "errors": sum(errors.get(stage, {}).values()),
+                "per_second": len(values) / elapsed if elapsed else 0.0,
+                "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000 if values else 0.0
+            }
+        return {"stages": stages, "errors": errors}
+
+
+class ResourceSampler(threading.Thread):
+    """Samples process CPU utilisation and RSS at a fixed interval."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self._halt = threading.Event()
+        self._t0 = time.monotonic()
+
+    def run(self):
+        last_wall, last_cpu = time.monotonic(), time.process_time()
+        while not self._halt.wait(self.interval):
+            wall, cpu = time.monotonic(), time.process_time()
+            self.samples.append({
+                "t": round(wall - self._t0, 2),
+                "cpu_percent": round((cpu - last_cpu) / (wall - last_wall) * 100, 1),
+                "rss_mb": round(_rss_bytes() / 2**20, 1),
+                "threads": threading.active_count()
+            })
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+class Writer(threading.Thread):
+    """One simulated writer session."""
+
+    def __init__(self, index: int, args: argparse.Namespace, recorder: Recorder, stop_at: float, think: Callable):
+        super().__init__(name=f"writer-{index}", daemon=True)
+        self.args = args
+        self.recorder = recorder
+        self.stop_at = stop_at
+        self.think = think
+        self.rng = random.Random(args.seed * 1000 + index if args.seed is not None else None)
+        self.songs = 0
+
+    def run(self):
+        client = LLMClient(
+            provider=self.args.provider,
+            model=self.args.model,
+            base_url=self.args.base_url,
+            cache=get_response_cache() if self.args.use_cache else None
+        )
+        while not self._done():
+            started = time.monotonic()
+            try:
+                self.song(client)
+            except Exception:
+                # Already recorded against its stage
+                pass
+            else:
+                self.recorder.record("song", time.monotonic() - started)
+                self.songs += 1
+            if self._done():
+                break
+            time.sleep(min(self.think(self.rng), max(self.stop_at - time.monotonic(), 0.0)))
+
+    def _done(self) -> bool:
+        if self.args.songs and self.songs >= self.args.songs:
+            return True
+        return time.monotonic() >= self.stop_at
+
+    def stage(self, name: str, func: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        try:
+            result = func()
+        except Exception as e:
+            self.recorder.error(name, e)
+            raise
+        self.recorder.record(name, time.monotonic() - started)
+        return result
+
+    def song(self, client: LLMClient):
+        rng = self.rng
+
+        def build():
+            structure = rng.choice([s for name, s in STRUCTURES.items() if name != "Custom"])
+            payload = build_json_payload(
+                genre=rng.choice(GENRES),
+                song_type=rng.choice(SONG_TYPES),
+                vibe=rng.choice(VIBES),
+                energy=rng.choice(ENERGIES),
+                language=rng.choice(LANGUAGES),
+                slang_density=rng.choice(SLANG),
+                include_chanteo=rng.random() < 0.3,
+                include_bridge=rng.random() < 0.3,
+                structure_override=structure,
+                lyrics_part=rng.choice(PARTS),
+                length=rng.choice(LENGTHS),
+                keywords=", ".join(rng.sample(["noche", "playa", "moto", "perreo", "luna", "visto"], 2))
+            )
+            is_valid, errors = validate_payload(payload)
+            if not is_valid:
+                raise ValueError("; ".join(errors))
+            system_prompt = PromptBuilder.get_system_prompt()
+            user_prompt = PromptBuilder.build_user_prompt(payload)
+            budget = plan_token_budget(payload, client.provider, client.model, system_prompt, user_prompt)
+            return payload, system_prompt, user_prompt, budget["max_tokens"]
+
+        payload, system_prompt, user_prompt, max_tokens = self.stage("build", build)
+
+        def generate():
+            if not self.args.stream:
+                return client.generate_lyrics(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    max_tokens=max_tokens,
+                    use_cache=self.args.use_cache
+                )
+            started = time.monotonic()
+            parser = IncrementalParser()
+            response = None
+            for event in client.stream_lyrics(system_prompt=system_prompt, user_prompt=user_prompt, max_tokens=max_tokens):
+                if event["type"] == "delta":
+                    if not parser.text:
+                        self.recorder.record("first_token", time.monotonic() - started)
+                    parser.feed(event["text"])
+                else:
+                    response = event["response"]
+            return response
+
+        response = self.stage("generate", generate)
+        parsed = self.stage("parse", lambda: ResponseParser.parse(response))
+        lyrics_text = ResponseParser.format_lyrics_display(parsed["lyrics"])
+
+        if rng.random() < self.args.translate_rate:
+            self.stage("translate", lambda: client.translate_text(lyrics_text, use_cache=self.args.use_cache))
+
+        def export():
+            parts = (parsed["lyrics"], parsed["phonetics"], parsed["qa_log"], parsed["metadata"], payload)
+            return format_download_txt(*parts), format_download_json(*parts)
+
+        self.stage("export", export)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load test and return the report document."""
+    recorder = Recorder()
+    think = think_time(args.think)
+    sampler = ResourceSampler(args.sample_interval)
+    sampler.start()
+
+    started = time.monotonic()
+    stop_at = started + args.ramp_up + args.duration
+    writers = []
+    for i in range(args.users):
+        writer = Writer(i, args, recorder, stop_at, think)
+        writers.append(writer)
+        writer.start()
+        if args.ramp_up and args.users > 1:
+            time.sleep(args.ramp_up / args.users)
+
+    for writer in writers:
+        writer.join()
+    elapsed = time.monotonic() - started
+    sampler.stop()
+
+    report = recorder.summary(elapsed)
+    report.update({
+        "config": {k: v for k, v in vars(args).items() if k != "api_key"},
+        "elapsed_s": round(elapsed, 2),
+        "songs": sum(w.songs for w in writers),
+        "songs_per_minute": sum(w.songs for w in writers) / elapsed * 60 if elapsed else 0.0,
+        "resources": {
+            "samples": sampler.samples,
+            "peak_rss_mb": max((s["rss_mb"] for s in sampler.samples), default=round(_rss_bytes() / 2**20, 1)),
+            "mean_cpu_percent": (
+                sum(s["cpu_percent"] for s in sampler.samples) / len(sampler.samples) if sampler.samples else 0.0
+            )
+        },
+        "client": {
+            "retry": get_retry_policy().stats(),
+            "rate_limiter": get_rate_limiter().stats(),
+            "client_pool": get_client_pool().stats()
+        }
+    })
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{report['songs']} songs in {report['elapsed_s']}s "
+          f"({report['songs_per_minute']:.1f}/min, {report['config']['users']} writers)\n")
+    print(f"{'stage':<12} {'count':>7} {'err':>5} {'/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<12} {s['count']:>7} {s['errors']:>5} {s['per_second']:>7.2f} "
+              f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+    for stage, counts in report["errors"].items():
+        print(f"errors in {stage}: " + ", ".join(f"{name} x{count}" for name, count in counts.items()))
+
+    resources = report["resources"]
+    print(f"\nCPU mean {resources['mean_cpu_percent']:.1f}%  peak RSS {resources['peak_rss_mb']} MB")
+    print(f"{'t s':>7} {'cpu %':>7} {'rss MB':>8} {'threads':>8}")
+    samples = resources["samples"]
+    # Keep the timeline readable on long runs
+    step = max(1, len(samples) // 20)
+    for sample in samples[::step]:
+        print(f"{sample['t']:>7} {sample['cpu_percent']:>7} {sample['rss_mb']:>8} {sample['threads']:>8}")
+
+    retry = report["client"]["retry"]
+    limiter = report["client"]["rate_limiter"]
+    print(f"\nretries: {json.dumps(retry.get('retries_by_reason', {}))}  "
+          f"rate limiter: {json.dumps({k: v for k, v in limiter.items() if k != 'buckets'})}")
+    if "mock_provider" in report:
+        print(f"mock provider: {json.dumps(report['mock_provider'])}")
+
+
+def _rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless load test of the KAIRA session flow.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated writers")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which writers start")
+    parser.add_argument("--songs", type=int, default=0, help="Stop each writer after this many songs (0 = no limit)")
+    parser.add_argument("--think", default="exp:5", help="Think time: none, fixed:S, uniform:LO:HI or exp:MEAN")
+    parser.add_argument("--translate-rate", type=float, default=0.3, help="Fraction of songs that get translated")
+    parser.add_argument("--stream", action="store_true", help="Generate through stream_lyrics like the live view")
+    parser.add_argument("--use-cache", action="store_true", help="Use the shared response cache")
+    parser.add_argument("--provider", default=os.getenv("DEFAULT_MODEL_PROVIDER", "openai"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--base-url", default=None, help="Provider endpoint (defaults to the *_BASE_URL env var)")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between CPU/RSS samples")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", default=None, help="Write the full report to this file")
+    parser.add_argument("--mock", action="store_true", help="Serve the provider from an in-process mock")
+    parser.add_argument("--mock-ttft", type=float, default=0.5)
+    parser.add_argument("--mock-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    mock = None
+    if args.mock:
+        from core.mock_provider import MockProvider
+        mock = MockProvider(
+            ttft=args.mock_ttft,
+            tokens_per_second=args.mock_tokens_per_second,
+            error_rate=args.mock_error_rate,
+            rate_limit_rate=args.mock_rate_limit_rate,
+            seed=args.seed
+        ).start()
+        args.base_url = mock.base_urls()[args.provider]
+        env_key = f"{args.provider.upper()}_API_KEY"
+        os.environ.setdefault(env_key, "mock-key")
+
+    try:
+        report = run(args)
+    finally:
+        if mock is not None:
+            mock.stop()
+    if mock is not None:
+        report["mock_provider"] = mock.stats()
+
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 1 if report["songs"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
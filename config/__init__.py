@@ -1,20 +1,35 @@
 """
 Configuration package for KAIRA 2025.
 Contains genre, type, vibe, and structure definitions.
+
+Names are resolved on first access (PEP 562).
 """
 
-from .genres import GENRES, GENRE_DESCRIPTIONS
-from .types import SONG_TYPES, TYPE_DESCRIPTIONS
-from .vibes import VIBES, VIBE_DESCRIPTIONS
-from .structures import STRUCTURES, DEFAULT_STRUCTURE
-
-__all__ = [
-    'GENRES',
-    'GENRE_DESCRIPTIONS',
-    'SONG_TYPES',
-    'TYPE_DESCRIPTIONS',
-    'VIBES',
-    'VIBE_DESCRIPTIONS',
-    'STRUCTURES',
-    'DEFAULT_STRUCTURE'
-]
+import importlib
+from typing import Any, List
+
+# Public name -> defining submodule
+_EXPORTS = {
+    'GENRES': '.genres',
+    'GENRE_DESCRIPTIONS': '.genres',
+    'SONG_TYPES': '.types',
+    'TYPE_DESCRIPTIONS': '.types',
+    'VIBES': '.vibes',
+    'VIBE_DESCRIPTIONS': '.vibes',
+    'STRUCTURES': '.structures',
+    'DEFAULT_STRUCTURE': '.structures'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
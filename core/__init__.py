@@ -1,5 +1,64 @@
-from .gpt_client import GPTClient
-from .llm_client import LLMClient
-from .prompt_builder import PromptBuilder
-from .response_parser import ResponseParser
-from .validator import validate_payload
+"""
+Core package for KAIRA 2025.
+Clients, prompt building, parsing and the generation engines.
+
+Names are resolved on first access (PEP 562), so `import core` stays cheap
+and a provider SDK is only imported when the client that needs it is used.
+"""
+
+import importlib
+from typing import Any, List
+
+# Public name -> defining submodule
+_EXPORTS = {
+    "GPTClient": ".gpt_client",
+    "LLMClient": ".llm_client",
+    "PromptBuilder": ".prompt_builder",
+    "ResponseParser": ".response_parser",
+    "IncrementalParser": ".response_parser",
+    "validate_payload": ".validator",
+    "ClientPool": ".client_pool",
+    "get_client_pool": ".client_pool",
+    "run_async": ".client_pool",
+    "ResponseCache": ".response_cache",
+    "get_response_cache": ".response_cache",
+    "HedgedClient": ".hedging",
+    "get_hedged_client": ".hedging",
+    "hedging_stats": ".hedging",
+    "RetryPolicy": ".retry",
+    "get_retry_policy": ".retry",
+    "RateLimiter": ".rate_limiter",
+    "get_rate_limiter": ".rate_limiter",
+    "SectionEngine": ".section_engine",
+    "RevisionEngine": ".revision",
+    "apply_edits": ".revision",
+    "JSONCodec": ".codec",
+    "get_codec": ".codec",
+    "count_tokens": ".token_budget",
+    "plan_token_budget": ".token_budget",
+    "Tracer": ".tracing",
+    "get_tracer": ".tracing",
+    "UsageLedger": ".ledger",
+    "get_ledger": ".ledger",
+    "usage_context": ".ledger",
+    "SongStore": ".song_store",
+    "get_song_store": ".song_store",
+    "DuplicateIndex": ".dedup",
+    "get_duplicate_index": ".dedup",
+    "screen_candidates": ".dedup"
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
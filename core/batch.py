@@ -0,0 +1,293 @@
+"""
+Batch Generation CLI for KAIRA 2025.
+Runs JSONL payloads through LLMClient with bounded concurrency.
+
+Usage:
+    python -m core.batch payloads.jsonl results.jsonl --provider openai --concurrency 8
+
+Each input line is a payload in the shape utils.build_json_payload produces.
+Each output line holds the payload hash, status, parsed result and timing.
+Payloads already completed in the output file are skipped, so an interrupted
+run resumes where it stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO
+
+from .client_pool import run_async
+from .dedup import DuplicateIndex, get_duplicate_index, screen_candidates
+from .ledger import usage_context
+from .llm_client import LLMClient, _is_malformed
+from .prompt_builder import PromptBuilder
+from .response_parser import ResponseParser
+from .token_budget import plan_token_budget
+from .tracing import get_tracer
+from .validator import validate_payload
+
+
+def read_payloads(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read payloads from a JSONL file (blank lines are ignored).
+
+    Args:
+        path: Input file path
+
+    Yields:
+        Payload dictionaries
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e.msg})")
+
+
+# Batch results share the duplicate index with saved songs; their keys are
+# payload hashes, so prefix them to keep them apart from song ids
+BATCH_KEY_PREFIX = "batch:"
+
+
+def completed_hashes(path: str) -> Set[str]:
+    """
+    Collect payload hashes already completed in an output file.
+
+    Args:
+        path: Output file path (missing file = nothing completed)
+
+    Returns:
+        Set of payload hashes with status 'ok' or 'duplicate'
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from an interrupted run
+                continue
+            if record.get("status") in ("ok", "duplicate"):
+                done.add(record.get("payload_hash"))
+    return done
+
+
+class BatchRunner:
+    """
+    Runs payloads through LLMClient with a concurrency limit and streams
+    results to an output JSONL file as they complete.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        concurrency: int = 4,
+        temperature: float = 0.8,
+        max_tokens: Optional[int] = None,
+        progress: Optional[TextIO] = sys.stderr,
+        dedup: Optional[DuplicateIndex] = None,
+        dedup_mode: str = "flag"
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            client: Client used for every payload
+            concurrency: Maximum generations in flight
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens per response (None = planned per payload)
+            progress: Stream for progress lines (None = silent)
+            dedup: Near-duplicate index results are checked against and added to
+                (None = no checks)
+            dedup_mode: 'flag' marks near-duplicates in metadata; 'reject' records
+                them with status 'duplicate' (skipped on resume, like 'ok')
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.progress = progress
+        self.dedup = dedup
+        self.dedup_mode = dedup_mode
+        self.system_prompt = PromptBuilder.get_system_prompt()
+
+        self.stats = {"total": 0, "skipped": 0, "ok": 0, "invalid": 0, "error": 0, "duplicate": 0, "tokens": 0}
+        self._started = 0.0
+
+    async def run(self, payloads: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """
+        Generate every payload not yet completed in output_path.
+
+        Args:
+            payloads: Payload dictionaries
+            output_path: JSONL file results are appended to
+
+        Returns:
+            Run statistics (counts, elapsed seconds, throughput)
+        """
+        from utils import payload_hash
+
+        done = completed_hashes(output_path)
+        pending = []
+        for payload in payloads:
+            digest = payload_hash(payload)
+            if digest in done:
+                self.stats["skipped"] += 1
+            else:
+                pending.append((digest, payload))
+        self.stats["total"] = len(pending)
+
+        self._started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            async def worker(digest: str, payload: Dict[str, Any]):
+                async with semaphore:
+                    record = await self._generate(digest, payload)
+                # Single-threaded event loop: whole lines, no interleaving
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                self.stats[record["status"]] += 1
+                self._report()
+
+            await asyncio.gather(*[worker(digest, payload) for digest, payload in pending])
+
+        return self.summary()
+
+    async def _generate(self, digest: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"payload_hash": digest, "payload": payload}
+
+        is_valid, errors = validate_payload(payload)
+        if not is_valid:
+            record.update(status="invalid", errors=errors)
+            return record
+
+        started = time.monotonic()
+        tracer = get_tracer()
+        with tracer.span(
+            "batch.item",
+            provider=self.client.provider,
+            lyrics_part=payload.get("lyrics_part", "Full Song"),
+            payload_hash=digest
+        ) as span:
+            with tracer.span("prompt.build"):
+                user_prompt = PromptBuilder.build_user_prompt(payload)
+                max_tokens = self.max_tokens or plan_token_budget(
+                    payload, self.client.provider, self.client.model, self.system_prompt, user_prompt
+                )["max_tokens"]
+            try:
+                with usage_context(payload, source="batch"):
+                    response = await self.client.agenerate_lyrics(
+                        system_prompt=self.system_prompt,
+                        user_prompt=user_prompt,
+                        temperature=self.temperature,
+                        max_tokens=max_tokens
+                    )
+                parsed = ResponseParser.parse(response)
+                usage = parsed["metadata"].get("usage", {}) if isinstance(parsed["metadata"], dict) else {}
+                self.stats["tokens"] += usage.get("total_tokens", 0)
+                if _is_malformed(response):
+                    # Out of JSON retries: record an error so resume regenerates it
+                    record.update(status="error", error="Invalid JSON format", raw=response["lyrics"])
+                elif self.dedup is not None and not screen_candidates([parsed], self.dedup, self.dedup_mode):
+                    record.update(status="duplicate", result=parsed)
+                else:
+                    record.update(status="ok", result=parsed)
+                    if self.dedup is not None:
+                        self.dedup.add_lyrics(BATCH_KEY_PREFIX + digest, parsed["lyrics"])
+            except Exception as e:
+                record.update(status="error", error=str(e))
+            span.set(status=record["status"])
+
+        record["elapsed"] = round(time.monotonic() - started, 3)
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get run statistics.
+
+        Returns:
+            Counts plus elapsed seconds, songs/minute and tokens/second
+        """
+        elapsed = time.monotonic() - self._started if self._started else 0.0
+        finished = self.stats["ok"] + self.stats["invalid"] + self.stats["error"] + self.stats["duplicate"]
+        return {
+            **self.stats,
+            "elapsed": round(elapsed, 2),
+            "songs_per_minute": round(self.stats["ok"] / elapsed * 60, 2) if elapsed else 0.0,
+            "tokens_per_second": round(self.stats["tokens"] / elapsed, 1) if elapsed else 0.0,
+            "finished": finished
+        }
+
+    def _report(self):
+        if self.progress is None:
+            return
+        s = self.summary()
+        self.progress.write(
+            f"\r[{s['finished']}/{s['total']}] ok={s['ok']} error={s['error']} invalid={s['invalid']} duplicate={s['duplicate']} "
+            f"| {s['songs_per_minute']} songs/min | {s['elapsed']}s"
+        )
+        self.progress.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Generate KAIRA lyrics for every payload in a JSONL file.")
+    parser.add_argument("input", help="JSONL file of payloads")
+    parser.add_argument("output", help="JSONL file results are appended to (also the resume checkpoint)")
+    parser.add_argument("--provider", default=os.getenv("DEFAULT_MODEL_PROVIDER", "openai"))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--temperature", type=float, default=float(os.getenv("DEFAULT_TEMPERATURE", "0.8")))
+    parser.add_argument("--max-tokens", type=int, default=None, help="Fixed max_tokens (default: planned per payload)")
+    parser.add_argument("--use-cache", action="store_true", help="Serve repeated requests from the response cache")
+    parser.add_argument("--trace", default=None, help="Append per-stage timing spans to this JSONL file")
+    parser.add_argument("--metrics", default=None, help="Write a Prometheus snapshot of stage timings to this file")
+    parser.add_argument(
+        "--dedup",
+        choices=["flag", "reject", "off"],
+        default=os.getenv("KAIRA_DEDUP_MODE", "flag"),
+        help="Near-duplicate results: flag them in metadata, reject them, or skip the check"
+    )
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.trace or args.metrics:
+        get_tracer().enable(path=args.trace, metrics_path=args.metrics)
+
+    cache = None
+    if args.use_cache:
+        from .response_cache import get_response_cache
+        cache = get_response_cache()
+
+    client = LLMClient(provider=args.provider, model=args.model, cache=cache)
+    runner = BatchRunner(
+        client,
+        concurrency=args.concurrency,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        dedup=None if args.dedup == "off" else get_duplicate_index(),
+        dedup_mode=args.dedup
+    )
+    summary = run_async(runner.run(list(read_payloads(args.input)), args.output))
+
+    sys.stderr.write("\n")
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
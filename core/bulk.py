@@ -0,0 +1,439 @@
+"""
+Bulk Generation for KAIRA 2025.
+Offline catalog runs through provider batch APIs (OpenAI Batch,
+Anthropic Message Batches): higher throughput limits at lower cost,
+with results arriving minutes to hours later.
+
+Usage:
+    python -m core.bulk payloads.jsonl results.jsonl --provider anthropic
+
+Submitted batch ids are checkpointed next to the output file, so rerunning the
+same command after an interruption polls the existing batches instead of
+submitting again. Creating a batch is not idempotent, so only rate-limit
+rejections are retried on submit; after a timeout or server error the batch
+may still exist, and the run stops with the remaining requests checkpointed.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .batch import completed_hashes, read_payloads
+from .llm_client import LLMClient, _anthropic_usage, _attach_usage, _is_malformed, _usage_record
+from .prompt_builder import PromptBuilder
+from .response_parser import ResponseParser
+from .token_budget import plan_token_budget
+from .validator import validate_payload
+
+logger = logging.getLogger(__name__)
+
+# (custom_id, raw text or None, usage record, error message or None)
+BulkResult = Tuple[str, Optional[str], Dict[str, int], Optional[str]]
+
+
+class OpenAIBatchBackend:
+    """
+    OpenAI Batch API: upload a JSONL request file, create a batch, poll it
+    and download the output/error files.
+    """
+
+    ENDPOINT = "/v1/chat/completions"
+    MAX_REQUESTS = 50000
+
+    def __init__(self, client: Any):
+        """
+        Args:
+            client: OpenAI SDK client (or a stand-in with the same files/batches API)
+        """
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """Upload the requests and create a batch; returns the batch id."""
+        lines = [
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": self.ENDPOINT, "body": body}, ensure_ascii=False)
+            for custom_id, body in requests
+        ]
+        upload = self.client.files.create(
+            file=("kaira_batch.jsonl", io.BytesIO("\n".join(lines).encode("utf-8"))),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=self.ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        """Return 'pending', 'ended' or 'failed'."""
+        status = self.client.batches.retrieve(batch_id).status
+        if status == "failed":
+            return "failed"
+        # Expired and cancelled batches still publish whatever finished
+        if status in ("completed", "expired", "cancelled"):
+            return "ended"
+        return "pending"
+
+    def results(self, batch_id: str) -> Iterator[BulkResult]:
+        """Yield one result per request from the output and error files."""
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") == 200 and body.get("choices"):
+                    usage = body.get("usage") or {}
+                    yield (
+                        record["custom_id"],
+                        body["choices"][0]["message"]["content"],
+                        _usage_record(
+                            usage.get("prompt_tokens"),
+                            usage.get("completion_tokens"),
+                            (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+                        ),
+                        None
+                    )
+                else:
+                    error = record.get("error") or body.get("error") or {}
+                    message = error.get("message") if isinstance(error, dict) else str(error)
+                    yield record["custom_id"], None, {}, message or f"HTTP {response.get('status_code')}"
+
+
+class AnthropicBatchBackend:
+    """
+    Anthropic Message Batches API: requests are posted inline and results
+    are streamed back once processing has ended.
+    """
+
+    MAX_REQUESTS = 100000
+
+    def __init__(self, client: Any):
+        """
+        Args:
+            client: Anthropic SDK client (or a stand-in with the same messages.batches API)
+        """
+        self.client = client
+
+    def submit(self, requests: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """Create a message batch; returns the batch id."""
+        batch = self.client.messages.batches.create(
+            requests=[{"custom_id": custom_id, "params": params} for custom_id, params in requests]
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        """Return 'pending' or 'ended'."""
+        status = self.client.messages.batches.retrieve(batch_id).processing_status
+        return "ended" if status == "ended" else "pending"
+
+    def results(self, batch_id: str) -> Iterator[BulkResult]:
+        """Yield one result per request."""
+        for item in self.client.messages.batches.results(batch_id):
+            result = item.result
+            if result.type == "succeeded":
+                message = result.message
+                yield item.custom_id, message.content[0].text, _anthropic_usage(message.usage), None
+            else:
+                error = getattr(result, "error", None)
+                yield item.custom_id, None, {}, str(getattr(error, "error", None) or error or result.type)
+
+
+BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "anthropic": AnthropicBatchBackend
+}
+
+
+class BulkRunner:
+    """
+    Packs payloads into provider batches, polls them and writes parsed
+    results in the same record format as core.batch.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        checkpoint_path: str,
+        backend: Optional[Any] = None,
+        temperature: float = 0.8,
+        max_tokens: Optional[int] = None,
+        poll_interval: float = 60.0,
+        max_requests: Optional[int] = None
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            client: Client whose provider, model and request format are used
+            checkpoint_path: JSON file holding submitted batch ids
+            backend: Batch backend (defaults to the provider's backend around client.client)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens per response (None = planned per payload)
+            poll_interval: Seconds between status polls
+            max_requests: Requests per submitted batch (defaults to the provider limit)
+        """
+        if backend is None:
+            if client.provider not in BACKENDS:
+                raise ValueError(f"Bulk mode is not available for {client.provider}. Supported: {list(BACKENDS)}")
+            backend = BACKENDS[client.provider](client.client)
+
+        self.client = client
+        self.backend = backend
+        self.checkpoint_path = checkpoint_path
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests or getattr(backend, "MAX_REQUESTS", 10000)
+
+    def run(self, payloads: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """
+        Submit (or resume), wait for and collect every payload not yet
+        completed in output_path.
+
+        Args:
+            payloads: Payload dictionaries
+            output_path: JSONL file results are appended to
+
+        Returns:
+            Counts of ok / error / invalid / skipped records
+        """
+        state = self.load_checkpoint()
+        if state is None:
+            state = self.submit(payloads, output_path)
+        else:
+            logger.info(f"Resuming {len(state['batches'])} submitted batch(es) from {self.checkpoint_path}")
+            self.submit_pending(state)
+
+        self.wait(state)
+        stats = self.collect(state, output_path)
+        stats["skipped"] += state.get("skipped", 0)
+        stats["invalid"] = state.get("invalid", 0)
+
+        os.remove(self.checkpoint_path)
+        return stats
+
+    def submit(self, payloads: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        """
+        Validate and checkpoint payloads, then pack and submit them.
+
+        Invalid payloads are written to output_path straight away.
+
+        Returns:
+            Checkpoint state
+        """
+        from utils import payload_hash
+
+        done = completed_hashes(output_path)
+        state: Dict[str, Any] = {
+            "provider": self.client.provider,
+            "model": self.client.model,
+            "batches": [],
+            "payloads": {},
+            "pending": [],
+            "skipped": 0,
+            "invalid": 0
+        }
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            for payload in payloads:
+                digest = payload_hash(payload)
+                if digest in done or digest in state["payloads"]:
+                    state["skipped"] += 1
+                    continue
+
+                is_valid, errors = validate_payload(payload)
+                if not is_valid:
+                    state["invalid"] += 1
+                    _write(out, {"payload_hash": digest, "payload": payload, "status": "invalid", "errors": errors})
+                    continue
+
+                state["payloads"][digest] = payload
+                state["pending"].append(digest)
+
+        # Checkpoint before the first batch is created so an interrupted run resumes
+        self.save_checkpoint(state)
+        self.submit_pending(state)
+        return state
+
+    def submit_pending(self, state: Dict[str, Any]):
+        """Pack and submit every checkpointed payload that is not in a batch yet."""
+        pending = state.setdefault("pending", [])
+        system_prompt = PromptBuilder.get_system_prompt()
+        while pending:
+            chunk = pending[:self.max_requests]
+            requests = [(digest, self._payload_request(system_prompt, state["payloads"][digest])) for digest in chunk]
+            batch_id = self._create_batch(requests)
+            state["batches"].append({"id": batch_id, "status": "pending"})
+            del pending[:len(chunk)]
+            # Checkpoint after every batch so a crash never resubmits one
+            self.save_checkpoint(state)
+            logger.info(f"Submitted batch {batch_id} with {len(chunk)} requests")
+
+    def _create_batch(self, requests: List[Tuple[str, Dict[str, Any]]]) -> str:
+        """
+        Submit one batch, retrying only rate-limit rejections.
+
+        A timeout or server error may arrive after the provider has already
+        created the batch, and retrying would pay for it twice, so those errors
+        stop the run with the chunk still pending in the checkpoint.
+        """
+        policy = self.client.retry_policy
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.backend.submit(requests)
+            except Exception as e:
+                delay = policy.next_delay(e, attempt, started) if policy.classify(e) == "rate_limit" else None
+                if delay is None:
+                    logger.error(
+                        f"Submitting a batch of {len(requests)} requests failed: {e}. The provider may still "
+                        f"have created it; check its batch list before rerunning, which submits the pending "
+                        f"requests in {self.checkpoint_path} again."
+                    )
+                    raise
+                time.sleep(delay)
+
+    def wait(self, state: Dict[str, Any]):
+        """Poll every pending batch until it has ended or failed."""
+        while True:
+            pending = [batch for batch in state["batches"] if batch["status"] == "pending"]
+            for batch in pending:
+                batch["status"] = self.client.retry_policy.call(lambda: self.backend.status(batch["id"]))
+            self.save_checkpoint(state)
+            if all(batch["status"] != "pending" for batch in state["batches"]):
+                return
+            time.sleep(self.poll_interval)
+
+    def collect(self, state: Dict[str, Any], output_path: str) -> Dict[str, int]:
+        """
+        Download results, parse them and append records to output_path.
+        Payloads already completed there (by a run that stopped before
+        removing its checkpoint) are not written again.
+
+        Returns:
+            Counts of ok, error and already completed (skipped) records
+        """
+        stats = {"ok": 0, "error": 0, "skipped": 0}
+        done = completed_hashes(output_path)
+        seen = set()
+        with open(output_path, "a", encoding="utf-8") as out:
+            for batch in state["batches"]:
+                if batch["status"] == "failed":
+                    continue
+                for custom_id, text, usage, error in self.backend.results(batch["id"]):
+                    payload = state["payloads"].get(custom_id)
+                    if payload is None or custom_id in seen:
+                        continue
+                    seen.add(custom_id)
+                    if custom_id in done:
+                        stats["skipped"] += 1
+                        continue
+                    record = {"payload_hash": custom_id, "payload": payload}
+                    if error is None:
+                        result = _attach_usage(self.client._parse_json(text), usage)
+                        if _is_malformed(result):
+                            # An error, not a result: resume regenerates it
+                            record.update(status="error", error="Invalid JSON format", raw=text)
+                        else:
+                            result["metadata"]["bulk"] = {"batch_id": batch["id"]}
+                            record.update(status="ok", result=ResponseParser.parse(result))
+                    else:
+                        record.update(status="error", error=error)
+                    if self.client.ledger is not None:
+                        # Batch results carry no per-request latency
+                        self.client.ledger.record(
+                            self.client.provider, self.client.model, usage, None,
+                            kind="bulk", status=record["status"], payload=payload, source="bulk"
+                        )
+                    stats[record["status"]] += 1
+                    _write(out, record)
+
+            # Requests that never produced a result (failed or expired batches)
+            for custom_id, payload in state["payloads"].items():
+                if custom_id not in seen and custom_id not in done:
+                    stats["error"] += 1
+                    _write(out, {"payload_hash": custom_id, "payload": payload, "status": "error", "error": "No batch result"})
+        return stats
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Load submitted batches for this provider/model, if any."""
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if (state.get("provider"), state.get("model")) != (self.client.provider, self.client.model):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to {state.get('provider')}:{state.get('model')}"
+            )
+        return state
+
+    def save_checkpoint(self, state: Dict[str, Any]):
+        """Write the checkpoint atomically."""
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _payload_request(self, system_prompt: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Provider request body for one payload, with max_tokens planned unless pinned."""
+        user_prompt = PromptBuilder.build_user_prompt(payload)
+        max_tokens = self.max_tokens or plan_token_budget(
+            payload, self.client.provider, self.client.model, system_prompt, user_prompt
+        )["max_tokens"]
+        return self._request(system_prompt, user_prompt, max_tokens)
+
+    def _request(self, system_prompt: str, user_prompt: str, max_tokens: int) -> Dict[str, Any]:
+        if self.client.provider == "anthropic":
+            return self.client._anthropic_request(system_prompt, user_prompt, self.temperature, max_tokens)
+        return self.client._openai_request(system_prompt, user_prompt, self.temperature, max_tokens)
+
+
+def _write(out: Any, record: Dict[str, Any]):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Generate KAIRA lyrics for a JSONL file through provider batch APIs.")
+    parser.add_argument("input", help="JSONL file of payloads")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--provider", default=os.getenv("DEFAULT_MODEL_PROVIDER", "openai"), choices=list(BACKENDS))
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--checkpoint", default=None, help="Batch checkpoint file (default: <output>.bulk.json)")
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument("--temperature", type=float, default=float(os.getenv("DEFAULT_TEMPERATURE", "0.8")))
+    parser.add_argument("--max-tokens", type=int, default=None, help="Fixed max_tokens (default: planned per payload)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    runner = BulkRunner(
+        LLMClient(provider=args.provider, model=args.model),
+        checkpoint_path=args.checkpoint or args.output + ".bulk.json",
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        poll_interval=args.poll_interval
+    )
+    stats = runner.run(list(read_payloads(args.input)), args.output)
+
+    print(json.dumps(stats, indent=2))
+    return 0 if stats["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
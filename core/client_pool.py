@@ -0,0 +1,207 @@
+"""
+Provider Client Pool for KAIRA 2025.
+Keeps provider SDK clients alive for the whole process so warm HTTP
+connections are reused across Streamlit reruns and sessions.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+
+PoolKey = Tuple[str, str, Optional[str]]
+
+T = TypeVar("T")
+
+
+class ClientPool:
+    """
+    Thread-safe, process-wide pool of provider clients.
+    Clients are keyed by (provider, api_key, base_url).
+
+    Async clients are bound to the event loop that opened their connections,
+    so they are kept per loop (see get_async()) and never outlive it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[PoolKey, Any] = {}
+        self._loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[PoolKey, Any]]" = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+
+    def get(
+        self,
+        provider: str,
+        api_key: str,
+        factory: Callable[[], Any],
+        base_url: Optional[str] = None
+    ) -> Any:
+        """
+        Get a pooled client, creating it with `factory` on first use.
+
+        Args:
+            provider: 'openai', 'anthropic', or 'google'
+            api_key: API key the client authenticates with
+            factory: Zero-argument callable that builds the SDK client
+            base_url: Optional custom endpoint for the provider
+
+        Returns:
+            Shared client instance for this key
+        """
+        key = (provider, api_key, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._hits += 1
+                return client
+
+            client = factory()
+            self._clients[key] = client
+            self._misses += 1
+            return client
+
+    def get_async(
+        self,
+        provider: str,
+        api_key: str,
+        factory: Callable[[], Any],
+        base_url: Optional[str] = None
+    ) -> Any:
+        """
+        Get the async client for the running event loop, creating it on first use.
+
+        Clients are held per loop, keyed weakly by the loop object, and clients
+        of loops that have since closed are dropped. They are not counted in the
+        process-wide hit/miss and live-client stats.
+
+        Args:
+            provider: 'openai' or 'anthropic'
+            api_key: API key the client authenticates with
+            factory: Zero-argument callable that builds the async SDK client
+            base_url: Optional custom endpoint for the provider
+
+        Returns:
+            Client instance shared by callers on this loop
+        """
+        loop = asyncio.get_running_loop()
+        key = (provider, api_key, base_url)
+        with self._lock:
+            for closed in [other for other in self._loop_clients if other.is_closed()]:
+                del self._loop_clients[closed]
+            clients = self._loop_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = factory()
+            return client
+
+    async def aclose_loop(self):
+        """Close and drop the running event loop's async clients."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._loop_clients.pop(loop, {}).values())
+
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    result = close()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with hits, misses, live clients and open connections
+            (process-wide clients), plus the number of per-loop async clients
+        """
+        with self._lock:
+            clients = list(self._clients.items())
+            hits, misses = self._hits, self._misses
+            loop_clients = sum(len(c) for loop, c in self._loop_clients.items() if not loop.is_closed())
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "live_clients": len(clients),
+            "loop_clients": loop_clients,
+            "live_connections": sum(_count_connections(c) for _, c in clients),
+            "clients": [
+                {
+                    "provider": provider,
+                    "key_id": _key_id(api_key),
+                    "base_url": base_url,
+                    "connections": _count_connections(client)
+                }
+                for (provider, api_key, base_url), client in clients
+            ]
+        }
+
+    def clear(self):
+        """Close and drop every pooled client."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._loop_clients.clear()
+            self._hits = 0
+            self._misses = 0
+
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+
+
+def _key_id(api_key: str) -> str:
+    """Short, non-reversible identifier for an API key (safe to display)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def _count_connections(client: Any) -> int:
+    """
+    Best-effort count of open HTTP connections held by an SDK client.
+    OpenAI and Anthropic clients wrap an httpx client backed by an httpcore pool.
+    """
+    try:
+        connections = client._client._transport._pool.connections
+        return len(connections)
+    except Exception:
+        return 0
+
+
+_default_pool = ClientPool()
+
+
+def get_client_pool() -> ClientPool:
+    """Get the process-wide client pool."""
+    return _default_pool
+
+
+def run_async(awaitable: Awaitable[T]) -> T:
+    """
+    asyncio.run() for blocking wrappers: closes the loop's pooled async
+    clients before the loop shuts down, so repeated calls don't leak them.
+
+    Args:
+        awaitable: Coroutine to run on a fresh event loop
+
+    Returns:
+        The coroutine's result
+    """
+    async def main():
+        try:
+            return await awaitable
+        finally:
+            await get_client_pool().aclose_loop()
+
+    return asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+JSON Codec for KAIRA 2025.
+Pluggable JSON backend for the response decode path: orjson or msgspec
+when installed, the standard library otherwise.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+
+class JSONCodec:
+    """
+    A JSON decoder plus decode-time statistics.
+
+    loads() raises ValueError for invalid input whatever the backend, so
+    callers only ever catch one exception type.
+    """
+
+    def __init__(self, name: str, loads: Callable[[str], Any], errors: Tuple[Type[BaseException], ...]):
+        """
+        Initialize the codec.
+
+        Args:
+            name: Backend name ('json', 'orjson' or 'msgspec')
+            loads: Backend decode function accepting str
+            errors: Exception types the backend raises on invalid input
+        """
+        self.name = name
+        self._loads = loads
+        self._errors = errors
+
+        self._lock = threading.Lock()
+        self._stats = {"decodes": 0, "recovered": 0, "failed": 0, "seconds": 0.0}
+
+    def loads(self, text: str) -> Any:
+        """Decode JSON text; raises ValueError when it is not valid JSON."""
+        try:
+            return self._loads(text)
+        except self._errors as e:
+            if isinstance(e, ValueError):
+                raise
+            raise ValueError(str(e)) from e
+
+    def record(self, seconds: float, outcome: str = "ok"):
+        """
+        Record one response decode.
+
+        Args:
+            seconds: Time spent decoding
+            outcome: 'ok', 'recovered' (JSON found inside other text) or 'failed'
+        """
+        with self._lock:
+            self._stats["decodes"] += 1
+            self._stats["seconds"] += seconds
+            if outcome != "ok":
+                self._stats[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get decode statistics.
+
+        Returns:
+            Dictionary with the backend name, decode counters and average time
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["codec"] = self.name
+        stats["avg_ms"] = stats["seconds"] / stats["decodes"] * 1000 if stats["decodes"] else 0.0
+        return stats
+
+
+def _json_codec() -> JSONCodec:
+    return JSONCodec("json", json.loads, (ValueError,))
+
+
+def _orjson_codec() -> JSONCodec:
+    import orjson
+    return JSONCodec("orjson", orjson.loads, (orjson.JSONDecodeError,))
+
+
+def _msgspec_codec() -> JSONCodec:
+    import msgspec
+    return JSONCodec("msgspec", msgspec.json.decode, (msgspec.DecodeError,))
+
+
+# Tried in this order when no codec is requested
+CODECS = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _json_codec
+}
+
+
+def load_codec(name: Optional[str] = None) -> JSONCodec:
+    """
+    Create a codec.
+
+    Args:
+        name: 'orjson', 'msgspec' or 'json' (None = fastest installed)
+
+    Returns:
+        New JSONCodec
+    """
+    if name:
+        if name not in CODECS:
+            raise ValueError(f"Unknown JSON codec: {name}. Supported: {list(CODECS)}")
+        return CODECS[name]()
+
+    for factory in CODECS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return _json_codec()
+
+
+_default_codec: Optional[JSONCodec] = None
+_default_codec_lock = threading.Lock()
+
+
+def get_codec() -> JSONCodec:
+    """
+    Get the process-wide codec.
+
+    KAIRA_JSON_CODEC selects a backend explicitly; by default the fastest
+    installed one is used.
+    """
+    global _default_codec
+    with _default_codec_lock:
+        if _default_codec is None:
+            _default_codec = load_codec(os.getenv("KAIRA_JSON_CODEC") or None)
+        return _default_codec
@@ -0,0 +1,407 @@
+"""
+Near-Duplicate Detection for KAIRA 2025.
+MinHash signatures over character shingles with LSH banding, so a new
+result can be checked against every stored song before it is saved or shown.
+
+Signatures use one-permutation hashing with densification: every shingle is
+hashed once and lands in one of num_perm bins (keeping the bin minimum), which
+estimates Jaccard similarity like num_perm independent permutations at a
+fraction of the cost.
+
+Signatures live in one flat array (4 bytes per permutation per entry) and
+are persisted as blobs, so the index loads without re-hashing any lyrics and
+grows one entry at a time.
+"""
+
+import json
+import logging
+import operator
+import os
+import random
+import re
+import sqlite3
+import threading
+import unicodedata
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MAX_HASH = 0xFFFFFFFF
+_EMPTY = 1 << 32
+# Multiplicative (Fibonacci) hashing constant, and the offset added per bin
+# when densification borrows a neighbouring bin's value
+_GOLDEN = 0x9E3779B1
+_BORROW_OFFSET = 0x5BD1E995
+
+# Lyrics parts fingerprinted per song: the chorus (what models repeat most)
+# and the whole song
+PARTS = ("chorus", "song")
+
+# What screen_candidates() does with a duplicate: flag it in metadata, reject it, or skip checks
+MODES = ("flag", "reject", "off")
+
+_TAG = re.compile(r"\[[^\]]*\]")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents, section tags and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", _TAG.sub(" ", text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def shingles(text: str, size: int = 5, words: bool = False) -> Set[int]:
+    """
+    Hashed shingles of normalized text.
+
+    Args:
+        text: Input text
+        size: Shingle length in characters (or words)
+        words: Use word shingles instead of character shingles
+
+    Returns:
+        Set of 32-bit shingle hashes
+    """
+    text = normalize(text)
+    if words:
+        tokens = text.split()
+        grams = (" ".join(tokens[i:i + size]) for i in range(max(len(tokens) - size + 1, 1)))
+    else:
+        grams = (text[i:i + size] for i in range(max(len(text) - size + 1, 1)))
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams if gram}
+
+
+def lyrics_parts(lyrics: Any) -> Dict[str, str]:
+    """Text of each fingerprinted part of a lyrics dict (missing parts omitted)."""
+    if isinstance(lyrics, str):
+        return {"song": lyrics} if lyrics.strip() else {}
+    if not isinstance(lyrics, dict):
+        return {}
+    parts = {}
+    chorus = lyrics.get("chorus")
+    if isinstance(chorus, str) and chorus.strip():
+        parts["chorus"] = chorus
+    song = "\n".join(text for text in lyrics.values() if isinstance(text, str) and text.strip())
+    if song:
+        parts["song"] = song
+    return parts
+
+
+class DuplicateIndex:
+    """
+    MinHash + LSH similarity index. Entries are (key, part) pairs; a key
+    (usually a song id) may have several parts.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        word_shingles: bool = False,
+        threshold: float = 0.8,
+        path: Optional[str] = None,
+        seed: int = 1
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            num_perm: MinHash permutations per signature
+            bands: LSH bands (num_perm / bands rows each). With the defaults, pairs
+                above ~0.7 Jaccard similarity almost always share a bucket
+            shingle_size: Shingle length in characters (or words)
+            word_shingles: Use word shingles instead of character shingles
+            threshold: Default estimated Jaccard similarity reported as a duplicate
+            path: SQLite file signatures are persisted to (None = memory only)
+            seed: Seed of the shingle hash
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.word_shingles = word_shingles
+        self.threshold = threshold
+        self.path = path
+
+        self._salt = random.Random(seed).getrandbits(32)
+        self._version = json.dumps([num_perm, shingle_size, word_shingles, seed])
+
+        self._lock = threading.Lock()
+        self._signatures = array("I")
+        self._entries: List[Tuple[str, str]] = []
+        self._removed: Set[int] = set()
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(bands)]
+        self._stats = {"queries": 0, "candidates": 0, "matches": 0}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._load()
+
+    def signature(self, text: str) -> Optional[array]:
+        """
+        MinHash signature of a text.
+
+        Returns:
+            array('I') of num_perm values, or None for text without shingles
+        """
+        hashes = shingles(text, self.shingle_size, self.word_shingles)
+        if not hashes:
+            return None
+
+        n = self.num_perm
+        salt = self._salt
+        bins = [_EMPTY] * n
+        for x in hashes:
+            h = ((x ^ salt) * _GOLDEN) & _MAX_HASH
+            b = (h * n) >> 32
+            if h < bins[b]:
+                bins[b] = h
+
+        # Densify: an empty bin borrows from the next originally non-empty bin to its right
+        if _EMPTY in bins:
+            original = list(bins)
+            for i in range(n):
+                if original[i] == _EMPTY:
+                    distance = 1
+                    while original[(i + distance) % n] == _EMPTY:
+                        distance += 1
+                    bins[i] = (original[(i + distance) % n] + distance * _BORROW_OFFSET) & _MAX_HASH
+        return array("I", bins)
+
+    def add(self, key: str, text: Optional[str] = None, part: str = "song", signature: Optional[array] = None) -> bool:
+        """
+        Add one entry.
+
+        Args:
+            key: Entry key (e.g. song id)
+            text: Text to fingerprint (or pass signature)
+            part: Which part of the item the text is
+            signature: Precomputed signature from signature()
+
+        Returns:
+            False if the text had nothing to fingerprint
+        """
+        signature = signature if signature is not None else self.signature(text or "")
+        if signature is None:
+            return False
+        with self._lock:
+            self._append(key, part, signature)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO signatures (key, part, signature) VALUES (?, ?, ?)",
+                    (key, part, signature.tobytes())
+                )
+                self._db.commit()
+        return True
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        part: Optional[str] = None,
+        signature: Optional[array] = None,
+        threshold: Optional[float] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Find entries similar to a text.
+
+        Args:
+            text: Text to look up (or pass signature)
+            part: Only compare against entries of this part (None = all)
+            signature: Precomputed signature from signature()
+            threshold: Minimum estimated Jaccard similarity (defaults to self.threshold)
+            limit: Maximum matches returned
+
+        Returns:
+            Matches as {"key", "part", "similarity"}, most similar first
+        """
+        signature = signature if signature is not None else self.signature(text or "")
+        if signature is None:
+            return []
+        threshold = self.threshold if threshold is None else threshold
+        n = self.num_perm
+
+        with self._lock:
+            candidates: Set[int] = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates -= self._removed
+
+            matches = []
+            for i in candidates:
+                entry_key, entry_part = self._entries[i]
+                if part is not None and entry_part != part:
+                    continue
+                other = self._signatures[i * n:(i + 1) * n]
+                similarity = sum(map(operator.eq, signature, other)) / n
+                if similarity >= threshold:
+                    matches.append({"key": entry_key, "part": entry_part, "similarity": round(similarity, 3)})
+
+            self._stats["queries"] += 1
+            self._stats["candidates"] += len(candidates)
+            self._stats["matches"] += len(matches)
+
+        matches.sort(key=lambda match: -match["similarity"])
+        return matches[:limit]
+
+    def add_lyrics(self, key: str, lyrics: Any) -> int:
+        """
+        Fingerprint each part of a lyrics dict (see PARTS).
+
+        Returns:
+            Number of entries added
+        """
+        return sum(self.add(key, text, part=part) for part, text in lyrics_parts(lyrics).items())
+
+    def check_lyrics(self, lyrics: Any, threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Compare each part of a lyrics dict with the same part of indexed songs.
+
+        Returns:
+            Matches as {"key", "part", "similarity"}, best match per key and part
+        """
+        matches = []
+        for part, text in lyrics_parts(lyrics).items():
+            seen = set()
+            for match in self.query(text, part=part, threshold=threshold):
+                if match["key"] not in seen:
+                    seen.add(match["key"])
+                    matches.append(match)
+        return matches
+
+    def remove(self, key: str) -> int:
+        """
+        Drop every entry of a key (e.g. a deleted song).
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            indices = [i for i, (entry_key, _) in enumerate(self._entries) if entry_key == key and i not in self._removed]
+            self._removed.update(indices)
+            if self._db is not None and indices:
+                self._db.execute("DELETE FROM signatures WHERE key = ?", (key,))
+                self._db.commit()
+        return len(indices)
+
+    def keys(self) -> Set[str]:
+        """Keys with at least one live entry."""
+        with self._lock:
+            return {key for i, (key, _) in enumerate(self._entries) if i not in self._removed}
+
+    def __len__(self) -> int:
+        return len(self._entries) - len(self._removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with entry count, signature bytes and query counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries) - len(self._removed)
+            stats["signature_bytes"] = self._signatures.itemsize * len(self._signatures)
+        stats["avg_candidates"] = round(stats["candidates"] / stats["queries"], 2) if stats["queries"] else 0.0
+        return stats
+
+    def _band_keys(self, signature: array) -> Iterable[int]:
+        rows = self.rows
+        return (hash(signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands))
+
+    def _append(self, key: str, part: str, signature: array):
+        """Add an entry to the in-memory arrays and buckets (caller holds the lock)."""
+        index = len(self._entries)
+        self._entries.append((key, part))
+        self._signatures.extend(signature)
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, []).append(index)
+
+    def _load(self):
+        """Load persisted signatures; a parameter change drops them (they are not comparable)."""
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS signatures (id INTEGER PRIMARY KEY, key TEXT, part TEXT, signature BLOB)")
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != self._version:
+            self._db.execute("DELETE FROM signatures")
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (self._version,))
+            self._db.commit()
+            return
+        for key, part, blob in self._db.execute("SELECT key, part, signature FROM signatures ORDER BY id"):
+            signature = array("I")
+            signature.frombytes(blob)
+            if len(signature) == self.num_perm:
+                self._append(key, part, signature)
+
+
+def screen_candidates(
+    candidates: List[Dict[str, Any]],
+    index: Optional[DuplicateIndex] = None,
+    mode: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Check parsed candidates against the index before they are saved or shown.
+
+    Duplicates get metadata["duplicate_of"] (the matches); in 'reject' mode
+    they are also dropped. Candidates are compared only with indexed songs,
+    so register kept results with DuplicateIndex.add_lyrics() afterwards.
+
+    Args:
+        candidates: Parsed responses (ResponseParser.parse output)
+        index: Index to check (defaults to the shared index)
+        mode: 'flag', 'reject' or 'off' (defaults to KAIRA_DEDUP_MODE, else 'flag')
+
+    Returns:
+        The candidates that were kept
+    """
+    mode = mode or os.getenv("KAIRA_DEDUP_MODE", "flag")
+    if mode not in MODES:
+        raise ValueError(f"Unsupported dedup mode: {mode}. Supported: {list(MODES)}")
+    if mode == "off":
+        return candidates
+    index = index or get_duplicate_index()
+
+    kept = []
+    for candidate in candidates:
+        matches = index.check_lyrics(candidate.get("lyrics"))
+        if matches:
+            if not isinstance(candidate.get("metadata"), dict):
+                candidate["metadata"] = {}
+            candidate["metadata"]["duplicate_of"] = matches
+            logger.info(f"Near-duplicate result: {matches[0]['part']} matches {matches[0]['key']} ({matches[0]['similarity']:.2f})")
+            if mode == "reject":
+                continue
+        kept.append(candidate)
+    return kept
+
+
+_default_index: Optional[DuplicateIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_duplicate_index() -> DuplicateIndex:
+    """
+    Get the process-wide duplicate index.
+
+    Signatures are persisted at KAIRA_DEDUP_PATH (default .kaira_cache/minhash.sqlite3);
+    KAIRA_DEDUP_THRESHOLD sets the similarity reported as a duplicate (default 0.8).
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DuplicateIndex(
+                threshold=float(os.getenv("KAIRA_DEDUP_THRESHOLD", "0.8")),
+                path=os.getenv("KAIRA_DEDUP_PATH", os.path.join(".kaira_cache", "minhash.sqlite3"))
+            )
+        return _default_index
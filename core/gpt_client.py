@@ -8,6 +8,9 @@ from typing import Dict, Any, Optional
 from openai import OpenAI
 import json
 
+from .client_pool import get_client_pool
+from .retry import MalformedResponseError, get_retry_policy
+
 
 class GPTClient:
     """
@@ -38,7 +41,7 @@ class GPTClient:
         if not self.api_key:
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = get_client_pool().get("openai", self.api_key, lambda: OpenAI(api_key=self.api_key, max_retries=0))
         self.model = model or os.getenv("DEFAULT_MODEL", "gpt-4o")
         
         # Model-specific configurations
@@ -114,7 +117,7 @@ class GPTClient:
             return result
             
         except Exception as e:
-            raise Exception(f"GPT API call failed: {str(e)}")
+            raise Exception(f"GPT API call failed: {str(e)}") from e
     
     def generate_with_retry(
         self,
@@ -126,33 +129,29 @@ class GPTClient:
         """
         Generate lyrics with automatic retry on failure.
         
+        Retries go through the shared retry policy (exponential backoff with
+        jitter, Retry-After); the prompt is sent unchanged on every attempt.
+        
         Args:
             system_prompt: System instruction
             user_prompt: User request
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts
             **kwargs: Additional arguments for generate_lyrics
             
         Returns:
             Dict containing response or error information
         """
-        last_error = None
+        def attempt():
+            result = self.generate_lyrics(system_prompt, user_prompt, **kwargs)
+            # A response without lyrics is treated like malformed JSON
+            if not result.get("lyrics"):
+                raise MalformedResponseError("Response is missing the 'lyrics' field")
+            return result
         
-        for attempt in range(max_retries):
-            try:
-                result = self.generate_lyrics(system_prompt, user_prompt, **kwargs)
-                
-                # Validate that we have lyrics
-                if "lyrics" in result and result["lyrics"]:
-                    return result
-                else:
-                    # Retry with correction prompt
-                    user_prompt += "\n\nPlease ensure the response includes the 'lyrics' field with the generated lyrics."
-                    
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries - 1:
-                    # Add error correction to prompt
-                    user_prompt += f"\n\nPrevious attempt failed with error: {str(e)}. Please try again with valid JSON output."
+        try:
+            return get_retry_policy().call(attempt, max_attempts=max_retries)
+        except Exception as e:
+            last_error = e
         
         # All retries failed
         return {
@@ -0,0 +1,266 @@
+"""
+Hedged Requests for KAIRA 2025.
+Races the same prompts across providers/models to cut tail latency.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .client_pool import run_async
+from .llm_client import LLMClient
+from .response_parser import ResponseParser
+from .validator import validate_response
+
+logger = logging.getLogger(__name__)
+
+
+def _default_accept(response: Dict[str, Any]) -> bool:
+    """Accept a response when it parses and passes validate_response."""
+    is_valid, _ = validate_response(ResponseParser.parse(response))
+    return is_valid
+
+
+class HedgedClient:
+    """
+    Hedging mode for LLMClient.
+
+    The primary client is called first. If it has not returned an acceptable
+    result within `hedge_delay` seconds, the same prompts are fired at the next
+    backup client. The first acceptable response wins and the rest are cancelled.
+    """
+
+    def __init__(
+        self,
+        primary: LLMClient,
+        backups: List[LLMClient],
+        hedge_delay: float = 20.0,
+        max_hedges: int = 1,
+        budget_ratio: float = 0.25,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
+        """
+        Initialize the hedged client.
+
+        Args:
+            primary: Client tried first
+            backups: Clients fired, in order, when earlier attempts are slow or fail
+            hedge_delay: Seconds to wait on outstanding attempts before hedging
+            max_hedges: Default number of backups a single request may fire
+            budget_ratio: Share of requests allowed to hedge, so a provider-wide
+                slowdown cannot double traffic
+            accept: Predicate a response must pass to win (defaults to
+                ResponseParser.parse + validate_response)
+        """
+        self.primary = primary
+        self.backups = backups
+        self.hedge_delay = hedge_delay
+        self.max_hedges = max_hedges
+        self.budget_ratio = budget_ratio
+        self.accept = accept or _default_accept
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "hedges_denied": 0,
+            "primary_wins": 0,
+            "hedge_wins": 0,
+            "failures": 0,
+            "wins_by_client": {}
+        }
+
+    def generate_lyrics(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.8,
+        max_tokens: int = 2500,
+        hedge_delay: Optional[float] = None,
+        max_hedges: Optional[int] = None,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        """Blocking wrapper around agenerate_lyrics()."""
+        return run_async(self.agenerate_lyrics(
+            system_prompt, user_prompt, temperature, max_tokens, hedge_delay, max_hedges, accept
+        ))
+
+    async def agenerate_lyrics(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.8,
+        max_tokens: int = 2500,
+        hedge_delay: Optional[float] = None,
+        max_hedges: Optional[int] = None,
+        accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate lyrics, hedging to backup clients when the primary is slow.
+
+        Args:
+            system_prompt: System instruction
+            user_prompt: User request
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens in response
+            hedge_delay: Per-request override of the hedge delay
+            max_hedges: Per-request hedge budget (0 disables hedging)
+            accept: Per-request override of the acceptance predicate
+
+        Returns:
+            Winning response, same shape as LLMClient.generate_lyrics()
+        """
+        delay = self.hedge_delay if hedge_delay is None else hedge_delay
+        hedges_allowed = min(len(self.backups), self.max_hedges if max_hedges is None else max_hedges)
+        clients = [self.primary] + self.backups[:hedges_allowed]
+        accept = accept or self.accept
+
+        with self._lock:
+            self._stats["requests"] += 1
+
+        pending: Dict[asyncio.Task, int] = {}
+        next_ix = 0
+        budget_denied = False
+        last_error: Optional[Exception] = None
+
+        def launch():
+            nonlocal next_ix
+            client = clients[next_ix]
+            task = asyncio.create_task(
+                client.agenerate_lyrics(system_prompt, user_prompt, temperature, max_tokens)
+            )
+            pending[task] = next_ix
+            next_ix += 1
+
+        launch()
+        try:
+            while pending:
+                can_hedge = next_ix < len(clients) and not budget_denied
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Outstanding attempts are slow: fire the next backup
+                    if self._take_hedge_budget():
+                        launch()
+                    else:
+                        budget_denied = True
+                    continue
+
+                for task in done:
+                    ix = pending.pop(task)
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"Hedged attempt {_label(clients[ix])} failed: {str(e)}")
+                        continue
+
+                    if accept(response):
+                        self._record_win(clients[ix], ix)
+                        if isinstance(response, dict) and isinstance(response.get("metadata"), dict):
+                            response["metadata"]["hedge"] = {
+                                "winner": _label(clients[ix]),
+                                "attempts": next_ix
+                            }
+                        return response
+                    last_error = Exception(f"{_label(clients[ix])} returned an invalid response")
+
+                # Everything in flight failed: hedge immediately instead of waiting
+                if not pending and can_hedge and self._take_hedge_budget():
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        with self._lock:
+            self._stats["failures"] += 1
+        raise Exception(f"All hedged attempts failed: {str(last_error)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hedging statistics.
+
+        Returns:
+            Dictionary with request, hedge and win counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["wins_by_client"] = dict(self._stats["wins_by_client"])
+
+        wins = stats["primary_wins"] + stats["hedge_wins"]
+        stats["hedge_win_rate"] = stats["hedge_wins"] / wins if wins else 0.0
+        return stats
+
+    def _take_hedge_budget(self) -> bool:
+        """Reserve one hedge if the fleet-wide budget allows it."""
+        with self._lock:
+            allowed = self._stats["hedges_fired"] < self.budget_ratio * self._stats["requests"] + 1
+            if allowed:
+                self._stats["hedges_fired"] += 1
+            else:
+                self._stats["hedges_denied"] += 1
+            return allowed
+
+    def _record_win(self, client: LLMClient, ix: int):
+        with self._lock:
+            if ix == 0:
+                self._stats["primary_wins"] += 1
+            else:
+                self._stats["hedge_wins"] += 1
+            label = _label(client)
+            self._stats["wins_by_client"][label] = self._stats["wins_by_client"].get(label, 0) + 1
+
+
+def _label(client: LLMClient) -> str:
+    return f"{client.provider}:{client.model}"
+
+
+_hedged_clients: Dict[Tuple[str, ...], HedgedClient] = {}
+_hedged_clients_lock = threading.Lock()
+
+
+def get_hedged_client(primary: LLMClient, backups: List[LLMClient], **kwargs) -> HedgedClient:
+    """
+    Get the process-wide HedgedClient for a primary/backup combination.
+
+    Sharing one instance per combination keeps the hedge budget and the
+    fired/won counters fleet-wide instead of resetting them per request.
+    The given clients replace the stored ones, so per-request client
+    settings (e.g. the response cache) still apply.
+
+    Args:
+        primary: Client tried first
+        backups: Backup clients, in order
+        **kwargs: HedgedClient settings, used when the instance is created
+
+    Returns:
+        Shared HedgedClient
+    """
+    key = tuple(_label(client) for client in [primary] + backups)
+    with _hedged_clients_lock:
+        hedged = _hedged_clients.get(key)
+        if hedged is None:
+            hedged = _hedged_clients[key] = HedgedClient(primary, backups, **kwargs)
+        else:
+            hedged.primary = primary
+            hedged.backups = backups
+        return hedged
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get statistics of every shared HedgedClient.
+
+    Returns:
+        Mapping of 'primary -> backup, ...' to that client's stats()
+    """
+    with _hedged_clients_lock:
+        clients = dict(_hedged_clients)
+    return {f"{key[0]} -> {', '.join(key[1:])}": hedged.stats() for key, hedged in clients.items()}
@@ -0,0 +1,377 @@
+"""
+Usage Ledger for KAIRA 2025.
+Append-only SQLite record of every provider call: token counts, latency and
+cost, tagged with the attributes of the song being written, plus aggregate
+queries to see which configurations drive spend.
+
+Usage:
+    python -m core.ledger --by day,model
+    python -m core.ledger --by include_phonetics,length --since 2026-10-01 --json
+"""
+
+import argparse
+import contextvars
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens: (uncached input, cached input, output). Keys match the model
+# name or a prefix of it ("gemini-1.5-pro" covers "gemini-1.5-pro-002"); the
+# longest match wins. Anthropic cache writes are billed as plain input here.
+PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+    "gpt-4": (30.00, 30.00, 60.00),
+    "o1-preview": (15.00, 7.50, 60.00),
+    "o1-mini": (3.00, 1.50, 12.00),
+    "o3-mini": (1.10, 0.55, 4.40),
+    "claude-sonnet-4": (3.00, 0.30, 15.00),
+    "claude-3-5-sonnet": (3.00, 0.30, 15.00),
+    "claude-3-5-haiku": (0.80, 0.08, 4.00),
+    "claude-3-opus": (15.00, 1.50, 75.00),
+    "gemini-1.5-pro": (1.25, 0.3125, 5.00),
+    "gemini-1.5-flash": (0.075, 0.01875, 0.30)
+}
+
+# Price multiplier for calls of kind 'bulk' (OpenAI Batch / Anthropic Message Batches)
+BULK_DISCOUNT = 0.5
+
+# Columns aggregate() can group and filter by
+DIMENSIONS = (
+    "day", "provider", "model", "kind", "source", "status", "cache_hit",
+    "genre", "lyrics_part", "length", "language",
+    "include_phonetics", "include_chanteo", "include_bridge", "payload_hash"
+)
+
+# Payload fields copied onto every row
+PAYLOAD_FIELDS = ("genre", "lyrics_part", "length", "language", "include_phonetics", "include_chanteo", "include_bridge")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS usage ("
+    "id INTEGER PRIMARY KEY, ts REAL NOT NULL, day TEXT NOT NULL, "
+    "source TEXT, kind TEXT, provider TEXT, model TEXT, status TEXT, cache_hit INTEGER, "
+    "input_tokens INTEGER, cached_input_tokens INTEGER, output_tokens INTEGER, "
+    "latency_ms REAL, cost_usd REAL, "
+    "genre TEXT, lyrics_part TEXT, length TEXT, language TEXT, "
+    "include_phonetics INTEGER, include_chanteo INTEGER, include_bridge INTEGER, payload_hash TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_usage_day ON usage(day)",
+    "CREATE TRIGGER IF NOT EXISTS usage_no_update BEFORE UPDATE ON usage "
+    "BEGIN SELECT RAISE(ABORT, 'usage ledger is append-only'); END",
+    "CREATE TRIGGER IF NOT EXISTS usage_no_delete BEFORE DELETE ON usage "
+    "BEGIN SELECT RAISE(ABORT, 'usage ledger is append-only'); END"
+)
+
+_INSERT_COLUMNS = (
+    "ts", "day", "source", "kind", "provider", "model", "status", "cache_hit",
+    "input_tokens", "cached_input_tokens", "output_tokens", "latency_ms", "cost_usd"
+) + PAYLOAD_FIELDS + ("payload_hash",)
+
+_context: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("kaira_usage_context", default=None)
+
+
+@contextmanager
+def usage_context(payload: Optional[Dict[str, Any]] = None, source: Optional[str] = None) -> Iterator[None]:
+    """
+    Tag every provider call made inside the block (per thread / asyncio task)
+    with the song payload and the calling flow.
+
+    Args:
+        payload: Song payload whose attributes are copied onto each ledger row
+        source: Calling flow (e.g. 'app', 'batch')
+    """
+    token = _context.set({"payload": payload, "source": source})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def price_for(model: Optional[str], prices: Optional[Dict[str, Tuple[float, float, float]]] = None) -> Optional[Tuple[float, float, float]]:
+    """
+    Look up the per-1M-token prices for a model.
+
+    Args:
+        model: Model name
+        prices: Price table (defaults to PRICES)
+
+    Returns:
+        (input, cached_input, output) USD per 1M tokens, or None if unknown
+    """
+    prices = PRICES if prices is None else prices
+    if not model:
+        return None
+    best = None
+    for key in prices:
+        if (model == key or model.startswith(key + "-")) and (best is None or len(key) > len(best)):
+            best = key
+    return prices[best] if best else None
+
+
+class UsageLedger:
+    """
+    Append-only ledger of provider calls. Rows cannot be updated or deleted
+    (enforced by triggers); cost is priced when the call is recorded.
+    """
+
+    def __init__(self, path: str, prices: Optional[Dict[str, Tuple[float, float, float]]] = None):
+        """
+        Initialize the ledger.
+
+        Args:
+            path: SQLite file (':memory:' for a throwaway ledger)
+            prices: Price table overriding PRICES entries
+        """
+        self.path = path
+        self.prices = dict(PRICES)
+        self.prices.update({model: tuple(rates) for model, rates in (prices or {}).items()})
+
+        self._lock = threading.Lock()
+        self._stats = {"records": 0, "write_errors": 0, "unpriced": 0, "cost_usd": 0.0}
+
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # The app, batch and bulk runners may append concurrently
+            self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def record(
+        self,
+        provider: str,
+        model: Optional[str],
+        usage: Optional[Dict[str, Any]],
+        latency_s: Optional[float],
+        kind: str = "lyrics",
+        status: str = "ok",
+        cache_hit: bool = False,
+        payload: Optional[Dict[str, Any]] = None,
+        source: Optional[str] = None
+    ):
+        """
+        Append one provider call. Write failures are logged, never raised.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            usage: Normalized usage record (input/cached_input/output tokens)
+            latency_s: Wall time of the call in seconds (None when unknown)
+            kind: Call kind ('lyrics', 'stream', 'translation' or 'bulk')
+            status: 'ok', 'malformed' or 'error'
+            cache_hit: Served from the local response cache
+            payload: Song payload (defaults to the active usage_context)
+            source: Calling flow (defaults to the active usage_context)
+        """
+        context = _context.get() or {}
+        payload = payload if payload is not None else context.get("payload")
+        source = source if source is not None else context.get("source")
+        usage = usage or {}
+
+        input_tokens = int(usage.get("input_tokens", 0) or 0)
+        cached_input_tokens = int(usage.get("cached_input_tokens", 0) or 0)
+        output_tokens = int(usage.get("output_tokens", 0) or 0)
+
+        cost = None
+        rates = price_for(model, self.prices)
+        if rates is not None:
+            cost = (
+                max(input_tokens - cached_input_tokens, 0) * rates[0]
+                + cached_input_tokens * rates[1]
+                + output_tokens * rates[2]
+            ) / 1_000_000
+            if kind == "bulk":
+                cost *= BULK_DISCOUNT
+
+        ts = time.time()
+        attributes = [None] * (len(PAYLOAD_FIELDS) + 1)
+        if isinstance(payload, dict):
+            # Same digest batch and bulk records carry, so rows join back to their outputs
+            from utils import payload_hash
+            attributes = [_column_value(payload.get(field)) for field in PAYLOAD_FIELDS] + [payload_hash(payload)]
+        row = [
+            ts, time.strftime("%Y-%m-%d", time.gmtime(ts)), source, kind, provider, model, status, int(cache_hit),
+            input_tokens, cached_input_tokens, output_tokens, None if latency_s is None else round(latency_s * 1000, 1), cost
+        ] + attributes
+
+        with self._lock:
+            try:
+                self._db.execute(
+                    f"INSERT INTO usage ({', '.join(_INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(_INSERT_COLUMNS))})",
+                    row
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._stats["write_errors"] += 1
+                logger.warning(f"Usage ledger write failed: {str(e)}")
+                return
+            self._stats["records"] += 1
+            if cost is None and not cache_hit:
+                self._stats["unpriced"] += 1
+            self._stats["cost_usd"] += cost or 0.0
+
+    def aggregate(
+        self,
+        by: Union[str, Iterable[str]] = ("day",),
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Sum tokens, cost and latency per group.
+
+        Args:
+            by: Column name(s) from DIMENSIONS to group by (empty = grand total)
+            since: First day included (YYYY-MM-DD, UTC)
+            until: Last day included (YYYY-MM-DD, UTC)
+            **filters: Equality filters on DIMENSIONS columns (e.g. provider='openai')
+
+        Returns:
+            One dict per group with the group columns, calls, errors, cache_hits,
+            input/cached_input/output tokens, cost_usd and avg/max latency_ms
+        """
+        columns = [by] if isinstance(by, str) else list(by)
+        unknown = [c for c in columns + list(filters) if c not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown ledger column(s): {unknown}. Supported: {list(DIMENSIONS)}")
+
+        where, params = [], []
+        if since:
+            where.append("day >= ?")
+            params.append(since)
+        if until:
+            where.append("day <= ?")
+            params.append(until)
+        for column, value in filters.items():
+            where.append(f"{column} IS ?")
+            params.append(_column_value(value))
+
+        query = (
+            f"SELECT {''.join(c + ', ' for c in columns)}"
+            "COUNT(*), SUM(status = 'error'), SUM(cache_hit), "
+            "SUM(input_tokens), SUM(cached_input_tokens), SUM(output_tokens), "
+            "SUM(cost_usd), AVG(latency_ms), MAX(latency_ms) FROM usage"
+        )
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if columns:
+            query += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+
+        metrics = (
+            "calls", "errors", "cache_hits", "input_tokens", "cached_input_tokens",
+            "output_tokens", "cost_usd", "avg_latency_ms", "max_latency_ms"
+        )
+        results = []
+        for row in rows:
+            group = dict(zip(columns, row[:len(columns)]))
+            values = dict(zip(metrics, row[len(columns):]))
+            if not values["calls"]:
+                continue
+            for key in metrics[:6]:
+                values[key] = int(values[key] or 0)
+            values["cost_usd"] = round(values["cost_usd"] or 0.0, 6)
+            values["avg_latency_ms"] = round(values["avg_latency_ms"] or 0.0, 1)
+            values["max_latency_ms"] = values["max_latency_ms"] or 0.0
+            results.append({**group, **values})
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get ledger statistics for this process.
+
+        Returns:
+            Dictionary with the ledger path, rows written, write errors,
+            unpriced calls and the cost recorded so far
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+        stats["path"] = self.path
+        return stats
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+def _column_value(value: Any) -> Any:
+    """SQLite value for a payload attribute (booleans stored as 0/1)."""
+    if isinstance(value, bool):
+        return int(value)
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+DEFAULT_LEDGER_PATH = os.path.join(".kaira_cache", "ledger.sqlite3")
+
+_default_ledger: Optional[UsageLedger] = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[UsageLedger]:
+    """
+    Get the process-wide usage ledger.
+
+    The database lives at KAIRA_LEDGER_PATH (default .kaira_cache/ledger.sqlite3);
+    KAIRA_LEDGER_PATH=off disables recording and returns None.
+    KAIRA_PRICES may hold a JSON object such as {"gpt-4o": [2.5, 1.25, 10]}
+    (USD per 1M input, cached input and output tokens) to override PRICES.
+    """
+    global _default_ledger
+    path = os.getenv("KAIRA_LEDGER_PATH") or DEFAULT_LEDGER_PATH
+    if path.lower() == "off":
+        return None
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = UsageLedger(path, prices=json.loads(os.getenv("KAIRA_PRICES", "{}")))
+        return _default_ledger
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the KAIRA usage ledger.")
+    parser.add_argument("--path", default=os.getenv("KAIRA_LEDGER_PATH") or DEFAULT_LEDGER_PATH)
+    parser.add_argument("--by", default="day", help=f"Comma-separated columns from: {', '.join(DIMENSIONS)}")
+    parser.add_argument("--since", default=None, help="First day included (YYYY-MM-DD)")
+    parser.add_argument("--until", default=None, help="Last day included (YYYY-MM-DD)")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No ledger at {args.path}", file=sys.stderr)
+        return 1
+    columns = [c.strip() for c in args.by.split(",") if c.strip()]
+    rows = UsageLedger(args.path).aggregate(by=columns, since=args.since, until=args.until)
+
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+        return 0
+    header = columns + ["calls", "errors", "input", "cached", "output", "cost_usd", "avg_ms"]
+    print("\t".join(header))
+    for row in rows:
+        values = [str(row[c]) for c in columns] + [
+            str(row["calls"]), str(row["errors"]), str(row["input_tokens"]), str(row["cached_input_tokens"]),
+            str(row["output_tokens"]), f"{row['cost_usd']:.4f}", f"{row['avg_latency_ms']:.0f}"
+        ]
+        print("\t".join(values))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
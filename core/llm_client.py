@@ -5,21 +5,56 @@ Handles interactions with OpenAI, Anthropic, and Google models.
 
 import os
 import json
-from typing import Dict, Any, Optional, List
+import asyncio
+import contextvars
+import time
+from typing import Dict, Any, Optional, List, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+from contextlib import contextmanager
+
+from .client_pool import get_client_pool
+from .ledger import UsageLedger, get_ledger
+from .response_cache import ResponseCache
+from .rate_limiter import RateLimiter, Reservation, estimate_tokens, get_rate_limiter
+from .retry import MalformedResponseError, RetryPolicy, get_retry_policy
+from .response_parser import ResponseParser
+from .tracing import get_tracer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# google.generativeai keeps its API key and endpoint in module-global state, so
+# switching either means re-running configure(); track the active pair to skip
+# redundant calls.
+_genai_lock = threading.Lock()
+_genai_active_config: Optional[Tuple[str, Optional[str]]] = None
+
 class LLMClient:
     """
     Unified client for generating lyrics and translations using multiple providers.
     """
     
     PROVIDERS = ["openai", "anthropic", "google"]
+
+    # Environment variables holding each provider's default base_url
+    BASE_URL_ENV = {
+        "openai": "OPENAI_BASE_URL",
+        "anthropic": "ANTHROPIC_BASE_URL",
+        "google": "GOOGLE_BASE_URL"
+    }
     
-    def __init__(self, provider: str = "openai", model: Optional[str] = None, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        provider: str = "openai",
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[Union[RateLimiter, bool]] = None,
+        ledger: Optional[UsageLedger] = None
+    ):
         """
         Initialize the LLM client.
         
@@ -27,6 +62,13 @@ class LLMClient:
             provider: 'openai', 'anthropic', or 'google'
             model: Model name (defaults based on provider)
             api_key: API key (defaults to env vars)
+            base_url: Custom API endpoint (defaults to the provider's *_BASE_URL env var)
+            cache: Response cache consulted before every provider call (None = disabled)
+            retry_policy: Retry policy for provider calls (defaults to the shared policy)
+            rate_limiter: RPM/TPM limiter (defaults to the shared limiter; False
+                disables client-side throttling)
+            ledger: Usage ledger every call is recorded in (defaults to the shared
+                ledger; KAIRA_LEDGER_PATH=off disables it)
         """
         self.provider = provider.lower()
         if self.provider not in self.PROVIDERS:
@@ -34,17 +76,32 @@ class LLMClient:
             
         self.api_key = api_key
         self.model = model
+        self.base_url = base_url or os.getenv(self.BASE_URL_ENV[self.provider]) or None
+        self.cache = cache
+        self.retry_policy = retry_policy or get_retry_policy()
+        self.rate_limiter = get_rate_limiter() if rate_limiter is None else (rate_limiter or None)
+        self.ledger = ledger or get_ledger()
         
         self._setup_client()
         
     def _setup_client(self):
-        """Set up the specific provider client."""
+        """
+        Set up the specific provider client, reusing pooled SDK clients.
+        SDK-level retries are disabled; retry_policy is the single retry layer.
+        """
+        pool = get_client_pool()
+        
         if self.provider == "openai":
             from openai import OpenAI
             self.api_key = self.api_key or os.getenv("OPENAI_API_KEY")
             if not self.api_key:
                 raise ValueError("OpenAI API key not found.")
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = pool.get(
+                "openai",
+                self.api_key,
+                lambda: OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0),
+                base_url=self.base_url
+            )
             self.model = self.model or "gpt-4o"
             
         elif self.provider == "anthropic":
@@ -56,7 +113,12 @@ class LLMClient:
             self.api_key = self.api_key or os.getenv("ANTHROPIC_API_KEY")
             if not self.api_key:
                 raise ValueError("Anthropic API key not found.")
-            self.client = anthropic.Anthropic(api_key=self.api_key)
+            self.client = pool.get(
+                "anthropic",
+                self.api_key,
+                lambda: anthropic.Anthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0),
+                base_url=self.base_url
+            )
             self.model = self.model or "claude-sonnet-4-20250514"
             
         elif self.provider == "google":
@@ -68,8 +130,8 @@ class LLMClient:
             self.api_key = self.api_key or os.getenv("GOOGLE_API_KEY")
             if not self.api_key:
                 raise ValueError("Google API key not found.")
-            genai.configure(api_key=self.api_key)
-            self.client = genai
+            self.client = pool.get("google", self.api_key, lambda: genai, base_url=self.base_url)
+            _configure_genai(genai, self.api_key, self.base_url)
             self.model = self.model or "gemini-1.5-pro"
 
     def generate_lyrics(
@@ -77,114 +139,673 @@ class LLMClient:
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.8,
-        max_tokens: int = 2500
-    ) -> Dict[str, Any]:
+        max_tokens: int = 2500,
+        use_cache: bool = True,
+        n: int = 1
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """
         Generate lyrics using the configured provider.
+        
+        Set use_cache=False to bypass the response cache for this call.
+        With n > 1, returns a list of n candidate responses generated in one
+        round trip (OpenAI `n`, Gemini `candidate_count`) or concurrent calls
+        (Anthropic).
         """
-        try:
-            if self.provider == "openai":
-                return self._generate_openai(system_prompt, user_prompt, temperature, max_tokens)
-            elif self.provider == "anthropic":
-                return self._generate_anthropic(system_prompt, user_prompt, temperature, max_tokens)
-            elif self.provider == "google":
-                return self._generate_google(system_prompt, user_prompt, temperature, max_tokens)
-        except Exception as e:
-            logger.error(f"Generation failed: {str(e)}")
-            raise Exception(f"{self.provider.capitalize()} generation failed: {str(e)}")
-
-    def _generate_openai(self, system, user, temp, tokens) -> Dict[str, Any]:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+        started = time.perf_counter()
+        with self._span("llm.generate", system_prompt + user_prompt, max_tokens=max_tokens, n=n) as span:
+            cache_key, cached = self._cache_lookup(
+                use_cache, "lyrics", system_prompt, user_prompt, temperature, max_tokens, n
+            )
+            if cached is not None:
+                span.set(cache_hit=True)
+                self._record_cache_hit("lyrics", started)
+                return cached
+            
+            if n > 1 and self.provider == "anthropic":
+                # Each worker runs in a copy of this context so ledger tags and spans carry over
+                with ThreadPoolExecutor(max_workers=n) as executor:
+                    result = list(executor.map(
+                        lambda context: context.run(
+                            self.generate_lyrics, system_prompt, user_prompt, temperature, max_tokens, use_cache=False
+                        ),
+                        [contextvars.copy_context() for _ in range(n)]
+                    ))
+                self._cache_store(cache_key, result)
+                return result
+            
+            def attempt():
+                reservation = self._throttle(system_prompt + user_prompt, max_tokens * n)
+                results = None
+                try:
+                    with self._request("lyrics") as call:
+                        results = self._generate(system_prompt, user_prompt, temperature, max_tokens, n)
+                        call["result"] = results[0]
+                finally:
+                    self._reconcile(reservation, results[0] if results else None)
+                return _raise_if_malformed(results)
+            
+            try:
+                results = self.retry_policy.call(attempt)
+            except MalformedResponseError as e:
+                # Out of retries: keep the best-effort fallback structure
+                results = e.args[0]
+            except Exception as e:
+                logger.error(f"Generation failed: {str(e)}")
+                raise Exception(f"{self.provider.capitalize()} generation failed: {str(e)}")
+            
+            result = results if n > 1 else results[0]
+            span.set(**_usage_attributes(results[0]))
+            self._cache_store(cache_key, result)
+            return result
+
+    async def agenerate_lyrics(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.8,
+        max_tokens: int = 2500,
+        use_cache: bool = True,
+        n: int = 1
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Async counterpart of generate_lyrics.
+        
+        Uses the providers' async SDK clients (Google runs in a worker thread),
+        so one event loop can drive many concurrent generations.
+        """
+        started = time.perf_counter()
+        with self._span("llm.generate", system_prompt + user_prompt, max_tokens=max_tokens, n=n) as span:
+            cache_key, cached = self._cache_lookup(
+                use_cache, "lyrics", system_prompt, user_prompt, temperature, max_tokens, n
+            )
+            if cached is not None:
+                span.set(cache_hit=True)
+                self._record_cache_hit("lyrics", started)
+                return cached
+            
+            if n > 1 and self.provider == "anthropic":
+                result = list(await asyncio.gather(*[
+                    self.agenerate_lyrics(system_prompt, user_prompt, temperature, max_tokens, use_cache=False)
+                    for _ in range(n)
+                ]))
+                self._cache_store(cache_key, result)
+                return result
+            
+            async def attempt():
+                reservation = await self._athrottle(system_prompt + user_prompt, max_tokens * n)
+                results = None
+                try:
+                    with self._request("lyrics") as call:
+                        results = await self._agenerate(system_prompt, user_prompt, temperature, max_tokens, n)
+                        call["result"] = results[0]
+                finally:
+                    self._reconcile(reservation, results[0] if results else None)
+                return _raise_if_malformed(results)
+            
+            try:
+                results = await self.retry_policy.acall(attempt)
+            except MalformedResponseError as e:
+                # Out of retries: keep the best-effort fallback structure
+                results = e.args[0]
+            except Exception as e:
+                logger.error(f"Generation failed: {str(e)}")
+                raise Exception(f"{self.provider.capitalize()} generation failed: {str(e)}")
+            
+            result = results if n > 1 else results[0]
+            span.set(**_usage_attributes(results[0]))
+            self._cache_store(cache_key, result)
+            return result
+
+    def _generate(self, system, user, temp, tokens, n=1) -> List[Dict[str, Any]]:
+        if self.provider == "openai":
+            return self._generate_openai(system, user, temp, tokens, n)
+        elif self.provider == "anthropic":
+            return [self._generate_anthropic(system, user, temp, tokens)]
+        return self._generate_google(system, user, temp, tokens, n)
+
+    async def _agenerate(self, system, user, temp, tokens, n=1) -> List[Dict[str, Any]]:
+        if self.provider == "openai":
+            return await self._agenerate_openai(system, user, temp, tokens, n)
+        elif self.provider == "anthropic":
+            return [await self._agenerate_anthropic(system, user, temp, tokens)]
+        return await asyncio.to_thread(self._generate_google, system, user, temp, tokens, n)
+
+    def stream_lyrics(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.8,
+        max_tokens: int = 2500,
+        use_cache: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate lyrics as a stream of events.
+        
+        Yields:
+            {"type": "delta", "text": ...} for each text chunk as it arrives, then a
+            single {"type": "done", "response": ..., "usage": ...} event where
+            response has the same shape as generate_lyrics() and usage holds the
+            provider token counts. A cache hit is replayed as one delta.
+        """
+        started_at = time.perf_counter()
+        cache_key, cached = self._cache_lookup(
+            use_cache, "lyrics", system_prompt, user_prompt, temperature, max_tokens
+        )
+        if cached is not None:
+            self._record_cache_hit("stream", started_at)
+            yield {"type": "delta", "text": json.dumps(cached, ensure_ascii=False)}
+            yield {"type": "done", "response": cached, "usage": _usage_record(0, 0)}
+            return
+        
+        chunks = []
+        usage: Dict[str, int] = {}
+        started = time.monotonic()
+        attempt = 0
+        tracer = get_tracer()
+        with self._span("llm.stream", system_prompt + user_prompt, max_tokens=max_tokens) as span:
+            while True:
+                attempt += 1
+                reservation = self._throttle(system_prompt + user_prompt, max_tokens)
+                request_started = time.perf_counter()
+                finished = False
+                error = None
+                try:
+                    with self._request("stream") as call:
+                        if self.provider == "openai":
+                            events = self._stream_openai(system_prompt, user_prompt, temperature, max_tokens)
+                        elif self.provider == "anthropic":
+                            events = self._stream_anthropic(system_prompt, user_prompt, temperature, max_tokens)
+                        else:
+                            events = self._stream_google(system_prompt, user_prompt, temperature, max_tokens)
+                        
+                        for kind, value in events:
+                            if kind == "delta":
+                                if not chunks:
+                                    first_token = time.perf_counter() - request_started
+                                    span.set(first_token_ms=round(first_token * 1000, 1))
+                                    tracer.observe("llm.first_token", first_token, provider=self.provider)
+                                chunks.append(value)
+                                yield {"type": "delta", "text": value}
+                            else:
+                                usage = call["usage"] = value
+                    finished = True
+                except Exception as e:
+                    error = e
+                finally:
+                    if not finished:
+                        # Failed or abandoned attempt: charge what was streamed, refund the rest
+                        self._reconcile(reservation, "".join(chunks) or None, system_prompt + user_prompt)
+                if finished:
+                    break
+                
+                # Only retry while nothing has been shown to the caller yet
+                delay = None if chunks else self.retry_policy.next_delay(error, attempt, started)
+                if delay is None:
+                    logger.error(f"Streaming generation failed: {str(error)}")
+                    raise Exception(f"{self.provider.capitalize()} generation failed: {str(error)}") from error
+                time.sleep(delay)
+            
+            result = _attach_usage(self._parse_json("".join(chunks)), usage)
+            span.set(attempts=attempt, **_usage_attributes(result))
+        self._reconcile(reservation, result)
+        self._cache_store(cache_key, result)
+        yield {"type": "done", "response": result, "usage": usage}
+
+    def _stream_openai(self, system, user, temp, tokens) -> Iterator[Tuple[str, Any]]:
+        stream = self.client.chat.completions.create(
+            **self._openai_request(system, user, temp, tokens),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield "delta", chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                yield "usage", _openai_usage(chunk.usage)
+
+    def _stream_anthropic(self, system, user, temp, tokens) -> Iterator[Tuple[str, Any]]:
+        with self.client.messages.stream(**self._anthropic_request(system, user, temp, tokens)) as stream:
+            for text in stream.text_stream:
+                yield "delta", text
+            yield "usage", _anthropic_usage(stream.get_final_message().usage)
+
+    def _stream_google(self, system, user, temp, tokens) -> Iterator[Tuple[str, Any]]:
+        model = self._google_model(system, temp, tokens)
+        response = model.generate_content(user, stream=True)
+        for chunk in response:
+            if chunk.text:
+                yield "delta", chunk.text
+        yield "usage", _google_usage(response.usage_metadata)
+
+    def _openai_request(self, system, user, temp, tokens, n=1) -> Dict[str, Any]:
+        # OpenAI caches prompt prefixes automatically; keep the static system prompt
+        # first so every request shares a byte-identical prefix.
+        request = {
+            "model": self.model,
+            "messages": [
                 {"role": "system", "content": system},
                 {"role": "user", "content": user}
             ],
-            temperature=temp,
-            max_tokens=tokens,
-            response_format={"type": "json_object"}
-        )
-        content = response.choices[0].message.content
-        return self._parse_json(content)
+            "temperature": temp,
+            "max_tokens": tokens,
+            "response_format": {"type": "json_object"}
+        }
+        if n > 1:
+            request["n"] = n
+        return request
 
-    def _generate_anthropic(self, system, user, temp, tokens) -> Dict[str, Any]:
+    def _anthropic_request(self, system, user, temp, tokens) -> Dict[str, Any]:
         # Anthropic doesn't have a separate system role in messages list in the same way for some versions,
         # but the latest API supports a top-level system parameter.
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=tokens,
-            temperature=temp,
-            system=system,
-            messages=[
+        # The static KAIRA system prompt is marked as a cache breakpoint so repeat calls
+        # read it from the provider's prompt cache instead of re-processing it.
+        return {
+            "model": self.model,
+            "max_tokens": tokens,
+            "temperature": temp,
+            "system": [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [
                 {"role": "user", "content": user + "\n\nRespond with valid JSON only."}
             ]
-        )
-        content = response.content[0].text
-        return self._parse_json(content)
+        }
 
-    def _generate_google(self, system, user, temp, tokens) -> Dict[str, Any]:
+    def _google_model(self, system, temp, tokens, n=1) -> Any:
         generation_config = {
             "temperature": temp,
             "max_output_tokens": tokens,
             "response_mime_type": "application/json"
         }
-        model = self.client.GenerativeModel(
+        if n > 1:
+            generation_config["candidate_count"] = n
+        return self.client.GenerativeModel(
             model_name=self.model,
             generation_config=generation_config,
             system_instruction=system
         )
+
+    def _generate_openai(self, system, user, temp, tokens, n=1) -> List[Dict[str, Any]]:
+        response = self.client.chat.completions.create(**self._openai_request(system, user, temp, tokens, n))
+        return self._openai_candidates(response, n)
+
+    async def _agenerate_openai(self, system, user, temp, tokens, n=1) -> List[Dict[str, Any]]:
+        client = self._async_client()
+        response = await client.chat.completions.create(**self._openai_request(system, user, temp, tokens, n))
+        return self._openai_candidates(response, n)
+
+    def _openai_candidates(self, response: Any, n: int) -> List[Dict[str, Any]]:
+        if n == 1:
+            contents = [response.choices[0].message.content]
+        else:
+            contents = [choice.message.content for choice in response.choices]
+        usage = _shared_usage(_openai_usage(response.usage), n)
+        return [_attach_usage(self._parse_json(content), usage) for content in contents]
+
+    def _generate_anthropic(self, system, user, temp, tokens) -> Dict[str, Any]:
+        response = self.client.messages.create(**self._anthropic_request(system, user, temp, tokens))
+        content = response.content[0].text
+        return _attach_usage(self._parse_json(content), _anthropic_usage(response.usage))
+
+    async def _agenerate_anthropic(self, system, user, temp, tokens) -> Dict[str, Any]:
+        client = self._async_client()
+        response = await client.messages.create(**self._anthropic_request(system, user, temp, tokens))
+        content = response.content[0].text
+        return _attach_usage(self._parse_json(content), _anthropic_usage(response.usage))
+
+    def _generate_google(self, system, user, temp, tokens, n=1) -> List[Dict[str, Any]]:
+        model = self._google_model(system, temp, tokens, n)
         response = model.generate_content(user)
-        return self._parse_json(response.text)
+        if n == 1:
+            texts = [response.text]
+        else:
+            texts = [candidate.content.parts[0].text for candidate in response.candidates]
+        usage = _shared_usage(_google_usage(response.usage_metadata), n)
+        return [_attach_usage(self._parse_json(text), usage) for text in texts]
+
+    def _async_client(self) -> Any:
+        """
+        Get the pooled async SDK client for the running event loop.
+        Async HTTP connections are bound to the loop that opened them,
+        so async clients are pooled per loop.
+        """
+        if self.provider == "openai":
+            from openai import AsyncOpenAI
+            factory = lambda: AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        elif self.provider == "anthropic":
+            from anthropic import AsyncAnthropic
+            factory = lambda: AsyncAnthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        else:
+            raise ValueError(f"No async SDK client for provider: {self.provider}")
+        
+        return get_client_pool().get_async(self.provider, self.api_key, factory, base_url=self.base_url)
 
-    def translate_text(self, text: str, target_language: str = "English") -> str:
+    @staticmethod
+    def _translation_prompt(text: str, target_language: str) -> str:
+        return f"Translate the following song lyrics to {target_language}. Maintain the poetic feel and meaning, but prioritize accuracy. Return ONLY the translated text.\n\n{text}"
+
+    def translate_text(self, text: str, target_language: str = "English", use_cache: bool = True) -> str:
         """
         Translate text to the target language.
         """
-        prompt = f"Translate the following song lyrics to {target_language}. Maintain the poetic feel and meaning, but prioritize accuracy. Return ONLY the translated text.\n\n{text}"
+        started = time.perf_counter()
+        prompt = self._translation_prompt(text, target_language)
+        with self._span("llm.translate", prompt) as span:
+            cache_key, cached = self._cache_lookup(use_cache, "translation", None, prompt)
+            if cached is not None:
+                span.set(cache_hit=True)
+                self._record_cache_hit("translation", started)
+                return cached
+            
+            def attempt():
+                reservation = self._throttle(prompt, 2000)
+                translation = None
+                try:
+                    with self._request("translation") as call:
+                        translation, call["usage"] = self._translate(prompt)
+                finally:
+                    self._reconcile(reservation, translation, prompt)
+                return translation
+            
+            try:
+                translation = self.retry_policy.call(attempt)
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                return f"Translation failed: {str(e)}"
+            
+            span.set(response_chars=len(translation))
+            self._cache_store(cache_key, translation)
+            return translation
+
+    async def atranslate_text(self, text: str, target_language: str = "English", use_cache: bool = True) -> str:
+        """
+        Async counterpart of translate_text.
+        """
+        started = time.perf_counter()
+        prompt = self._translation_prompt(text, target_language)
+        with self._span("llm.translate", prompt) as span:
+            cache_key, cached = self._cache_lookup(use_cache, "translation", None, prompt)
+            if cached is not None:
+                span.set(cache_hit=True)
+                self._record_cache_hit("translation", started)
+                return cached
+            
+            async def attempt():
+                reservation = await self._athrottle(prompt, 2000)
+                translation = None
+                try:
+                    with self._request("translation") as call:
+                        translation, call["usage"] = await self._atranslate(prompt)
+                finally:
+                    self._reconcile(reservation, translation, prompt)
+                return translation
+            
+            try:
+                translation = await self.retry_policy.acall(attempt)
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                return f"Translation failed: {str(e)}"
+            
+            span.set(response_chars=len(translation))
+            self._cache_store(cache_key, translation)
+            return translation
+
+    def _translate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        if self.provider == "openai":
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
+            return response.choices[0].message.content.strip(), _openai_usage(response.usage)
+            
+        elif self.provider == "anthropic":
+            response = self.client.messages.create(
+                model=self.model,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text.strip(), _anthropic_usage(response.usage)
+            
+        return self._translate_google(prompt)
+
+    async def _atranslate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        if self.provider == "openai":
+            response = await self._async_client().chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3
+            )
+            return response.choices[0].message.content.strip(), _openai_usage(response.usage)
+            
+        elif self.provider == "anthropic":
+            response = await self._async_client().messages.create(
+                model=self.model,
+                max_tokens=2000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text.strip(), _anthropic_usage(response.usage)
+            
+        return await asyncio.to_thread(self._translate_google, prompt)
+
+    def _translate_google(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        model = self.client.GenerativeModel(self.model)
+        response = model.generate_content(prompt)
+        return response.text.strip(), _google_usage(getattr(response, "usage_metadata", None))
+
+    def _throttle(self, prompt_text: str, max_tokens: int) -> Optional[Reservation]:
+        """Wait for a rate-limit slot covering the prompt and the output budget."""
+        if self.rate_limiter is None:
+            return None
+        return self.rate_limiter.acquire(self.provider, self.model, estimate_tokens(prompt_text) + max_tokens)
+
+    async def _athrottle(self, prompt_text: str, max_tokens: int) -> Optional[Reservation]:
+        if self.rate_limiter is None:
+            return None
+        return await self.rate_limiter.aacquire(self.provider, self.model, estimate_tokens(prompt_text) + max_tokens)
+
+    def _reconcile(self, reservation: Optional[Reservation], result: Any, prompt_text: str = ""):
+        """
+        Correct the token bucket with real usage (estimated for plain-text replies).
+        A None result means the attempt failed, and its tokens are refunded.
+        """
+        if reservation is None:
+            return
+        if result is None:
+            self.rate_limiter.refund(reservation)
+            return
+        if isinstance(result, str):
+            actual = estimate_tokens(prompt_text) + estimate_tokens(result)
+        else:
+            actual = _result_usage(result).get("total_tokens", 0)
+        self.rate_limiter.reconcile(reservation, actual)
+
+    def _cache_lookup(
+        self,
+        use_cache: bool,
+        kind: str,
+        system_prompt: Optional[str],
+        user_prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        n: int = 1
+    ) -> Tuple[Optional[str], Any]:
+        """Return (cache_key, cached_value); the key is None when caching is off."""
+        if self.cache is None or not use_cache:
+            return None, None
         
-        try:
-            if self.provider == "openai":
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.3
-                )
-                return response.choices[0].message.content.strip()
-                
-            elif self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=2000,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.content[0].text.strip()
-                
-            elif self.provider == "google":
-                model = self.client.GenerativeModel(self.model)
-                response = model.generate_content(prompt)
-                return response.text.strip()
-                
-        except Exception as e:
-            return f"Translation failed: {str(e)}"
+        key = ResponseCache.make_key(
+            kind,
+            self.provider,
+            self.model,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **({"n": n} if n > 1 else {})
+        )
+        cached = self.cache.get(key)
+        for candidate in (cached if isinstance(cached, list) else [cached]):
+            if isinstance(candidate, dict):
+                # Served locally: no provider tokens were spent on this call
+                _attach_usage(candidate, _usage_record(0, 0))
+                candidate["metadata"]["cache_hit"] = True
+        return key, cached
+
+    def _cache_store(self, cache_key: Optional[str], value: Any):
+        """Cache a successful response (JSON parse failures are never cached)."""
+        if cache_key is None:
+            return
+        if any(_is_malformed(v) for v in (value if isinstance(value, list) else [value])):
+            return
+        self.cache.set(cache_key, value)
 
     def _parse_json(self, content: str) -> Dict[str, Any]:
-        """Helper to parse JSON from response string."""
+        """Helper to parse JSON from response string (see ResponseParser.decode)."""
+        with self._span("llm.decode", response_chars=len(content)):
+            return ResponseParser.decode(content, normalize=False)
+
+    @contextmanager
+    def _request(self, kind: str) -> Iterator[Dict[str, Any]]:
+        """
+        One provider round trip: an llm.request span plus a usage ledger row.
+        The block stores the parsed result (or the raw usage) in the yielded dict.
+        """
+        call: Dict[str, Any] = {}
+        started = time.perf_counter()
+        status = "error"
         try:
-            # Clean up markdown code blocks if present
-            content = content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback for malformed JSON
-            return {
-                "lyrics": content,
-                "phonetics": {},
-                "qa_log": "JSON parsing failed",
-                "metadata": {"error": "Invalid JSON format"}
-            }
+            with self._span("llm.request"):
+                yield call
+            status = "malformed" if _is_malformed(call.get("result")) else "ok"
+        finally:
+            if self.ledger is not None:
+                usage = call.get("usage") or _result_usage(call.get("result"))
+                self.ledger.record(self.provider, self.model, usage, time.perf_counter() - started, kind=kind, status=status)
+
+    def _record_cache_hit(self, kind: str, started: float):
+        """Ledger row for a response served from the local cache (no tokens spent)."""
+        if self.ledger is not None:
+            self.ledger.record(self.provider, self.model, None, time.perf_counter() - started, kind=kind, cache_hit=True)
+
+    def _span(self, name: str, prompt: Optional[str] = None, **attributes: Any):
+        """Tracing span tagged with this client's provider and model."""
+        tracer = get_tracer()
+        if not tracer.enabled:
+            return tracer.span(name)
+        if prompt is not None:
+            attributes["prompt_chars"] = len(prompt)
+        return tracer.span(name, provider=self.provider, model=self.model, **attributes)
+
+
+def _configure_genai(genai: Any, api_key: str, base_url: Optional[str] = None):
+    """
+    Configure google.generativeai only when the active key or endpoint changes.
+    Custom endpoints go through the REST transport, which accepts http:// hosts.
+    """
+    global _genai_active_config
+    with _genai_lock:
+        if _genai_active_config != (api_key, base_url):
+            if base_url:
+                genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": base_url})
+            else:
+                genai.configure(api_key=api_key)
+            _genai_active_config = (api_key, base_url)
+
+
+def _usage_record(input_tokens: Any, output_tokens: Any, cached_input_tokens: Any = 0) -> Dict[str, int]:
+    """
+    Normalize provider token counts into one usage shape.
+    input_tokens is the full prompt size; cached_input_tokens is the part
+    served from the provider's prompt cache.
+    """
+    input_tokens = int(input_tokens or 0)
+    output_tokens = int(output_tokens or 0)
+    cached_input_tokens = int(cached_input_tokens or 0)
+    return {
+        "input_tokens": input_tokens,
+        "cached_input_tokens": cached_input_tokens,
+        "uncached_input_tokens": max(input_tokens - cached_input_tokens, 0),
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens
+    }
+
+
+def _openai_usage(usage: Any) -> Dict[str, int]:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return _usage_record(
+        getattr(usage, "prompt_tokens", 0),
+        getattr(usage, "completion_tokens", 0),
+        getattr(details, "cached_tokens", 0)
+    )
+
+
+def _anthropic_usage(usage: Any) -> Dict[str, int]:
+    # Anthropic reports cache reads/writes separately from input_tokens
+    cache_read = int(getattr(usage, "cache_read_input_tokens", 0) or 0)
+    cache_write = int(getattr(usage, "cache_creation_input_tokens", 0) or 0)
+    input_tokens = int(getattr(usage, "input_tokens", 0) or 0)
+    return _usage_record(
+        input_tokens + cache_read + cache_write,
+        getattr(usage, "output_tokens", 0),
+        cache_read
+    )
+
+
+def _google_usage(usage: Any) -> Dict[str, int]:
+    return _usage_record(
+        getattr(usage, "prompt_token_count", 0),
+        getattr(usage, "candidates_token_count", 0),
+        getattr(usage, "cached_content_token_count", 0)
+    )
+
+
+def _usage_attributes(result: Any) -> Dict[str, Any]:
+    """Span attributes describing a parsed response: token counts and lyrics size."""
+    usage = _result_usage(result)
+    attributes: Dict[str, Any] = {}
+    if usage:
+        attributes["input_tokens"] = usage.get("input_tokens", 0)
+        attributes["output_tokens"] = usage.get("output_tokens", 0)
+    lyrics = result.get("lyrics") if isinstance(result, dict) else None
+    if isinstance(lyrics, dict):
+        attributes["lyrics_chars"] = sum(len(text) for text in lyrics.values() if isinstance(text, str))
+    elif isinstance(lyrics, str):
+        attributes["lyrics_chars"] = len(lyrics)
+    return attributes
+
+
+def _result_usage(result: Any) -> Dict[str, Any]:
+    """The usage record attached to a parsed response ({} if there is none)."""
+    metadata = result.get("metadata") if isinstance(result, dict) else None
+    usage = metadata.get("usage") if isinstance(metadata, dict) else None
+    return usage if isinstance(usage, dict) else {}
+
+
+def _attach_usage(result: Any, usage: Dict[str, int]) -> Any:
+    """Record token usage under result["metadata"]["usage"]."""
+    if isinstance(result, dict):
+        if not isinstance(result.get("metadata"), dict):
+            result["metadata"] = {}
+        result["metadata"]["usage"] = usage
+    return result
+
+
+def _is_malformed(result: Any) -> bool:
+    """True for the fallback structure _parse_json returns on invalid JSON."""
+    metadata = result.get("metadata") if isinstance(result, dict) else None
+    return isinstance(metadata, dict) and metadata.get("error") == "Invalid JSON format"
+
+
+def _raise_if_malformed(results: List[Any]) -> List[Any]:
+    """Turn a JSON parse failure of every candidate into a retryable error carrying the fallback."""
+    if all(_is_malformed(result) for result in results):
+        raise MalformedResponseError(results)
+    return results
+
+
+def _shared_usage(usage: Dict[str, int], n: int) -> Dict[str, int]:
+    """Usage of one multi-candidate call; every candidate carries the same record."""
+    if n > 1:
+        usage = dict(usage, candidates=n)
+    return usage
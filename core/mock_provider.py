@@ -0,0 +1,585 @@
+"""
+Mock Provider Server for KAIRA 2025.
+Local HTTP stand-in for the OpenAI, Anthropic and Gemini APIs, for load
+tests and benchmarks that must not spend real API quota.
+
+Usage:
+    python -m core.mock_provider --port 8765 --ttft 0.3 --tokens-per-second 120 --rate-limit-rate 0.05
+
+Point the clients at it (the SDKs append their own API paths):
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765
+    GOOGLE_BASE_URL=http://127.0.0.1:8765
+
+Served routes (non-streaming and streaming):
+    POST /v1/chat/completions                      (OpenAI, stream=true -> SSE)
+    POST /v1/messages                              (Anthropic, stream=true -> SSE)
+    POST /v1beta/models/{model}:generateContent    (Gemini)
+    POST /v1beta/models/{model}:streamGenerateContent
+    GET  /health                                   (server stats)
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Characters per emitted token (the token/sec pacing and usage counts use this)
+CHARS_PER_TOKEN = 4
+
+_VERSE = "\n".join([
+    "Me dejaste en visto a las tres de la mañana",
+    "La batería baja y tu foto en la pantalla",
+    "Bailamos lento aunque el DJ ponga dembow",
+    "Tu perfume en mi chaqueta todavía no se fue",
+    "Prendo la moto, la ciudad está dormida",
+    "Cada semáforo en rojo me recuerda tu salida",
+    "Dime si vuelves, que la noche está encendida",
+    "Yo sigo aquí esperando, mami, tú eres mi vida"
+])
+_CHORUS = "\n".join([
+    "Y tú, tú, tú, me tienes loco",
+    "Cuando bailas pegadito poco a poco",
+    "Y tú, tú, tú, no me sueltes",
+    "Que esta noche nadie más nos vuelve",
+    "Dale, dale, que se acabe el mundo",
+    "Contigo un segundo se me hace profundo",
+    "Dale, dale, que suene otra vez",
+    "Tú y yo hasta el amanecer"
+])
+
+# Canned KAIRA-shaped response body
+CANNED_RESPONSE = {
+    "lyrics": {
+        "verse_1": _VERSE,
+        "chorus": _CHORUS,
+        "verse_2": _VERSE,
+        "pre_chorus": "\n".join(_CHORUS.split("\n")[:4]),
+        "chorus_repeat": _CHORUS
+    },
+    "phonetics": {
+        "difficult_phrases": [
+            {"phrase": "no me sueltes", "phonetic": "no-me-SUEL-tes", "note": "Stress on the diphthong"}
+        ],
+        "rhythm_notes": "Short phrases land on the downbeat; breathe after each hook."
+    },
+    "qa_log": {
+        "creative_choices": "Late-night scene told through phone details.",
+        "cultural_references": "Dembow rhythm, moto ride through the city.",
+        "slang_used": ["mami", "dale"],
+        "revision_notes": "Mock response.",
+        "structure_notes": "Default mainstream structure."
+    },
+    "metadata": {
+        "total_lines": 36,
+        "structure": "[verse 1] → [chorus] → [verse 2 / chanteo] → [pre-chorus] → [chorus]",
+        "slang_density": 2,
+        "language": "Spanish (Latin America)",
+        "estimated_duration": "3:15"
+    }
+}
+
+# Provider error bodies: status -> (OpenAI type, Anthropic type, Gemini status)
+_ERROR_TYPES = {
+    429: ("rate_limit_exceeded", "rate_limit_error", "RESOURCE_EXHAUSTED"),
+    500: ("server_error", "api_error", "INTERNAL"),
+    503: ("server_error", "overloaded_error", "UNAVAILABLE")
+}
+
+_GOOGLE_ROUTE = re.compile(r"^/v1(?:beta)?/models/([^/:]+):(generateContent|streamGenerateContent)$")
+
+
+class MockProvider:
+    """
+    Threaded HTTP server emulating the provider wire formats.
+
+    Latency follows a simple model: the first token arrives after `ttft`
+    seconds and the rest at `tokens_per_second`. Non-streaming requests
+    wait for the whole generation before responding.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttft: float = 0.2,
+        tokens_per_second: float = 200.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        response: Optional[Any] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the server (it starts listening immediately).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 = any free port)
+            ttft: Seconds to the first token
+            tokens_per_second: Generation speed after the first token (0 = instant)
+            error_rate: Fraction of requests answered with HTTP 500
+            rate_limit_rate: Fraction of requests answered with HTTP 429
+            retry_after: Retry-After seconds sent with 429 responses
+            response: Response body (dict is sent as JSON, str as-is; defaults to CANNED_RESPONSE)
+            seed: Seed for error injection
+        """
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        body = CANNED_RESPONSE if response is None else response
+        self.text = body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)
+
+        self._random = random.Random(seed)
+        self._injected: Deque[int] = deque()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "streamed": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "providers": {}
+        }
+        self._thread: Optional[threading.Thread] = None
+
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.provider = self
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def base_urls(self) -> Dict[str, str]:
+        """base_url to pass to LLMClient for each provider."""
+        return {"openai": f"{self.url}/v1", "anthropic": self.url, "google": self.url}
+
+    def start(self) -> "MockProvider":
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="kaira-mock-provider", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockProvider":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inject(self, status: int, count: int = 1):
+        """
+        Answer the next `count` requests with an error status.
+
+        Args:
+            status: HTTP status (429, 500 or 503)
+            count: Number of requests to fail
+        """
+        if status not in _ERROR_TYPES:
+            raise ValueError(f"Unsupported status: {status}. Supported: {list(_ERROR_TYPES)}")
+        with self._lock:
+            self._injected.extend([status] * count)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get server statistics.
+
+        Returns:
+            Dictionary with request, stream, error and 429 counters, current
+            and peak concurrent requests, and requests per provider
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["providers"] = dict(self._stats["providers"])
+        return stats
+
+    def tokens(self) -> List[str]:
+        """The response text split into emitted tokens."""
+        return [self.text[i:i + CHARS_PER_TOKEN] for i in range(0, len(self.text), CHARS_PER_TOKEN)]
+
+    def paced(self, tokens: List[str]) -> Iterator[str]:
+        """
+        Yield text as the latency model releases it, merging tokens that
+        are already due into one chunk.
+        """
+        start = time.monotonic() + self.ttft
+        i = 0
+        while i < len(tokens):
+            now = time.monotonic()
+            due = len(tokens) if not self.tokens_per_second else int((now - start) * self.tokens_per_second) + 1
+            if now < start or due <= i:
+                next_at = start if now < start else start + i / self.tokens_per_second
+                time.sleep(max(next_at - now, 0.0))
+                continue
+            yield "".join(tokens[i:due])
+            i = due
+
+    def generation_time(self, tokens: int) -> float:
+        """Seconds a non-streaming response takes to generate."""
+        rate = tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return self.ttft + rate
+
+    def _begin(self, provider: str, stream: bool) -> Optional[int]:
+        """Count the request and decide whether it fails; returns an error status or None."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["providers"][provider] = self._stats["providers"].get(provider, 0) + 1
+            if self._injected:
+                status = self._injected.popleft()
+            else:
+                roll = self._random.random()
+                if roll < self.rate_limit_rate:
+                    status = 429
+                elif roll < self.rate_limit_rate + self.error_rate:
+                    status = 500
+                else:
+                    status = None
+
+            if status == 429:
+                self._stats["rate_limited"] += 1
+            elif status is not None:
+                self._stats["errors"] += 1
+            else:
+                self._stats["streamed"] += int(stream)
+                self._stats["in_flight"] += 1
+                self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+            return status
+
+    def _end(self):
+        with self._lock:
+            self._stats["in_flight"] -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Routes requests to the provider emulations."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "KAIRA-Mock/1.0"
+
+    @property
+    def provider(self) -> MockProvider:
+        return self.server.provider
+
+    def log_message(self, format: str, *args: Any):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/health":
+            self._send_json(200, self.provider.stats())
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown route: {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Request body is not valid JSON"}})
+            return
+
+        path, _, query = self.path.partition("?")
+        google = _GOOGLE_ROUTE.match(path)
+        if path == "/v1/chat/completions":
+            route = ("openai", bool(body.get("stream")), self._openai)
+        elif path == "/v1/messages":
+            route = ("anthropic", bool(body.get("stream")), self._anthropic)
+        elif google:
+            body["model"] = google.group(1)
+            route = ("google", google.group(2) == "streamGenerateContent", self._google)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown route: {path}"}})
+            return
+
+        name, stream, handler = route
+        status = self.provider._begin(name, stream)
+        if status is not None:
+            self._send_error(name, status)
+            return
+        try:
+            handler(body, stream, "alt=sse" in query)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream (e.g. a cancelled hedge)
+            self.close_connection = True
+        finally:
+            self.provider._end()
+
+    # --- OpenAI chat.completions ---
+
+    def _openai(self, body: Dict[str, Any], stream: bool, _sse: bool):
+        model = body.get("model", "gpt-4o")
+        prompt_tokens = _prompt_tokens(body.get("messages"))
+        tokens = self.provider.tokens()
+        response_id = f"chatcmpl-mock-{id(self):x}"
+        created = int(time.time())
+
+        if not stream:
+            n = int(body.get("n") or 1)
+            time.sleep(self.provider.generation_time(len(tokens)))
+            self._send_json(200, {
+                "id": response_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": i, "message": {"role": "assistant", "content": self.provider.text}, "finish_reason": "stop"}
+                    for i in range(n)
+                ],
+                "usage": _openai_usage(prompt_tokens, len(tokens) * n)
+            })
+            return
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+
+        self._start_stream()
+        self._send_event(chunk({"role": "assistant", "content": ""}))
+        for text in self.provider.paced(tokens):
+            self._send_event(chunk({"content": text}))
+        self._send_event(chunk({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            self._send_event({
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": _openai_usage(prompt_tokens, len(tokens))
+            })
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_stream()
+
+    # --- Anthropic messages ---
+
+    def _anthropic(self, body: Dict[str, Any], stream: bool, _sse: bool):
+        model = body.get("model", "claude-sonnet-4-20250514")
+        system = body.get("system")
+        prompt_tokens = _prompt_tokens(body.get("messages")) + _prompt_tokens(system)
+        tokens = self.provider.tokens()
+        message = {
+            "id": f"msg_mock_{id(self):x}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": self.provider.text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": _anthropic_usage(prompt_tokens, len(tokens))
+        }
+
+        if not stream:
+            time.sleep(self.provider.generation_time(len(tokens)))
+            self._send_json(200, message)
+            return
+
+        self._start_stream()
+        self._send_event(
+            {**message, "content": [], "stop_reason": None, "usage": _anthropic_usage(prompt_tokens, 1)},
+            "message_start",
+            wrap="message"
+        )
+        self._send_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+        for text in self.provider.paced(tokens):
+            self._send_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}}, "content_block_delta")
+        self._send_event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+        self._send_event({
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(tokens)}
+        }, "message_delta")
+        self._send_event({"type": "message_stop"}, "message_stop")
+        self._end_stream()
+
+    # --- Gemini generateContent ---
+
+    def _google(self, body: Dict[str, Any], stream: bool, sse: bool):
+        prompt_tokens = _prompt_tokens(body.get("contents")) + _prompt_tokens(body.get("systemInstruction"))
+        tokens = self.provider.tokens()
+
+        def chunk(text: str, count: int, candidates: int = 1, done: bool = True) -> Dict[str, Any]:
+            candidate = {"content": {"parts": [{"text": text}], "role": "model"}}
+            if done:
+                candidate["finishReason"] = "STOP"
+            return {
+                "candidates": [{**candidate, "index": i} for i in range(candidates)],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": count,
+                    "totalTokenCount": prompt_tokens + count
+                },
+                "modelVersion": body.get("model")
+            }
+
+        if not stream:
+            n = int((body.get("generationConfig") or {}).get("candidateCount") or 1)
+            time.sleep(self.provider.generation_time(len(tokens)))
+            self._send_json(200, chunk(self.provider.text, len(tokens) * n, n))
+            return
+
+        pieces = list(self.provider.paced(tokens)) if not sse else None
+        if pieces is not None:
+            # Without alt=sse the streamed body is one JSON array
+            emitted = 0
+            chunks = []
+            for i, text in enumerate(pieces):
+                emitted += len(text)
+                chunks.append(chunk(text, -(-emitted // CHARS_PER_TOKEN), done=i == len(pieces) - 1))
+            self._send_json(200, chunks)
+            return
+
+        self._start_stream()
+        emitted = 0
+        for text in self.provider.paced(tokens):
+            emitted += len(text)
+            self._send_event(chunk(text, -(-emitted // CHARS_PER_TOKEN), done=emitted >= len(self.provider.text)))
+        self._end_stream()
+
+    # --- Wire helpers ---
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, provider: str, status: int):
+        openai_type, anthropic_type, google_status = _ERROR_TYPES[status]
+        message = "Rate limit reached (mock)" if status == 429 else "Injected server error (mock)"
+        if provider == "openai":
+            payload = {"error": {"message": message, "type": openai_type, "code": openai_type}}
+        elif provider == "anthropic":
+            payload = {"type": "error", "error": {"type": anthropic_type, "message": message}}
+        else:
+            payload = {"error": {"code": status, "message": message, "status": google_status}}
+        headers = {"Retry-After": f"{self.provider.retry_after:g}"} if status == 429 else None
+        self._send_json(status, payload, headers)
+
+    def _start_stream(self):
+        # Chunked encoding keeps the connection reusable after the stream
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _send_event(self, payload: Dict[str, Any], event: Optional[str] = None, wrap: Optional[str] = None):
+        if wrap:
+            payload = {"type": event, wrap: payload}
+        data = f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        if event:
+            data = f"event: {event}\n" + data
+        self._write_chunk(data.encode("utf-8"))
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _prompt_tokens(content: Any) -> int:
+    """Approximate token count of request content of any shape."""
+    if not content:
+        return 0
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _openai_usage(prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0}
+    }
+
+
+def _anthropic_usage(input_tokens: int, output_tokens: int) -> Dict[str, int]:
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Serve mock OpenAI, Anthropic and Gemini endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="0 = respond instantly")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument("--response", default=None, help="File with the response body to serve (JSON or text)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    response = None
+    if args.response:
+        with open(args.response, encoding="utf-8") as f:
+            text = f.read()
+        try:
+            response = json.loads(text)
+        except ValueError:
+            response = text
+
+    logging.basicConfig(level=logging.INFO)
+    provider = MockProvider(
+        host=args.host,
+        port=args.port,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        response=response,
+        seed=args.seed
+    )
+    for name, url in provider.base_urls().items():
+        print(f"{name.upper()}_BASE_URL={url}", file=sys.stderr)
+    try:
+        provider.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        provider.server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
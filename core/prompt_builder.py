@@ -263,19 +263,25 @@ Vocal Style: {singer.get('vocal_style', 'Not specified')}
 
 """
         
+        # A requested chanteo fills the "[verse 2 / chanteo]" slot instead of verse 2
+        chanteo_slot = include_chanteo and "[verse 2 / chanteo]" in (structure_override or "[verse 2 / chanteo]").lower()
+        
         # Add structure info
         if structure_override:
             prompt += f"""🎼 STRUCTURE:
 Custom Structure: {structure_override}
 """
         else:
+            second = "chanteo" if chanteo_slot else "verse 2"
             prompt += f"""🎼 STRUCTURE:
-Use KAIRA MAINSTREAM default: [verse 1] → [chorus] → [verse 2] → [pre-chorus] → [chorus]
+Use KAIRA MAINSTREAM default: [verse 1] → [chorus] → [{second}] → [pre-chorus] → [chorus]
 """
         
         # Add optional elements
         optional = []
-        if include_chanteo:
+        if chanteo_slot:
+            optional.append('Write the Chanteo (flow-driven, rhythmic) in place of Verse 2: return it as "chanteo" and omit "verse_2"')
+        elif include_chanteo:
             optional.append("Include Chanteo section (flow-driven, rhythmic)")
         if include_bridge:
             optional.append("Include Bridge (4-6 lines, emotional twist)")
@@ -377,3 +383,162 @@ Vibe: {original_payload.get('vibe')}
 Return the complete JSON response with revised lyrics."""
         
         return prompt
+    
+    @staticmethod
+    def build_song_bible_prompt(payload: Dict[str, Any]) -> str:
+        """
+        Build the first prompt of section-parallel generation: the chorus plus
+        a short song bible every other section is written from.
+        
+        Args:
+            payload: Dictionary containing all user selections
+            
+        Returns:
+            Formatted prompt string
+        """
+        return f"""{PromptBuilder._song_brief(payload)}
+🎵 TASK: CHORUS + SONG BIBLE
+
+Write ONLY the chorus of this song (8 lines, 4 + 4: hook, then echo/answer/variation).
+The other sections will be written separately by other writers from your song bible,
+so the bible must pin down everything they need to sound like the same song.
+
+Return ONLY this JSON:
+{{
+  "lyrics": {{
+    "chorus": "8 lines of Chorus..."
+  }},
+  "song_bible": {{
+    "hook": "the central hook phrase, exactly as sung",
+    "story": "one or two sentences: who, where, what happened",
+    "scenes": ["3-5 concrete visual scenes the verses can use"],
+    "lexical_field": ["8-12 words and images that define the song's vocabulary"],
+    "tone": "voice, attitude and slang register in a few words",
+    "rhythm": "line length, stress pattern and rhyme sounds to keep"
+  }},
+  "phonetics": {{
+    "difficult_phrases": [{{"phrase": "...", "phonetic": "...", "note": "..."}}]
+  }}
+}}"""
+    
+    @staticmethod
+    def build_section_prompt(
+        payload: Dict[str, Any],
+        section: str,
+        lines: str,
+        role: str,
+        chorus: str,
+        song_bible: Dict[str, Any]
+    ) -> str:
+        """
+        Build the prompt for one section of section-parallel generation.
+        
+        Args:
+            payload: Dictionary containing all user selections
+            section: Lyrics key to write (e.g. 'verse_1')
+            lines: Line count for the section (e.g. '8' or '4-6')
+            role: What the section does in the song
+            chorus: The finished chorus
+            song_bible: Song bible returned with the chorus
+            
+        Returns:
+            Formatted prompt string
+        """
+        return f"""{PromptBuilder._song_brief(payload)}
+📖 SONG BIBLE (shared by every section — stay inside it):
+{json.dumps(song_bible, ensure_ascii=False, indent=2)}
+
+🎶 FINISHED CHORUS (do not rewrite it):
+{chorus}
+
+🎵 TASK: {section.upper()}
+Write ONLY the {section.replace('_', ' ')} ({lines} lines).
+Role in the song: {role}
+Match the chorus's voice, rhythm and lexical field; do not repeat its lines.
+
+Return ONLY this JSON:
+{{
+  "lyrics": {{
+    "{section}": "{lines} lines..."
+  }},
+  "phonetics": {{
+    "difficult_phrases": [{{"phrase": "...", "phonetic": "...", "note": "..."}}]
+  }}
+}}"""
+    
+    @staticmethod
+    def _song_brief(payload: Dict[str, Any]) -> str:
+        """Song parameters shared by the section-parallel prompts."""
+        slang_map = {"Low": "2/10", "Medium": "5/10", "High": "8/10"}
+        slang_density = payload.get("slang_density", "Medium")
+        
+        brief = f"""📊 SONG PARAMETERS:
+Genre: {payload.get("genre", "Latin Pop")}
+Type: {payload.get("type", "Romantic")}
+Vibe: {payload.get("vibe", "Warm")}
+Energy: {payload.get("energy", "Medium")}
+Language: {payload.get("language", "Spanish")}
+Slang Density: {slang_map.get(slang_density, slang_density)}
+"""
+        singer = payload.get("singer", {})
+        if singer:
+            brief += f"Singer: {', '.join(str(value) for value in singer.values() if value)}\n"
+        if payload.get("keywords"):
+            brief += f"Keywords to include somewhere in the song: {', '.join(payload['keywords'])}\n"
+        if payload.get("forbidden_words"):
+            brief += f"Forbidden words (DO NOT USE): {', '.join(payload['forbidden_words'])}\n"
+        if payload.get("notes"):
+            brief += f"Notes: {payload['notes']}\n"
+        return brief
+    
+    @staticmethod
+    def build_patch_revision_prompt(
+        original_payload: Dict[str, Any],
+        revision_request: str,
+        sections: Dict[str, str]
+    ) -> str:
+        """
+        Build a revision prompt that sends the current draft and asks for
+        line-level edits instead of a rewritten song.
+        
+        Args:
+            original_payload: Original generation payload
+            revision_request: User's revision instructions
+            sections: Lyrics sections in scope (key -> text)
+            
+        Returns:
+            Formatted revision prompt
+        """
+        draft = []
+        for key, text in sections.items():
+            draft.append(f"[{key}]")
+            draft.extend(f"{number}| {line}" for number, line in enumerate(text.splitlines(), 1))
+            draft.append("")
+        
+        return f"""🔄 REVISION REQUEST:
+
+{revision_request}
+
+📝 CURRENT DRAFT (numbered lines; only these sections may change):
+{chr(10).join(draft)}
+⚠️ CRITICAL REVISION RULES:
+• Preserve original rhythm and flow (same length range)
+• Maintain tone & lexical field (same family of words)
+• Keep structure (same order / line count)
+• Stay in Mainstream persona
+• Change only the lines the request needs — this is a polish, not a rewrite
+
+Original parameters were:
+Genre: {original_payload.get('genre')}
+Type: {original_payload.get('type')}
+Vibe: {original_payload.get('vibe')}
+
+Return ONLY this JSON with line edits (line numbers refer to the draft above):
+{{
+  "edits": [
+    {{"op": "replace", "section": "verse_1", "line": 3, "text": "new line"}},
+    {{"op": "insert_after", "section": "chorus", "line": 4, "text": "added line"}},
+    {{"op": "delete", "section": "verse_2", "line": 7}}
+  ],
+  "notes": "one sentence on what changed and why"
+}}"""
@@ -0,0 +1,248 @@
+"""
+Rate Limiter for KAIRA 2025.
+Client-side requests-per-minute and tokens-per-minute buckets per
+(provider, model), so shared API keys queue instead of hitting 429s.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+# Per-provider defaults (requests/min, tokens/min); override with KAIRA_RATE_LIMITS
+DEFAULT_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 30000},
+    "anthropic": {"rpm": 50, "tpm": 40000},
+    "google": {"rpm": 60, "tpm": 1000000}
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for rate limiting (about 4 characters per token).
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute.
+
+    Reservations are taken immediately and may drive the level negative;
+    the caller then waits until the deficit is refilled. Because reservations
+    are made in arrival order, waiting callers are served first-come first-served.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` units and return the seconds until they are available."""
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+        return -self.level / self.rate if self.level < 0 else 0.0
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units would be available, without taking them."""
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self.level
+        return deficit / self.rate if deficit > 0 else 0.0
+
+    def refund(self, amount: float, now: float):
+        """Return units (negative amounts charge extra)."""
+        self._refill(now)
+        self.level = min(self.level + amount, self.capacity)
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+
+class Reservation:
+    """A granted slot: which buckets were charged and with how many tokens."""
+
+    def __init__(self, key: Tuple[str, str], tokens: int, wait: float):
+        self.key = key
+        self.tokens = tokens
+        self.wait = wait
+
+
+class RateLimiter:
+    """
+    RPM + TPM limiter keyed by (provider, model).
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            limits: Mapping of 'provider' or 'provider:model' to
+                {"rpm": ..., "tpm": ...}; the most specific entry wins and
+                a missing or null value disables that bucket
+        """
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], Dict[str, TokenBucket]] = {}
+        self._stats = {
+            "requests": 0,
+            "throttled": 0,
+            "wait_seconds": 0.0,
+            "reconciled_tokens": 0,
+            "refunded_tokens": 0
+        }
+
+    def reserve(self, provider: str, model: str, tokens: int) -> Reservation:
+        """
+        Reserve one request and `tokens` tokens without blocking.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            tokens: Estimated tokens (prompt + max output)
+
+        Returns:
+            Reservation whose `wait` is the delay before the request may be sent
+        """
+        key = (provider, model)
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets_for(key)
+            wait = 0.0
+            if "rpm" in buckets:
+                wait = max(wait, buckets["rpm"].reserve(1, now))
+            if "tpm" in buckets:
+                wait = max(wait, buckets["tpm"].reserve(tokens, now))
+
+            self._stats["requests"] += 1
+            if wait > 0:
+                self._stats["throttled"] += 1
+                self._stats["wait_seconds"] += wait
+        return Reservation(key, tokens, wait)
+
+    def acquire(self, provider: str, model: str, tokens: int) -> Reservation:
+        """Reserve and block until the request may be sent."""
+        reservation = self.reserve(provider, model, tokens)
+        if reservation.wait > 0:
+            time.sleep(reservation.wait)
+        return reservation
+
+    async def aacquire(self, provider: str, model: str, tokens: int) -> Reservation:
+        """Async counterpart of acquire()."""
+        reservation = self.reserve(provider, model, tokens)
+        if reservation.wait > 0:
+            await asyncio.sleep(reservation.wait)
+        return reservation
+
+    def wait_time(self, provider: str, model: str, tokens: int) -> float:
+        """
+        Seconds a request would wait if it were reserved now (nothing is reserved).
+
+        Args:
+            provider: Provider name
+            model: Model name
+            tokens: Estimated tokens (prompt + max output)
+
+        Returns:
+            Projected wait in seconds (0 when the request could go out immediately)
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = self._buckets_for((provider, model))
+            wait = 0.0
+            if "rpm" in buckets:
+                wait = max(wait, buckets["rpm"].wait_for(1, now))
+            if "tpm" in buckets:
+                wait = max(wait, buckets["tpm"].wait_for(tokens, now))
+        return wait
+
+    def reconcile(self, reservation: Reservation, actual_tokens: int):
+        """
+        Correct the token bucket with the usage the provider reported.
+
+        Args:
+            reservation: Reservation returned by acquire()
+            actual_tokens: Input + output tokens actually used
+        """
+        if actual_tokens <= 0:
+            return
+        with self._lock:
+            bucket = self._buckets_for(reservation.key).get("tpm")
+            if bucket is not None:
+                bucket.refund(reservation.tokens - actual_tokens, time.monotonic())
+            self._stats["reconciled_tokens"] += actual_tokens
+
+    def refund(self, reservation: Reservation):
+        """
+        Return the tokens of a request that failed before using any.
+        The request slot stays spent, so RPM still counts the attempt.
+
+        Args:
+            reservation: Reservation returned by acquire()
+        """
+        with self._lock:
+            bucket = self._buckets_for(reservation.key).get("tpm")
+            if bucket is not None:
+                bucket.refund(reservation.tokens, time.monotonic())
+            self._stats["refunded_tokens"] += reservation.tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get limiter statistics.
+
+        Returns:
+            Dictionary with request/throttle counters and current bucket levels
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buckets"] = {
+                f"{provider}:{model}": {name: round(bucket.level, 1) for name, bucket in buckets.items()}
+                for (provider, model), buckets in self._buckets.items()
+            }
+        return stats
+
+    def _buckets_for(self, key: Tuple[str, str]) -> Dict[str, TokenBucket]:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            provider, model = key
+            limits = self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+            buckets = {
+                name: TokenBucket(limits[name])
+                for name in ("rpm", "tpm")
+                if limits.get(name)
+            }
+            self._buckets[key] = buckets
+        return buckets
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter.
+
+    KAIRA_RATE_LIMITS may hold a JSON object such as
+    {"openai:gpt-4o": {"rpm": 500, "tpm": 30000}} to override DEFAULT_LIMITS.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            limits = dict(DEFAULT_LIMITS)
+            limits.update(json.loads(os.getenv("KAIRA_RATE_LIMITS", "{}")))
+            _default_limiter = RateLimiter(limits)
+        return _default_limiter
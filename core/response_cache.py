@@ -0,0 +1,227 @@
+"""
+Response Cache for KAIRA 2025.
+Content-addressed cache for LLM responses with an in-memory LRU tier
+and an optional on-disk SQLite tier.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class ResponseCache:
+    """
+    Two-tier response cache keyed by a hash of the canonical request.
+
+    Entries are versioned on the system prompt hash: opening a cache with a
+    different system prompt (e.g. after a DNA change) drops every stale entry.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_entries: int = 256,
+        ttl_seconds: float = 86400,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 5000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            system_prompt: Current system prompt; its hash versions the cache
+            max_entries: Maximum entries held in memory (LRU eviction)
+            ttl_seconds: Time-to-live for every entry
+            disk_path: SQLite file for the disk tier (None = memory only)
+            max_disk_entries: Maximum entries kept on disk (least recently used evicted)
+        """
+        self.version = _sha256(system_prompt)[:16]
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+        self._db = None
+        if disk_path:
+            directory = os.path.dirname(disk_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, version TEXT, value TEXT, "
+                "expires_at REAL, last_access REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+            self._db.execute("DELETE FROM responses WHERE version != ? OR expires_at < ?", (self.version, time.time()))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(kind: str, provider: str, model: str, **request: Any) -> str:
+        """
+        Build a cache key from the canonical request.
+
+        Args:
+            kind: Request kind ('lyrics' or 'translation')
+            provider: Provider name
+            model: Model name
+            **request: Remaining request fields (prompts, temperature, max_tokens, ...)
+
+        Returns:
+            Hex digest identifying the request
+        """
+        canonical = json.dumps(
+            {"kind": kind, "provider": provider, "model": model, **request},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return _sha256(canonical)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached value, or None on miss/expiry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND version = ?",
+                    (key, self.version)
+                ).fetchone()
+                if row is not None and row[1] >= now:
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[1], row[0])
+                    self._stats["disk_hits"] += 1
+                    return json.loads(row[0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """
+        Store a JSON-serializable value.
+
+        Args:
+            key: Key from make_key()
+            value: Response to cache
+        """
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        serialized = json.dumps(value, ensure_ascii=False)
+
+        with self._lock:
+            self._remember(key, expires_at, serialized)
+            self._stats["stores"] += 1
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, version, value, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, self.version, serialized, expires_at, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit/miss counters and tier sizes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["version"] = self.version
+        return stats
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        """Insert into the memory tier, evicting least recently used entries."""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        """Remove expired rows and trim the disk tier to max_disk_entries."""
+        removed = self._db.execute("DELETE FROM responses WHERE expires_at < ?", (now,)).rowcount
+        overflow = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_disk_entries
+        if overflow > 0:
+            removed += self._db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+        self._stats["evictions"] += removed
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache for the current KAIRA system prompt.
+
+    The disk tier lives at KAIRA_CACHE_PATH (default .kaira_cache/responses.sqlite3)
+    and entries expire after KAIRA_CACHE_TTL seconds (default 86400).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            from .prompt_builder import PromptBuilder
+            _default_cache = ResponseCache(
+                PromptBuilder.get_system_prompt(),
+                ttl_seconds=float(os.getenv("KAIRA_CACHE_TTL", "86400")),
+                disk_path=os.getenv("KAIRA_CACHE_PATH", os.path.join(".kaira_cache", "responses.sqlite3"))
+            )
+        return _default_cache
@@ -3,8 +3,95 @@ Response Parser for KAIRA 2025.
 Parses and validates GPT responses.
 """
 
-import json
-from typing import Dict, Any, Optional, Union
+import bisect
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from .codec import get_codec
+from .tracing import get_tracer
+
+
+# An object worth decoding opens with a key or is empty; prose braces ("{like this}") are skipped
+_OBJECT_START = re.compile(r'\{\s*["}]')
+_STRUCTURAL = re.compile(r'[{}"]')
+# Characters that end a run of plain string content
+_STRING_STOP = re.compile(r'["\\]')
+
+
+def _json_object_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    Find the outermost balanced {...} spans in one pass.
+    
+    String- and escape-aware inside candidate objects. Spans nested in a
+    later-closed span are dropped, so the result is disjoint; when an outer
+    object never closes (truncated output), its completed children remain.
+    """
+    spans: List[Tuple[int, int]] = []
+    stack: List[int] = []
+    i, n = 0, len(text)
+    while i < n:
+        if not stack:
+            match = _OBJECT_START.search(text, i)
+            if match is None:
+                break
+            stack.append(match.start())
+            i = match.start() + 1
+            continue
+        
+        match = _STRUCTURAL.search(text, i)
+        if match is None:
+            break
+        i = match.start()
+        c = text[i]
+        if c == '"':
+            # Skip the string, honoring escapes
+            i += 1
+            while True:
+                match = _STRING_STOP.search(text, i)
+                if match is None:
+                    i = n
+                    break
+                if text[match.start()] == "\\":
+                    i = match.start() + 2
+                    continue
+                i = match.start() + 1
+                break
+            continue
+        if c == "{":
+            stack.append(i)
+        else:
+            start = stack.pop()
+            while spans and spans[-1][0] > start:
+                spans.pop()
+            spans.append((start, i + 1))
+        i += 1
+    return spans
+
+
+def _strip_fences(content: str) -> str:
+    """Remove surrounding whitespace and markdown code fences."""
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content
+
+
+def _largest_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Decode the largest valid top-level JSON object embedded in text."""
+    codec = get_codec()
+    for start, end in sorted(_json_object_spans(text), key=lambda span: span[0] - span[1]):
+        try:
+            data = codec.loads(text[start:end])
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
 
 
 class ResponseParser:
@@ -23,29 +110,71 @@ class ResponseParser:
         Returns:
             Parsed dictionary with lyrics, phonetics, qa_log, metadata
         """
-        try:
-            # If already a dict, validate and return
-            if isinstance(response, dict):
+        # If already a dict, validate and return
+        if isinstance(response, dict):
+            with get_tracer().span("response.parse", input="dict"):
                 return ResponseParser._validate_structure(response)
+        
+        # If string, decode (falls back to text extraction when not JSON)
+        if isinstance(response, str):
+            with get_tracer().span("response.parse", input="text", response_chars=len(response)):
+                return ResponseParser.decode(response)
+        
+        # Unexpected type
+        return {
+            "lyrics": {"full_text": str(response)},
+            "phonetics": {},
+            "qa_log": {"notes": "Unexpected response type"},
+            "metadata": {"error": "Invalid response type"}
+        }
+    
+    @staticmethod
+    def decode(content: str, normalize: bool = True) -> Dict[str, Any]:
+        """
+        Decode a raw model response in a single pass.
+        
+        Markdown fences are stripped and the text is decoded once with the
+        active codec. When that fails, the largest JSON object embedded in
+        the text is recovered instead of re-parsing it as a string later.
+        Decode time is recorded in the codec's stats.
+        
+        Args:
+            content: Raw response text
+            normalize: Return the normalized structure (False = the decoded
+                object as-is, which is what LLMClient returns)
             
-            # If string, try to parse as JSON
-            if isinstance(response, str):
-                data = json.loads(response)
-                # Validate structure
-                validated = ResponseParser._validate_structure(data)
-                return validated
-            
-            # Unexpected type
-            return {
-                "lyrics": {"full_text": str(response)},
+        Returns:
+            Decoded dictionary; on failure the plain-text fallback when
+            normalizing, otherwise the 'Invalid JSON format' fallback that
+            LLMClient retries on
+        """
+        codec = get_codec()
+        started = time.perf_counter()
+        text = _strip_fences(content)
+        
+        try:
+            data = codec.loads(text)
+            outcome = "ok"
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            data = _largest_json_object(text)
+            outcome = "recovered" if data is not None else "failed"
+        
+        if data is not None:
+            result = ResponseParser._validate_structure(data) if normalize else data
+        elif normalize:
+            result = ResponseParser._plain_text(content)
+        else:
+            result = {
+                "lyrics": text,
                 "phonetics": {},
-                "qa_log": {"notes": "Unexpected response type"},
-                "metadata": {"error": "Invalid response type"}
+                "qa_log": "JSON parsing failed",
+                "metadata": {"error": "Invalid JSON format"}
             }
-            
-        except json.JSONDecodeError:
-            # Not valid JSON, try to extract sections manually
-            return ResponseParser._extract_from_text(str(response))
+        
+        codec.record(time.perf_counter() - started, outcome)
+        return result
     
     @staticmethod
     def _validate_structure(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -102,18 +231,15 @@ class ResponseParser:
             Best-effort structured extraction
         """
         # Try to find JSON within text
-        import re
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        matches = re.findall(json_pattern, text, re.DOTALL)
-        
-        for match in matches:
-            try:
-                data = json.loads(match)
-                return ResponseParser._validate_structure(data)
-            except json.JSONDecodeError:
-                continue
+        data = _largest_json_object(text)
+        if data is not None:
+            return ResponseParser._validate_structure(data)
         
-        # Fallback: return text as lyrics
+        return ResponseParser._plain_text(text)
+    
+    @staticmethod
+    def _plain_text(text: str) -> Dict[str, Any]:
+        """Fallback: return text as lyrics."""
         return {
             "lyrics": {"full_text": text},
             "phonetics": {},
@@ -250,3 +376,183 @@ class ResponseParser:
             output.append("")
         
         return "\n".join(output) if output else "No detailed QA information."
+
+
+# Characters that end a bare scalar (number, true, false, null)
+_SCALAR_STOP = re.compile(r'[,\]}\s]')
+
+
+class IncrementalParser:
+    """
+    Push-based JSON parser for streamed responses.
+    
+    Chunks are scanned once, as they arrive. Events are emitted as soon as a
+    lyrics section, a phonetics.difficult_phrases entry or a qa_log field is
+    complete. Text before the top-level object (e.g. a ```json fence) and
+    after it is ignored for events. close() returns exactly what
+    ResponseParser produces for the complete response.
+    
+    Events:
+        {"type": "lyrics", "section": str, "text": str}
+        {"type": "phrase", "index": int, "value": Any}
+        {"type": "qa_log", "field": str, "value": Any}
+    """
+    
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._length = 0
+        
+        # Container frames: [is_object, path, start, key, index, expect_key]
+        self._stack: List[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._scalar_start: Optional[int] = None
+        self._root: Optional[tuple] = None
+        self._root_start: Optional[int] = None
+        self._chunk = ""
+        self._base = 0
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Push the next chunk of the response.
+        
+        Args:
+            chunk: Text received since the last call
+            
+        Returns:
+            Events completed by this chunk (possibly empty)
+        """
+        if not chunk:
+            return []
+        base = self._length
+        self._chunks.append(chunk)
+        self._offsets.append(base)
+        self._length += len(chunk)
+        
+        events: List[Dict[str, Any]] = []
+        if self._root is None:
+            self._chunk, self._base = chunk, base
+            self._scan(chunk, base, events)
+        return events
+    
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish parsing.
+        
+        The buffered text goes through the batch parser, so prose-wrapped,
+        fenced or truncated responses resolve to the same object (the largest
+        valid one) as ResponseParser.parse on the complete text.
+        
+        Returns:
+            Parsed dictionary with lyrics, phonetics, qa_log, metadata
+        """
+        return ResponseParser.parse(self._joined())
+    
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._joined()
+    
+    def _scan(self, chunk: str, base: int, events: List[Dict[str, Any]]):
+        stack = self._stack
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    i += 1
+                    continue
+                match = _STRING_STOP.search(chunk, i)
+                if match is None:
+                    return
+                i = match.start()
+                if chunk[i] == "\\":
+                    self._escape = True
+                    i += 1
+                    continue
+                self._in_string = False
+                i += 1
+                if self._string_is_key:
+                    stack[-1][3] = self._decode(self._string_start, base + i)
+                else:
+                    self._value_done(self._child_path(stack[-1]), self._string_start, base + i, events)
+                continue
+            
+            if self._scalar_start is not None:
+                match = _SCALAR_STOP.search(chunk, i)
+                if match is None:
+                    return
+                i = match.start()
+                self._value_done(self._child_path(stack[-1]), self._scalar_start, base + i, events)
+                self._scalar_start = None
+            
+            c = chunk[i]
+            if c in " \t\r\n":
+                pass
+            elif not stack:
+                # Skip fences and preamble until the top-level object opens
+                if c == "{":
+                    self._root_start = base + i
+                    stack.append([True, (), base + i, None, 0, True])
+            elif c == '"':
+                frame = stack[-1]
+                self._in_string = True
+                self._string_start = base + i
+                self._string_is_key = frame[0] and frame[5]
+            elif c == "{" or c == "[":
+                stack.append([c == "{", self._child_path(stack[-1]), base + i, None, 0, True])
+            elif c == "}" or c == "]":
+                frame = stack.pop()
+                if not stack:
+                    self._root = (self._root_start, base + i + 1)
+                    return
+                self._value_done(frame[1], frame[2], base + i + 1, events)
+            elif c == ":":
+                stack[-1][5] = False
+            elif c == ",":
+                frame = stack[-1]
+                if frame[0]:
+                    frame[3] = None
+                    frame[5] = True
+                else:
+                    frame[4] += 1
+            else:
+                self._scalar_start = base + i
+            i += 1
+    
+    @staticmethod
+    def _child_path(frame: list) -> tuple:
+        return frame[1] + ((frame[3],) if frame[0] else (frame[4],))
+    
+    def _value_done(self, path: tuple, start: int, end: int, events: List[Dict[str, Any]]):
+        if len(path) == 2 and path[0] == "lyrics":
+            value = self._decode(start, end)
+            if isinstance(value, str):
+                events.append({"type": "lyrics", "section": path[1], "text": value})
+        elif len(path) == 3 and path[:2] == ("phonetics", "difficult_phrases"):
+            events.append({"type": "phrase", "index": path[2], "value": self._decode(start, end)})
+        elif len(path) == 2 and path[0] == "qa_log":
+            events.append({"type": "qa_log", "field": path[1], "value": self._decode(start, end)})
+    
+    def _decode(self, start: int, end: int) -> Any:
+        try:
+            return get_codec().loads(self._slice(start, end))
+        except ValueError:
+            return None
+    
+    def _slice(self, start: int, end: int) -> str:
+        """Text in [start, end) built only from the chunks that overlap it."""
+        # Most keys and short values sit inside the current chunk
+        if start >= self._base:
+            return self._chunk[start - self._base:end - self._base]
+        first = bisect.bisect_right(self._offsets, start) - 1
+        last = bisect.bisect_left(self._offsets, end)
+        joined = "".join(self._chunks[first:last])
+        offset = self._offsets[first]
+        return joined[start - offset:end - offset]
+    
+    def _joined(self) -> str:
+        return "".join(self._chunks)
@@ -0,0 +1,288 @@
+"""
+Retry Policy for KAIRA 2025.
+Shared retry logic for every provider: error classification, exponential
+backoff with full jitter, Retry-After support and a total deadline.
+"""
+
+import asyncio
+import email.utils
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class MalformedResponseError(Exception):
+    """Raised when a provider returns a response that is not valid JSON."""
+
+
+# Exception class names used by the OpenAI / Anthropic / Google SDKs and httpx
+_TIMEOUT_NAMES = ("Timeout", "DeadlineExceeded")
+_CONNECTION_NAMES = ("APIConnectionError", "ConnectError", "RemoteProtocolError", "ServiceUnavailable")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class RetryPolicy:
+    """
+    Retry policy shared by all providers.
+
+    Retries rate limits (429), server errors (5xx), timeouts, connection errors
+    and malformed JSON. Waits use exponential backoff with full jitter, or the
+    provider's Retry-After hint when it asks for longer. The prompt is never
+    modified between attempts.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        deadline: float = 180.0
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts: Total attempts per call, including the first
+            base_delay: Backoff base in seconds
+            max_delay: Upper bound for a single backoff
+            deadline: Total seconds a call may spend across all attempts
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "give_ups": 0,
+            "retries_by_reason": {}
+        }
+
+    @staticmethod
+    def classify(error: BaseException) -> Optional[str]:
+        """
+        Classify an error.
+
+        Args:
+            error: Exception raised by a provider call
+
+        Returns:
+            Retry reason ('rate_limit', 'server_error', 'timeout', 'connection',
+            'malformed_json'), or None when the error is not retryable
+        """
+        if isinstance(error, MalformedResponseError):
+            return "malformed_json"
+
+        status = getattr(error, "status_code", None)
+        if status is None:
+            # google.api_core exceptions expose the HTTP status as `code`
+            code = getattr(error, "code", None)
+            status = code if isinstance(code, int) else None
+        if status == 429:
+            return "rate_limit"
+        if isinstance(status, int) and status >= 500:
+            return "server_error"
+
+        name = type(error).__name__
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or any(n in name for n in _TIMEOUT_NAMES):
+            return "timeout"
+        if isinstance(error, ConnectionError) or any(n in name for n in _CONNECTION_NAMES):
+            return "connection"
+        if "ResourceExhausted" in name:
+            return "rate_limit"
+        
+        # Wrapped SDK errors (raise ... from e) are classified by their cause
+        if error.__cause__ is not None:
+            return RetryPolicy.classify(error.__cause__)
+        return None
+
+    @staticmethod
+    def retry_after(error: BaseException) -> Optional[float]:
+        """
+        Read the server's requested wait from the error's response headers.
+
+        Args:
+            error: Exception raised by a provider call
+
+        Returns:
+            Seconds to wait, or None when the provider gave no hint
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            if error.__cause__ is not None:
+                return RetryPolicy.retry_after(error.__cause__)
+            return None
+
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    parsed = email.utils.parsedate_to_datetime(value)
+                    return max(parsed.timestamp() - time.time(), 0.0)
+
+            # OpenAI rate-limit reset hints, e.g. "1s", "6m0s", "250ms"
+            resets = [
+                _parse_duration(headers.get(name))
+                for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+                if headers.get(name)
+            ]
+            resets = [r for r in resets if r is not None]
+            if resets:
+                return max(resets)
+        except (TypeError, ValueError):
+            return None
+        return None
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for a 1-based attempt number."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def next_delay(
+        self,
+        error: BaseException,
+        attempt: int,
+        started: float,
+        max_attempts: Optional[int] = None
+    ) -> Optional[float]:
+        """
+        Decide whether to retry after a failed attempt.
+
+        Args:
+            error: Exception from the failed attempt
+            attempt: Number of attempts made so far
+            started: time.monotonic() when the call began
+            max_attempts: Attempt limit for this call (defaults to the policy's)
+
+        Returns:
+            Seconds to sleep before the next attempt, or None to give up
+        """
+        reason = self.classify(error)
+        if reason is None or attempt >= (max_attempts or self.max_attempts):
+            return None
+
+        delay = self.backoff(attempt)
+        hinted = self.retry_after(error)
+        if hinted is not None:
+            delay = max(delay, hinted)
+
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+
+        with self._lock:
+            self._stats["retries"] += 1
+            by_reason = self._stats["retries_by_reason"]
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+        return delay
+
+    def call(self, fn: Callable[[], Any], max_attempts: Optional[int] = None) -> Any:
+        """
+        Run a blocking call under this policy.
+
+        Args:
+            fn: Zero-argument callable performing one attempt
+            max_attempts: Attempt limit for this call (defaults to the policy's)
+
+        Returns:
+            Result of the first successful attempt
+        """
+        started = time.monotonic()
+        self._count("calls")
+        attempt = 0
+        while True:
+            attempt += 1
+            self._count("attempts")
+            try:
+                return fn()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, started, max_attempts)
+                if delay is None:
+                    self._count("give_ups")
+                    raise
+                time.sleep(delay)
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], max_attempts: Optional[int] = None) -> Any:
+        """
+        Async counterpart of call().
+
+        Args:
+            fn: Zero-argument callable returning a fresh awaitable per attempt
+            max_attempts: Attempt limit for this call (defaults to the policy's)
+
+        Returns:
+            Result of the first successful attempt
+        """
+        started = time.monotonic()
+        self._count("calls")
+        attempt = 0
+        while True:
+            attempt += 1
+            self._count("attempts")
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, started, max_attempts)
+                if delay is None:
+                    self._count("give_ups")
+                    raise
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get retry statistics.
+
+        Returns:
+            Dictionary with call, attempt, retry and give-up counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["retries_by_reason"] = dict(self._stats["retries_by_reason"])
+        return stats
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Go-style durations such as '6m0s' or '250ms' into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+_default_policy: Optional[RetryPolicy] = None
+_default_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Get the process-wide retry policy.
+
+    Configured with KAIRA_MAX_ATTEMPTS (default 3) and KAIRA_RETRY_DEADLINE
+    seconds (default 180).
+    """
+    global _default_policy
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = RetryPolicy(
+                max_attempts=int(os.getenv("KAIRA_MAX_ATTEMPTS", "3")),
+                deadline=float(os.getenv("KAIRA_RETRY_DEADLINE", "180"))
+            )
+        return _default_policy
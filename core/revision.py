@@ -0,0 +1,173 @@
+"""
+Revision Engine for KAIRA 2025.
+Sends the current draft and applies the model's line-level edits locally,
+so a revision costs a few lines of output instead of a whole song.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.structures import DEFAULT_STRUCTURE
+from .client_pool import run_async
+from .llm_client import LLMClient
+from .prompt_builder import PromptBuilder
+from .validator import validate_structure_compliance
+
+
+EDIT_OPS = ("replace", "insert_after", "delete")
+
+
+def apply_edits(
+    lyrics: Dict[str, Any],
+    edits: List[Dict[str, Any]],
+    scope: Optional[List[str]] = None
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Apply line edits to a lyrics dictionary.
+
+    Line numbers are 1-based and always refer to the draft the edits were
+    made against, so the order of the edits does not matter.
+
+    Args:
+        lyrics: Current lyrics sections
+        edits: Edit operations ({"op", "section", "line", "text"})
+        scope: Sections that may change (None = every section)
+
+    Returns:
+        Tuple of (revised lyrics, applied edits, rejected edits)
+    """
+    plans: Dict[str, Dict[str, Any]] = {}
+    applied, rejected = [], []
+
+    for edit in edits:
+        if not isinstance(edit, dict):
+            rejected.append({"edit": edit, "reason": "Not an object"})
+            continue
+        op, section, line = edit.get("op"), edit.get("section"), edit.get("line")
+        text = lyrics.get(section)
+
+        reason = None
+        if op not in EDIT_OPS:
+            reason = f"Unknown op: {op}"
+        elif not isinstance(text, str) or (scope is not None and section not in scope):
+            reason = f"Section not in scope: {section}"
+        elif not isinstance(line, int) or isinstance(line, bool):
+            reason = "Line must be an integer"
+        elif op != "delete" and not isinstance(edit.get("text"), str):
+            reason = "Missing text"
+        else:
+            count = len(text.splitlines())
+            lowest = 0 if op == "insert_after" else 1
+            if not lowest <= line <= count:
+                reason = f"Line {line} out of range for {section} ({count} lines)"
+
+        if reason:
+            rejected.append({"edit": edit, "reason": reason})
+            continue
+
+        plan = plans.setdefault(section, {"replace": {}, "delete": set(), "insert_after": {}})
+        if op == "replace":
+            plan["replace"][line] = edit["text"]
+        elif op == "delete":
+            plan["delete"].add(line)
+        else:
+            plan["insert_after"].setdefault(line, []).append(edit["text"])
+        applied.append(edit)
+
+    revised = dict(lyrics)
+    for section, plan in plans.items():
+        lines = lyrics[section].splitlines()
+        out = list(plan["insert_after"].get(0, []))
+        for number, original in enumerate(lines, 1):
+            if number not in plan["delete"]:
+                out.append(plan["replace"].get(number, original))
+            out.extend(plan["insert_after"].get(number, []))
+        revised[section] = "\n".join(out)
+
+    return revised, applied, rejected
+
+
+class RevisionEngine:
+    """
+    Incremental revisions: the sections in scope are sent with numbered lines,
+    the model answers with edit operations, and the edits are applied to the
+    stored draft and re-checked against the song structure.
+    """
+
+    def __init__(self, client: LLMClient, temperature: float = 0.7, max_tokens: int = 800):
+        """
+        Initialize the engine.
+
+        Args:
+            client: Client used for revision calls
+            temperature: Sampling temperature
+            max_tokens: Token limit for the edit list
+        """
+        self.client = client
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def revise(
+        self,
+        lyrics: Dict[str, Any],
+        payload: Dict[str, Any],
+        revision_request: str,
+        sections: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Blocking wrapper around arevise()."""
+        return run_async(self.arevise(lyrics, payload, revision_request, sections))
+
+    async def arevise(
+        self,
+        lyrics: Dict[str, Any],
+        payload: Dict[str, Any],
+        revision_request: str,
+        sections: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Revise a draft.
+
+        Args:
+            lyrics: Current lyrics sections
+            payload: Original generation payload
+            revision_request: User's revision instructions
+            sections: Sections in scope (None = every non-empty section)
+
+        Returns:
+            Dictionary with revised lyrics, applied/rejected edits, notes and usage
+        """
+        scope = [key for key, text in lyrics.items() if isinstance(text, str) and text.strip()]
+        if sections is not None:
+            scope = [key for key in scope if key in sections]
+        if not scope:
+            raise ValueError("No lyrics sections to revise")
+
+        response = await self.client.agenerate_lyrics(
+            system_prompt=PromptBuilder.get_system_prompt(),
+            user_prompt=PromptBuilder.build_patch_revision_prompt(
+                payload, revision_request, {key: lyrics[key] for key in scope}
+            ),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens
+        )
+        edits = response.get("edits") if isinstance(response, dict) else None
+        if not isinstance(edits, list):
+            raise Exception("Revision failed: no edit list returned")
+
+        revised, applied, rejected = apply_edits(lyrics, edits, scope)
+
+        # A revision must never break a song that followed its structure
+        if payload.get("lyrics_part", "Full Song") == "Full Song":
+            structure = payload.get("structure_override") or DEFAULT_STRUCTURE
+            was_compliant, _ = validate_structure_compliance(lyrics, structure)
+            is_compliant, error = validate_structure_compliance(revised, structure)
+            if was_compliant and not is_compliant:
+                raise ValueError(f"Revision rejected: {error}")
+
+        metadata = response.get("metadata") if isinstance(response.get("metadata"), dict) else {}
+        return {
+            "lyrics": revised,
+            "applied": applied,
+            "rejected": rejected,
+            "notes": response.get("notes", ""),
+            "usage": metadata.get("usage", {})
+        }
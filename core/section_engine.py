@@ -0,0 +1,199 @@
+"""
+Section-Parallel Engine for KAIRA 2025.
+Writes a full song as concurrent per-section calls sharing one song bible,
+so wall-clock time tracks the longest section instead of the whole song.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.structures import DEFAULT_STRUCTURE, SECTION_LINE_COUNTS
+from .client_pool import run_async
+from .llm_client import LLMClient
+from .prompt_builder import PromptBuilder
+from .token_budget import SONG_BIBLE_TOKENS, section_token_budget
+
+
+# lyrics key -> (SECTION_LINE_COUNTS key, role in the song)
+SECTION_ROLES = {
+    "verse_1": ("verse", "Opens the song. Sets the scene and the story, then leads into the chorus."),
+    "verse_2": ("verse", "Second verse after the first chorus. Moves the story forward with a new scene."),
+    "chanteo": ("chanteo", "Flow-driven, rhythmic section between singing and rapping, in place of verse 2 after the first chorus."),
+    "pre_chorus": ("pre-chorus", "Comes after verse 2. Builds tension and lifts the energy into the final chorus."),
+    "bridge": ("bridge", "Emotional twist or closure before the last chorus, same rhythmic pulse.")
+}
+
+
+class SectionEngine:
+    """
+    Opt-in full-song generation in two rounds:
+
+    1. chorus + song bible (hook, story, scenes, lexical field, tone, rhythm)
+    2. every remaining section concurrently, each written from the bible and chorus
+
+    The result has the same shape as a single-call response, so it goes through
+    ResponseParser.parse and format_lyrics_display unchanged.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        temperature: float = 0.8,
+        anchor_max_tokens: Optional[int] = None,
+        section_max_tokens: Optional[int] = None
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            client: Client used for every call
+            temperature: Sampling temperature
+            anchor_max_tokens: Token limit for the chorus + song bible call
+                (None = planned from the payload)
+            section_max_tokens: Token limit for each section call
+                (None = planned per section from the payload)
+        """
+        self.client = client
+        self.temperature = temperature
+        self.anchor_max_tokens = anchor_max_tokens
+        self.section_max_tokens = section_max_tokens
+
+    @staticmethod
+    def supports(payload: Dict[str, Any]) -> bool:
+        """True when the payload asks for a full song in the default structure."""
+        structure = payload.get("structure_override")
+        return payload.get("lyrics_part", "Full Song") == "Full Song" and structure in (None, "", DEFAULT_STRUCTURE)
+
+    @staticmethod
+    def sections_for(payload: Dict[str, Any]) -> List[str]:
+        """Sections written in the parallel round, in song order."""
+        # The default structure has one "[verse 2 / chanteo]" slot
+        sections = ["verse_1", "chanteo" if payload.get("include_chanteo") else "verse_2", "pre_chorus"]
+        if payload.get("include_bridge"):
+            sections.append("bridge")
+        return sections
+
+    def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking wrapper around agenerate()."""
+        return run_async(self.agenerate(payload))
+
+    async def agenerate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generate a full song section by section.
+
+        Args:
+            payload: User selections (must satisfy supports())
+
+        Returns:
+            Response dictionary with lyrics, phonetics, qa_log and metadata
+        """
+        if not self.supports(payload):
+            raise ValueError("Section-parallel generation only supports a Full Song in the default structure")
+
+        system_prompt = PromptBuilder.get_system_prompt()
+        started = time.monotonic()
+
+        anchor, anchor_time = await self._call(
+            "chorus",
+            system_prompt,
+            PromptBuilder.build_song_bible_prompt(payload),
+            self.anchor_max_tokens or section_token_budget(payload, "chorus", SONG_BIBLE_TOKENS)
+        )
+        chorus = _lyrics(anchor).get("chorus")
+        if not chorus:
+            raise Exception("Section generation failed: no chorus in the first round")
+        song_bible = anchor.get("song_bible") if isinstance(anchor.get("song_bible"), dict) else {}
+
+        sections = self.sections_for(payload)
+        results = await asyncio.gather(*[
+            self._call(
+                section,
+                system_prompt,
+                PromptBuilder.build_section_prompt(
+                    payload, section, _line_count(section), SECTION_ROLES[section][1], chorus, song_bible
+                ),
+                self.section_max_tokens or section_token_budget(payload, SECTION_ROLES[section][0])
+            )
+            for section in sections
+        ])
+
+        lyrics = {"chorus": chorus}
+        phrases = list(_phrases(anchor))
+        timings = {"chorus": anchor_time}
+        usages = [_usage(anchor)]
+        for section, (result, elapsed) in zip(sections, results):
+            text = _lyrics(result).get(section)
+            if not text:
+                raise Exception(f"Section generation failed: no {section} returned")
+            lyrics[section] = text
+            phrases.extend(_phrases(result))
+            timings[section] = elapsed
+            usages.append(_usage(result))
+        lyrics["chorus_repeat"] = chorus
+
+        return {
+            "lyrics": {key: lyrics[key] for key in ("verse_1", "chorus", "verse_2", "chanteo", "pre_chorus", "chorus_repeat", "bridge") if key in lyrics},
+            "phonetics": {"difficult_phrases": phrases},
+            "qa_log": {
+                "creative_choices": song_bible.get("story", ""),
+                "slang_used": [],
+                "structure_notes": "Chorus and song bible written first; remaining sections written in parallel from them."
+            },
+            "metadata": {
+                "structure": DEFAULT_STRUCTURE,
+                "total_lines": sum(len(text.strip().splitlines()) for text in lyrics.values()),
+                "song_bible": song_bible,
+                "engine": "section_parallel",
+                "section_timings": timings,
+                "elapsed": round(time.monotonic() - started, 3),
+                "usage": _sum_usage(usages)
+            }
+        }
+
+    async def _call(self, section: str, system_prompt: str, user_prompt: str, max_tokens: int) -> Tuple[Dict[str, Any], float]:
+        started = time.monotonic()
+        try:
+            result = await self.client.agenerate_lyrics(
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                temperature=self.temperature,
+                max_tokens=max_tokens
+            )
+        except Exception as e:
+            raise Exception(f"Section generation failed ({section}): {str(e)}") from e
+        return result if isinstance(result, dict) else {}, round(time.monotonic() - started, 3)
+
+
+def _line_count(section: str) -> str:
+    lines = SECTION_LINE_COUNTS[SECTION_ROLES[section][0]]["lines"]
+    if isinstance(lines, list):
+        return f"{min(lines)}-{max(lines)}"
+    return str(lines)
+
+
+def _lyrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    lyrics = result.get("lyrics")
+    return lyrics if isinstance(lyrics, dict) else {}
+
+
+def _phrases(result: Dict[str, Any]) -> List[Any]:
+    phonetics = result.get("phonetics")
+    phrases = phonetics.get("difficult_phrases") if isinstance(phonetics, dict) else None
+    return phrases if isinstance(phrases, list) else []
+
+
+def _usage(result: Dict[str, Any]) -> Dict[str, int]:
+    metadata = result.get("metadata")
+    usage = metadata.get("usage") if isinstance(metadata, dict) else None
+    return usage if isinstance(usage, dict) else {}
+
+
+def _sum_usage(usages: List[Dict[str, int]]) -> Dict[str, int]:
+    total: Dict[str, int] = {}
+    for usage in usages:
+        for key, value in usage.items():
+            if isinstance(value, int):
+                total[key] = total.get(key, 0) + value
+    total["calls"] = len(usages)
+    return total
@@ -0,0 +1,320 @@
+"""
+Song Store for KAIRA 2025.
+Persistent SQLite store of generated songs (payload, candidates, translation)
+with an FTS5 full-text index over the lyrics and brief, so writers can reopen
+and search earlier work instead of regenerating it.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS songs ("
+    "id TEXT PRIMARY KEY, created REAL NOT NULL, updated REAL NOT NULL, "
+    "provider TEXT, model TEXT, title TEXT, "
+    "genre TEXT, type TEXT, vibe TEXT, language TEXT, lyrics_part TEXT, "
+    "payload TEXT NOT NULL, candidates TEXT NOT NULL, translation TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_songs_created ON songs(created DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_songs_genre ON songs(genre, created DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_songs_vibe ON songs(vibe, created DESC)",
+    # rowid mirrors songs.rowid; remove_diacritics lets "corazon" match "corazón"
+    "CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5("
+    "title, lyrics, brief, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# Columns returned for list/search results (full documents come from get())
+_SUMMARY_COLUMNS = ("id", "created", "updated", "provider", "model", "title", "genre", "type", "vibe", "language", "lyrics_part")
+
+
+class SongStore:
+    """
+    Songs keyed by a short id. One row per generation; best-of-N candidates
+    are kept together so the pager survives a reload.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: SQLite file (':memory:' for a throwaway store)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._stats = {"saves": 0, "updates": 0, "lookups": 0, "searches": 0}
+
+        directory = os.path.dirname(path) if path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def save(
+        self,
+        payload: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> str:
+        """
+        Store a new generation.
+
+        Args:
+            payload: Song payload the lyrics were generated from
+            candidates: Parsed responses (ResponseParser.parse output), one per candidate
+            provider: Provider that generated them
+            model: Model that generated them
+
+        Returns:
+            The new song id
+        """
+        song_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        row = {
+            "id": song_id,
+            "created": now,
+            "updated": now,
+            "provider": provider,
+            "model": model,
+            "title": _title(candidates),
+            "genre": payload.get("genre"),
+            "type": payload.get("type"),
+            "vibe": payload.get("vibe"),
+            "language": payload.get("language"),
+            "lyrics_part": payload.get("lyrics_part"),
+            "payload": _dumps(payload),
+            "candidates": _dumps(candidates),
+            "translation": None
+        }
+        with self._lock:
+            with self._db:
+                cursor = self._db.execute(
+                    f"INSERT INTO songs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                    list(row.values())
+                )
+                self._index(cursor.lastrowid, row["title"], payload, candidates)
+            self._stats["saves"] += 1
+        return song_id
+
+    def update(
+        self,
+        song_id: str,
+        candidates: Optional[List[Dict[str, Any]]] = None,
+        translation: Optional[str] = None
+    ) -> bool:
+        """
+        Replace a song's candidates (e.g. after a revision) and/or translation.
+
+        Args:
+            song_id: Song id
+            candidates: New parsed candidates (None = unchanged)
+            translation: New translation (None = unchanged)
+
+        Returns:
+            True if the song exists
+        """
+        with self._lock:
+            with self._db:
+                row = self._db.execute("SELECT rowid, payload, title FROM songs WHERE id = ?", (song_id,)).fetchone()
+                if row is None:
+                    return False
+                changes: Dict[str, Any] = {"updated": time.time()}
+                if candidates is not None:
+                    changes["candidates"] = _dumps(candidates)
+                    changes["title"] = _title(candidates)
+                if translation is not None:
+                    changes["translation"] = translation
+                self._db.execute(
+                    f"UPDATE songs SET {', '.join(f'{column} = ?' for column in changes)} WHERE id = ?",
+                    list(changes.values()) + [song_id]
+                )
+                if candidates is not None:
+                    self._db.execute("DELETE FROM songs_fts WHERE rowid = ?", (row["rowid"],))
+                    self._index(row["rowid"], changes["title"], json.loads(row["payload"]), candidates)
+            self._stats["updates"] += 1
+        return True
+
+    def get(self, song_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a song by id.
+
+        Returns:
+            Dictionary with the summary columns plus payload, candidates and
+            translation, or None if there is no such song
+        """
+        with self._lock:
+            row = self._db.execute("SELECT * FROM songs WHERE id = ?", (song_id,)).fetchone()
+            self._stats["lookups"] += 1
+        if row is None:
+            return None
+        song = dict(row)
+        song["payload"] = json.loads(song["payload"])
+        song["candidates"] = json.loads(song["candidates"])
+        return song
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        genre: Optional[str] = None,
+        vibe: Optional[str] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List songs newest first, optionally filtered by full-text query,
+        genre and vibe. Pages are keyset-paginated, so deep pages stay fast.
+
+        Args:
+            query: Words matched (all of them, prefix match on the last) against
+                lyrics, title, keywords, notes, genre, type and vibe
+            genre: Exact genre
+            vibe: Exact vibe
+            limit: Page size
+            cursor: next_cursor of the previous page
+
+        Returns:
+            Dictionary with items (summaries; a highlighted snippet when
+            searching) and next_cursor (None on the last page)
+        """
+        match = _match_expression(query) if query else None
+        columns = ", ".join(f"s.{column}" for column in _SUMMARY_COLUMNS)
+        if match:
+            sql = f"SELECT {columns}, snippet(songs_fts, 1, '**', '**', '…', 10) AS snippet FROM songs s JOIN songs_fts f ON f.rowid = s.rowid WHERE songs_fts MATCH ?"
+            params: List[Any] = [match]
+        else:
+            sql = f"SELECT {columns} FROM songs s WHERE 1"
+            params = []
+        if genre:
+            sql += " AND s.genre = ?"
+            params.append(genre)
+        if vibe:
+            sql += " AND s.vibe = ?"
+            params.append(vibe)
+        if cursor:
+            created, _, song_id = cursor.partition(":")
+            sql += " AND (s.created < ? OR (s.created = ? AND s.id < ?))"
+            params += [float(created), float(created), song_id]
+        sql += " ORDER BY s.created DESC, s.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            self._stats["searches"] += 1
+
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = f"{last['created']!r}:{last['id']}"
+        return {"items": items, "next_cursor": next_cursor}
+
+    def count(self) -> int:
+        """Number of stored songs."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def delete(self, song_id: str) -> bool:
+        """
+        Delete a song.
+
+        Returns:
+            True if the song existed
+        """
+        with self._lock:
+            with self._db:
+                row = self._db.execute("SELECT rowid FROM songs WHERE id = ?", (song_id,)).fetchone()
+                if row is None:
+                    return False
+                self._db.execute("DELETE FROM songs_fts WHERE rowid = ?", (row["rowid"],))
+                self._db.execute("DELETE FROM songs WHERE rowid = ?", (row["rowid"],))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+
+        Returns:
+            Dictionary with the store path, song count and operation counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["songs"] = self.count()
+        stats["path"] = self.path
+        return stats
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
+
+    def _index(self, rowid: int, title: str, payload: Dict[str, Any], candidates: List[Dict[str, Any]]):
+        """Add one song to the full-text index (caller holds the lock and transaction)."""
+        lyrics = "\n".join(
+            text
+            for candidate in candidates
+            for text in (candidate.get("lyrics") or {}).values()
+            if isinstance(text, str)
+        )
+        keywords = payload.get("keywords") or []
+        brief = " ".join(
+            [str(payload.get(field) or "") for field in ("genre", "type", "vibe", "notes")]
+            + [str(keyword) for keyword in (keywords if isinstance(keywords, list) else [keywords])]
+        )
+        self._db.execute(
+            "INSERT INTO songs_fts (rowid, title, lyrics, brief) VALUES (?, ?, ?, ?)",
+            (rowid, title, lyrics, brief)
+        )
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _title(candidates: List[Dict[str, Any]]) -> str:
+    """First line of the chorus (or of the first section) of the first candidate."""
+    lyrics = (candidates[0].get("lyrics") if candidates else None) or {}
+    sections = [lyrics.get("chorus")] + list(lyrics.values())
+    for text in sections:
+        if isinstance(text, str):
+            for line in text.splitlines():
+                line = line.strip()
+                if line and not line.startswith("["):
+                    return line[:80]
+    return "Untitled"
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """FTS5 MATCH expression for free text: every word quoted, the last one as a prefix."""
+    words = [word.replace('"', '""') for word in query.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+_default_store: Optional[SongStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_song_store() -> SongStore:
+    """
+    Get the process-wide song store.
+
+    The database lives at KAIRA_SONGS_PATH (default .kaira_cache/songs.sqlite3).
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SongStore(os.getenv("KAIRA_SONGS_PATH", os.path.join(".kaira_cache", "songs.sqlite3")))
+        return _default_store
@@ -0,0 +1,255 @@
+"""
+Token Budget Planner for KAIRA 2025.
+Counts prompt tokens per provider and sizes max_tokens from the requested
+song structure, so every request asks for what it needs and no more.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from config.structures import DEFAULT_STRUCTURE, SECTION_LINE_COUNTS
+
+
+# Context window and maximum output tokens by provider (or provider:model)
+MODEL_LIMITS = {
+    "openai": {"context": 128000, "output": 16384},
+    "anthropic": {"context": 200000, "output": 8192},
+    "anthropic:claude-sonnet-4-20250514": {"context": 200000, "output": 64000},
+    "google": {"context": 1000000, "output": 8192}
+}
+
+# Characters per token when no local tokenizer is available. Spanish lyrics,
+# accents and emoji tokenize denser than English prose.
+CHARS_PER_TOKEN = {
+    "openai": 3.6,
+    "anthropic": 3.3,
+    "google": 3.8
+}
+
+# Output cost model (tokens)
+TOKENS_PER_LINE = 14
+PHRASE_TOKENS = 40
+QA_LOG_TOKENS = 260
+METADATA_TOKENS = 90
+JSON_OVERHEAD_TOKENS = 60
+HEADROOM = 1.25
+MIN_MAX_TOKENS = 300
+# Song bible returned with the chorus by SectionEngine's first call
+SONG_BIBLE_TOKENS = 300
+
+LENGTH_FACTORS = {"Short": 0.85, "Medium": 1.0, "Long": 1.2}
+
+# SESSION SCOPE option -> SECTION_LINE_COUNTS key (Full Song / Custom use the structure)
+PART_SECTIONS = {
+    "Verse 1 Only": "verse",
+    "Chorus Only": "chorus",
+    "Verse 2 Only": "verse",
+    "Pre-Chorus Only": "pre-chorus",
+    "Chanteo Only": "chanteo",
+    "Bridge Only": "bridge"
+}
+
+
+def count_tokens(text: str, provider: str, model: Optional[str] = None) -> int:
+    """
+    Count tokens with the provider's tokenizer when one is available locally.
+
+    OpenAI models use tiktoken if installed; other providers (and OpenAI
+    without tiktoken) use a per-provider characters-per-token estimate.
+
+    Args:
+        text: Text to count
+        provider: Provider name
+        model: Model name
+
+    Returns:
+        Token count
+    """
+    provider = _provider_id(provider)
+    if provider == "openai":
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text))
+    return int(len(text) / CHARS_PER_TOKEN.get(provider, 4.0)) + 1
+
+
+def song_sections(payload: Dict[str, Any]) -> List[str]:
+    """
+    Sections the response will contain, as SECTION_LINE_COUNTS keys.
+
+    Args:
+        payload: User selections
+
+    Returns:
+        Section names, one entry per lyrics key the model writes
+    """
+    part = payload.get("lyrics_part", "Full Song")
+    if part in PART_SECTIONS:
+        return [PART_SECTIONS[part]]
+
+    structure = payload.get("structure_override") or DEFAULT_STRUCTURE
+    names = [name.strip().lower() for name in re.findall(r'\[([^\]]+)\]', structure)]
+    if not names:
+        # Freestyle / no fixed structure
+        names = [name.strip().lower() for name in re.findall(r'\[([^\]]+)\]', DEFAULT_STRUCTURE)]
+
+    sections = []
+    choruses = 0
+    for name in names:
+        # A requested chanteo fills the "[verse 2 / chanteo]" slot in place of
+        # verse 2 (single-call prompt and SectionEngine alike)
+        if "verse" in name and "chanteo" in name and payload.get("include_chanteo"):
+            section = "chanteo"
+        elif "verse" in name:
+            section = "verse"
+        elif name in SECTION_LINE_COUNTS:
+            section = name
+        else:
+            continue
+
+        if section == "chorus":
+            # The lyrics dict holds chorus + chorus_repeat at most
+            choruses += 1
+            if choruses > 2:
+                continue
+        elif section != "verse" and section in sections:
+            continue
+        sections.append(section)
+
+    # Structures without that slot get a requested chanteo as an extra section
+    for flag, section in (("include_chanteo", "chanteo"), ("include_bridge", "bridge")):
+        if payload.get(flag) and section not in sections:
+            sections.append(section)
+    return sections
+
+
+def expected_output_tokens(payload: Dict[str, Any]) -> int:
+    """
+    Estimate the size of a complete JSON response for the payload.
+
+    Args:
+        payload: User selections
+
+    Returns:
+        Expected output tokens
+    """
+    length = payload.get("length", "Medium")
+    lines = sum(_section_lines(section, length) for section in song_sections(payload))
+
+    tokens = lines * TOKENS_PER_LINE
+    if payload.get("include_phonetics", True):
+        # About one difficult phrase per four lines, plus rhythm notes
+        tokens += (int(lines) // 4 + 1) * PHRASE_TOKENS + 80
+    return int(tokens + QA_LOG_TOKENS + METADATA_TOKENS + JSON_OVERHEAD_TOKENS)
+
+
+def section_token_budget(payload: Dict[str, Any], section: str, extra_tokens: int = 0) -> int:
+    """
+    Plan max_tokens for a call that writes a single section (SectionEngine).
+
+    Args:
+        payload: User selections
+        section: SECTION_LINE_COUNTS key
+        extra_tokens: Expected tokens of anything else the call returns
+
+    Returns:
+        max_tokens for the call
+    """
+    lines = _section_lines(section, payload.get("length", "Medium"))
+    # Section calls always return difficult phrases alongside the lyrics
+    tokens = lines * TOKENS_PER_LINE + (int(lines) // 4 + 1) * PHRASE_TOKENS + JSON_OVERHEAD_TOKENS + extra_tokens
+    return max(MIN_MAX_TOKENS, int(tokens * HEADROOM))
+
+
+def plan_token_budget(
+    payload: Dict[str, Any],
+    provider: str,
+    model: Optional[str],
+    system_prompt: str,
+    user_prompt: str
+) -> Dict[str, Any]:
+    """
+    Plan max_tokens for a lyrics request.
+
+    Args:
+        payload: User selections
+        provider: Provider id ('openai', 'anthropic' or 'google')
+        model: Model name
+        system_prompt: System instruction
+        user_prompt: User request
+
+    Returns:
+        Dictionary with prompt_tokens, expected_output_tokens, max_tokens,
+        sections and warnings (empty when the budget fits)
+
+    Raises:
+        ValueError: If the provider is unknown
+    """
+    provider = _provider_id(provider)
+    limits = MODEL_LIMITS.get(f"{provider}:{model}") or MODEL_LIMITS.get(provider, {"context": 128000, "output": 8192})
+    prompt_tokens = count_tokens(system_prompt, provider, model) + count_tokens(user_prompt, provider, model)
+    expected = expected_output_tokens(payload)
+    max_tokens = max(MIN_MAX_TOKENS, int(expected * HEADROOM))
+
+    warnings = []
+    if max_tokens > limits["output"]:
+        warnings.append(
+            f"Expected output (~{expected} tokens) exceeds the {limits['output']}-token output limit; "
+            "the response may be truncated. Generate fewer sections or a shorter length."
+        )
+        max_tokens = limits["output"]
+
+    available = limits["context"] - prompt_tokens
+    if available < max_tokens:
+        warnings.append(
+            f"Prompt uses {prompt_tokens} of {limits['context']} context tokens, leaving {max(available, 0)} "
+            f"for a response that needs ~{expected}. Shorten the notes or keyword lists."
+        )
+        max_tokens = max(available, 0)
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "expected_output_tokens": expected,
+        "max_tokens": max_tokens,
+        "sections": song_sections(payload),
+        "warnings": warnings
+    }
+
+
+def _provider_id(provider: str) -> str:
+    """Normalize a provider name, rejecting ones the limit tables don't know."""
+    provider_id = (provider or "").lower()
+    if provider_id not in CHARS_PER_TOKEN:
+        raise ValueError(f"Unknown provider for token budgeting: {provider!r}. Supported: {list(CHARS_PER_TOKEN)}")
+    return provider_id
+
+
+def _section_lines(section: str, length: str) -> float:
+    """
+    Line count of a section at the requested length. Ranged sections take
+    their count from the length; fixed-size sections keep their count and
+    scale by LENGTH_FACTORS, so length is applied once per section.
+    """
+    lines = SECTION_LINE_COUNTS[section]["lines"]
+    if isinstance(lines, list):
+        return {"Short": min(lines), "Long": max(lines)}.get(length, sorted(lines)[len(lines) // 2])
+    return lines * LENGTH_FACTORS.get(length, 1.0)
+
+
+_encodings: Dict[str, Any] = {}
+
+
+def _tiktoken_encoding(model: Optional[str]) -> Optional[Any]:
+    """tiktoken encoding for an OpenAI model, or None when tiktoken is not installed."""
+    key = model or ""
+    if key not in _encodings:
+        try:
+            import tiktoken
+        except ImportError:
+            _encodings[key] = None
+            return None
+        try:
+            _encodings[key] = tiktoken.encoding_for_model(model or "gpt-4o")
+        except KeyError:
+            _encodings[key] = tiktoken.get_encoding("o200k_base")
+    return _encodings[key]
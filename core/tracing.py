@@ -0,0 +1,327 @@
+"""
+Tracing for KAIRA 2025.
+Lightweight timing spans around each stage of the generate and translate
+flows, exported as JSON lines and as a Prometheus text snapshot.
+
+Disabled by default: span() then returns a shared no-op span, so
+instrumented code pays one attribute check per stage.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds (seconds) for stage durations
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Span attributes copied onto metric labels (kept low-cardinality)
+METRIC_LABELS = ("provider", "lyrics_part")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("kaira_span", default=None)
+
+
+class Span:
+    """
+    One timed stage. Use as a context manager; nested spans share the
+    trace id of the outermost one (per thread / asyncio task).
+    """
+
+    __slots__ = ("tracer", "name", "attributes", "trace_id", "span_id", "parent_id", "start", "duration", "status", "_t0", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.duration = 0.0
+        self.status = "ok"
+
+    def set(self, **attributes: Any):
+        """Add or update attributes (e.g. response sizes known only at the end)."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = f"{random.getrandbits(32):08x}"
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned generator collected later)
+            pass
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes["error"] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Span factory plus exporters: finished spans are appended to a JSON lines
+    file and aggregated into per-stage duration histograms.
+    """
+
+    def __init__(self, enabled: bool = False, path: Optional[str] = None, metrics_path: Optional[str] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: Record spans
+            path: JSON lines file finished spans are appended to (None = no span log)
+            metrics_path: File the Prometheus snapshot is rewritten to after each
+                root span (None = only on demand via prometheus())
+        """
+        self.enabled = enabled
+        self.path = path
+        self.metrics_path = metrics_path
+
+        self._lock = threading.Lock()
+        # Serializes snapshot exports so an older snapshot never replaces a newer one
+        self._export_lock = threading.Lock()
+        self._file = None
+        # (stage, labels) -> [bucket counts..., +Inf count, sum, errors]
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+        self._stats = {"spans": 0, "traces": 0, "errors": 0}
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Start a span.
+
+        Args:
+            name: Stage name (e.g. 'llm.request')
+            **attributes: Span attributes (provider, model, sizes, ...)
+
+        Returns:
+            Context manager yielding the span (a no-op span when disabled)
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def observe(self, name: str, seconds: float, **attributes: Any):
+        """
+        Record a duration that is not a span of its own (e.g. time to first token).
+
+        Args:
+            name: Stage name
+            seconds: Observed duration
+            **attributes: Attributes used for metric labels
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._observe(name, attributes, seconds, False)
+
+    def enable(self, path: Optional[str] = None, metrics_path: Optional[str] = None):
+        """Turn tracing on, optionally changing the export files."""
+        with self._lock:
+            if path != self.path and self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path = path or self.path
+            self.metrics_path = metrics_path or self.metrics_path
+            self.enabled = True
+
+    def disable(self):
+        """Turn tracing off and close the span log."""
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def prometheus(self) -> str:
+        """
+        Render the stage histograms in the Prometheus text exposition format.
+
+        Returns:
+            Metrics text (kaira_stage_duration_seconds and kaira_stage_errors_total)
+        """
+        with self._lock:
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+
+        lines = [
+            "# HELP kaira_stage_duration_seconds Duration of KAIRA pipeline stages.",
+            "# TYPE kaira_stage_duration_seconds histogram"
+        ]
+        for (stage, labels), values in sorted(histograms.items()):
+            base = _labels((("stage", stage),) + labels)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values):
+                cumulative += count
+                lines.append(f'kaira_stage_duration_seconds_bucket{{{base},le="{bound:g}"}} {int(cumulative)}')
+            total = cumulative + values[len(BUCKETS)]
+            lines.append(f'kaira_stage_duration_seconds_bucket{{{base},le="+Inf"}} {int(total)}')
+            lines.append(f"kaira_stage_duration_seconds_sum{{{base}}} {values[-2]:.6f}")
+            lines.append(f"kaira_stage_duration_seconds_count{{{base}}} {int(total)}")
+
+        lines.append("# HELP kaira_stage_errors_total Stages that ended with an exception.")
+        lines.append("# TYPE kaira_stage_errors_total counter")
+        for (stage, labels), values in sorted(histograms.items()):
+            lines.append(f"kaira_stage_errors_total{{{_labels((('stage', stage),) + labels)}}} {int(values[-1])}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Optional[str] = None):
+        """
+        Atomically write the Prometheus snapshot (e.g. for a node_exporter
+        textfile collector).
+
+        Args:
+            path: Target file (defaults to metrics_path)
+        """
+        path = path or self.metrics_path
+        if not path:
+            raise ValueError("No metrics path configured")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._export_lock:
+            # Private temp file: other processes may export to the same directory
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(self.prometheus())
+                # mkstemp creates 0600 files; collectors often run as another user
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get tracing statistics.
+
+        Returns:
+            Dictionary with span/trace/error counters and mean milliseconds per stage
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stages: Dict[str, List[float]] = {}
+            for (stage, _), values in self._histograms.items():
+                count = sum(values[:len(BUCKETS) + 1])
+                total = stages.setdefault(stage, [0, 0.0])
+                total[0] += count
+                total[1] += values[-2]
+        stats["enabled"] = self.enabled
+        stats["stages"] = {
+            stage: {"count": int(count), "avg_ms": round(seconds / count * 1000, 2) if count else 0.0}
+            for stage, (count, seconds) in sorted(stages.items())
+        }
+        return stats
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._stats["spans"] += 1
+            if span.parent_id is None:
+                self._stats["traces"] += 1
+            if span.status == "error":
+                self._stats["errors"] += 1
+            self._observe(span.name, span.attributes, span.duration, span.status == "error")
+
+            if self.path:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+
+        if span.parent_id is None and self.metrics_path:
+            try:
+                self.write_prometheus()
+            except OSError as e:
+                # A failed export must not fail the traced call
+                logger.warning(f"Metrics snapshot write failed: {str(e)}")
+
+    def _observe(self, name: str, attributes: Dict[str, Any], seconds: float, error: bool):
+        labels = tuple((key, str(attributes[key])) for key in METRIC_LABELS if attributes.get(key) is not None)
+        values = self._histograms.get((name, labels))
+        if values is None:
+            # Per-bucket counts, +Inf count, sum, errors
+            values = self._histograms[(name, labels)] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(BUCKETS)] += 1
+        values[-2] += seconds
+        values[-1] += int(error)
+
+
+def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_default_tracer: Optional[Tracer] = None
+_default_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer.
+
+    KAIRA_TRACE=1 enables it; KAIRA_TRACE_PATH (span log, JSON lines) and
+    KAIRA_METRICS_PATH (Prometheus snapshot) enable it and set the export files.
+    """
+    global _default_tracer
+    # Unlocked fast path: this runs once per instrumented stage
+    tracer = _default_tracer
+    if tracer is not None:
+        return tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            path = os.getenv("KAIRA_TRACE_PATH") or None
+            metrics_path = os.getenv("KAIRA_METRICS_PATH") or None
+            enabled = os.getenv("KAIRA_TRACE", "").lower() in ("1", "true", "yes") or bool(path or metrics_path)
+            _default_tracer = Tracer(enabled=enabled, path=path, metrics_path=metrics_path)
+        return _default_tracer
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient, ResponseParser
+from core.client_pool import get_client_pool
+
+
+class TestAsyncLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+
+    def test_agenerate_openai_concurrent(self):
+        """Concurrent agenerate_lyrics calls share one async client."""
+        mock_async = sys.modules['openai'].AsyncOpenAI.return_value
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = '{"lyrics": {"verse_1": "a", "chorus": "b"}}'
+        mock_async.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        client = LLMClient(provider="openai", api_key="async_key")
+
+        async def run():
+            return await asyncio.gather(*[
+                client.agenerate_lyrics("sys", f"user {i}") for i in range(5)
+            ])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(ResponseParser.parse(results[0])["lyrics"]["chorus"], "b")
+        self.assertEqual(mock_async.chat.completions.create.await_count, 5)
+
+    def test_atranslate_anthropic(self):
+        """atranslate_text awaits the async Anthropic client."""
+        mock_async = sys.modules['anthropic'].AsyncAnthropic.return_value
+        mock_response = MagicMock()
+        mock_response.content[0].text = "  Hello world  "
+        mock_async.messages.create = AsyncMock(return_value=mock_response)
+
+        client = LLMClient(provider="anthropic", api_key="async_key")
+        translation = asyncio.run(client.atranslate_text("Hola mundo"))
+
+        self.assertEqual(translation, "Hello world")
+
+
+if __name__ == '__main__':
+    unittest.main()
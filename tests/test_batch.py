@@ -0,0 +1,134 @@
+import sys
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core.batch import BatchRunner, completed_hashes, read_payloads
+from utils import payload_hash
+
+
+PAYLOAD = {
+    "genre": "Reggaeton",
+    "type": "Romantic",
+    "vibe": "Sensual",
+    "energy": "High",
+    "language": "Spanish",
+    "slang_density": "Medium"
+}
+
+
+class FakeClient:
+    """Stand-in for LLMClient that fails for one genre."""
+
+    provider = "openai"
+    model = "gpt-4o"
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def agenerate_lyrics(self, system_prompt, user_prompt, temperature=0.8, max_tokens=2500):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if "Bachata" in user_prompt:
+            raise Exception("OpenAI generation failed: boom")
+        return {
+            "lyrics": {"verse_1": "a", "chorus": "b"},
+            "phonetics": {},
+            "qa_log": {},
+            "metadata": {"usage": {"total_tokens": 10}}
+        }
+
+
+class TestBatchRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = str(Path(self.tmp.name) / "results.jsonl")
+        self.payloads = [
+            {**PAYLOAD, "keywords": [f"k{i}"]} for i in range(5)
+        ] + [{**PAYLOAD, "genre": "Bachata"}, {**PAYLOAD, "energy": "Extreme"}]
+
+    def run_batch(self, client, concurrency=2):
+        runner = BatchRunner(client, concurrency=concurrency, progress=None)
+        return asyncio.run(runner.run(self.payloads, self.output))
+
+    def test_statuses_and_concurrency_limit(self):
+        client = FakeClient()
+        summary = self.run_batch(client)
+
+        self.assertEqual(summary["ok"], 5)
+        self.assertEqual(summary["error"], 1)
+        self.assertEqual(summary["invalid"], 1)
+        self.assertEqual(summary["tokens"], 50)
+        self.assertLessEqual(client.peak, 2)
+
+        records = [json.loads(line) for line in open(self.output, encoding="utf-8")]
+        self.assertEqual(len(records), 7)
+        ok = [r for r in records if r["status"] == "ok"]
+        self.assertEqual(ok[0]["result"]["lyrics"]["chorus"], "b")
+        self.assertEqual(
+            {r["payload_hash"] for r in ok},
+            {payload_hash(p) for p in self.payloads[:5]}
+        )
+
+    def test_resume_skips_completed_payloads(self):
+        self.run_batch(FakeClient())
+        # Torn line from an interrupted write
+        with open(self.output, "a", encoding="utf-8") as f:
+            f.write('{"payload_hash": "abc", "sta')
+
+        client = FakeClient()
+        summary = self.run_batch(client)
+
+        self.assertEqual(summary["skipped"], 5)
+        self.assertEqual(client.calls, 1)  # only the failed payload is retried
+        self.assertEqual(len(completed_hashes(self.output)), 5)
+
+    def test_malformed_response_is_retried_on_resume(self):
+        client = FakeClient()
+
+        async def garbled(system_prompt, user_prompt, temperature=0.8, max_tokens=2500):
+            # LLMClient's fallback once its JSON retries are spent
+            return {"lyrics": "not json", "phonetics": {}, "qa_log": "JSON parsing failed",
+                    "metadata": {"error": "Invalid JSON format"}}
+
+        client.agenerate_lyrics = garbled
+        summary = self.run_batch(client)
+        records = [json.loads(line) for line in open(self.output, encoding="utf-8")]
+
+        self.assertEqual((summary["ok"], summary["error"]), (0, 6))
+        self.assertEqual({r["raw"] for r in records if r["status"] == "error"}, {"not json"})
+        self.assertEqual(completed_hashes(self.output), set())
+
+    def test_read_payloads_reports_bad_line(self):
+        path = Path(self.tmp.name) / "payloads.jsonl"
+        path.write_text(json.dumps(PAYLOAD) + "\n\nnot json\n", encoding="utf-8")
+        with self.assertRaises(ValueError) as ctx:
+            list(read_payloads(str(path)))
+        self.assertIn(":3:", str(ctx.exception))
+
+    def test_payload_hash_ignores_key_order(self):
+        reordered = dict(reversed(list(PAYLOAD.items())))
+        self.assertEqual(payload_hash(PAYLOAD), payload_hash(reordered))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,262 @@
+import sys
+from pathlib import Path
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.batch import completed_hashes
+from core.bulk import AnthropicBatchBackend, BulkRunner, OpenAIBatchBackend
+from core.client_pool import get_client_pool
+from core.retry import RetryPolicy
+
+
+PAYLOAD = {
+    "genre": "Reggaeton",
+    "type": "Romantic",
+    "vibe": "Sensual",
+    "energy": "High",
+    "language": "Spanish"
+}
+
+LYRICS = json.dumps({"lyrics": {"verse_1": "a", "chorus": "b"}, "phonetics": {}, "qa_log": {}, "metadata": {}})
+
+
+class LocalOpenAIBatches:
+    """
+    Local stand-in for the OpenAI files/batches protocol. Batches report
+    'in_progress' for `polls_until_done` retrievals, then 'completed'.
+    Requests whose prompt mentions 'Bachata' fail with a 400; 'garbled' ones
+    return text that is not JSON.
+    """
+
+    def __init__(self, polls_until_done=1):
+        self.polls_until_done = polls_until_done
+        self.file_store = {}
+        self.batch_store = {}
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self.file_store)}"
+        self.file_store[file_id] = file[1].read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _content(self, file_id):
+        return SimpleNamespace(text=self.file_store[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self.batch_store)}"
+        self.batch_store[batch_id] = {"input": input_file_id, "polls": 0}
+        return SimpleNamespace(id=batch_id)
+
+    def _retrieve(self, batch_id):
+        batch = self.batch_store[batch_id]
+        batch["polls"] += 1
+        if batch["polls"] <= self.polls_until_done:
+            return SimpleNamespace(status="in_progress", output_file_id=None, error_file_id=None)
+
+        if "output" not in batch:
+            lines = []
+            for line in self.file_store[batch["input"]].splitlines():
+                request = json.loads(line)
+                if "Bachata" in request["body"]["messages"][1]["content"]:
+                    response = {"status_code": 400, "body": {"error": {"message": "bad request"}}}
+                else:
+                    content = "not json" if "garbled" in request["body"]["messages"][1]["content"] else LYRICS
+                    response = {"status_code": 200, "body": {
+                        "choices": [{"message": {"content": content}}],
+                        "usage": {"prompt_tokens": 100, "completion_tokens": 50,
+                                  "prompt_tokens_details": {"cached_tokens": 80}}
+                    }}
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": response}))
+            batch["output"] = self._create_file(("out.jsonl", _Bytes("\n".join(lines))), "batch_output").id
+        return SimpleNamespace(status="completed", output_file_id=batch["output"], error_file_id=None)
+
+
+class _Bytes:
+    def __init__(self, text):
+        self.text = text
+
+    def read(self):
+        return self.text.encode("utf-8")
+
+
+class LocalAnthropicBatches:
+    """Local stand-in for the Anthropic messages.batches protocol."""
+
+    def __init__(self):
+        self.requests = {}
+        self.messages = SimpleNamespace(batches=SimpleNamespace(
+            create=self._create, retrieve=self._retrieve, results=self._results
+        ))
+
+    def _create(self, requests):
+        batch_id = f"msgbatch-{len(self.requests)}"
+        self.requests[batch_id] = requests
+        return SimpleNamespace(id=batch_id)
+
+    def _retrieve(self, batch_id):
+        return SimpleNamespace(processing_status="ended")
+
+    def _results(self, batch_id):
+        for request in self.requests[batch_id]:
+            usage = SimpleNamespace(input_tokens=20, cache_read_input_tokens=80,
+                                    cache_creation_input_tokens=0, output_tokens=50)
+            message = SimpleNamespace(content=[SimpleNamespace(text=LYRICS)], usage=usage)
+            yield SimpleNamespace(custom_id=request["custom_id"],
+                                  result=SimpleNamespace(type="succeeded", message=message))
+
+
+class TestBulkRunner(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.output = str(Path(self.tmp.name) / "results.jsonl")
+        self.checkpoint = str(Path(self.tmp.name) / "results.bulk.json")
+        self.payloads = [{**PAYLOAD, "keywords": [f"k{i}"]} for i in range(4)] + [
+            {**PAYLOAD, "genre": "Bachata"},
+            {**PAYLOAD, "energy": "Extreme"}
+        ]
+
+    def records(self):
+        return [json.loads(line) for line in open(self.output, encoding="utf-8")]
+
+    def test_openai_submit_poll_collect(self):
+        api = LocalOpenAIBatches(polls_until_done=2)
+        runner = BulkRunner(
+            LLMClient(provider="openai", api_key="bulk_key"),
+            self.checkpoint,
+            backend=OpenAIBatchBackend(api),
+            poll_interval=0,
+            max_requests=3
+        )
+        stats = runner.run(self.payloads, self.output)
+
+        self.assertEqual(stats, {"ok": 4, "error": 1, "skipped": 0, "invalid": 1})
+        self.assertEqual(len(api.batch_store), 2)  # 5 valid requests in batches of 3
+        self.assertFalse(Path(self.checkpoint).exists())
+
+        ok = [r for r in self.records() if r["status"] == "ok"][0]
+        self.assertEqual(ok["result"]["lyrics"]["chorus"], "b")
+        self.assertEqual(ok["result"]["metadata"]["usage"]["cached_input_tokens"], 80)
+        self.assertIn("batch_id", ok["result"]["metadata"]["bulk"])
+
+        # The system prompt leads every request body
+        request = json.loads(api.file_store["file-0"].splitlines()[0])
+        self.assertEqual(request["body"]["messages"][0]["role"], "system")
+
+    def test_malformed_result_is_an_error_retried_on_resume(self):
+        api = LocalOpenAIBatches(polls_until_done=0)
+        runner = BulkRunner(
+            LLMClient(provider="openai", api_key="bulk_key"),
+            self.checkpoint,
+            backend=OpenAIBatchBackend(api),
+            poll_interval=0
+        )
+        stats = runner.run([PAYLOAD, {**PAYLOAD, "keywords": ["garbled"]}], self.output)
+
+        self.assertEqual((stats["ok"], stats["error"]), (1, 1))
+        malformed = [r for r in self.records() if r["status"] == "error"][0]
+        self.assertEqual(malformed["raw"], "not json")
+        self.assertNotIn(malformed["payload_hash"], completed_hashes(self.output))
+
+    def test_resume_polls_without_resubmitting(self):
+        api = LocalOpenAIBatches(polls_until_done=1)
+        client = LLMClient(provider="openai", api_key="bulk_key")
+
+        first = BulkRunner(client, self.checkpoint, backend=OpenAIBatchBackend(api), poll_interval=0)
+        first.submit(self.payloads, self.output)
+        self.assertTrue(Path(self.checkpoint).exists())
+
+        # A new process picks the checkpoint up
+        second = BulkRunner(client, self.checkpoint, backend=OpenAIBatchBackend(api), poll_interval=0)
+        stats = second.run(self.payloads, self.output)
+
+        self.assertEqual(len(api.batch_store), 1)
+        self.assertEqual(stats["ok"], 4)
+
+        # Completed payloads are skipped on the next run
+        third = BulkRunner(client, self.checkpoint, backend=OpenAIBatchBackend(api), poll_interval=0)
+        stats = third.run(self.payloads, self.output)
+        self.assertEqual(stats["skipped"], 4)
+        self.assertEqual(len(api.batch_store), 2)  # only the failed request is resubmitted
+
+    def test_collect_after_crash_does_not_duplicate_records(self):
+        api = LocalOpenAIBatches(polls_until_done=0)
+        client = LLMClient(provider="openai", api_key="bulk_key")
+
+        # A run that wrote its results but died before removing the checkpoint
+        first = BulkRunner(client, self.checkpoint, backend=OpenAIBatchBackend(api), poll_interval=0)
+        state = first.submit(self.payloads, self.output)
+        first.wait(state)
+        first.collect(state, self.output)
+
+        second = BulkRunner(client, self.checkpoint, backend=OpenAIBatchBackend(api), poll_interval=0)
+        stats = second.run(self.payloads, self.output)
+
+        self.assertEqual((stats["ok"], stats["skipped"]), (0, 4))
+        self.assertEqual(len([r for r in self.records() if r["status"] == "ok"]), 4)
+
+    def test_submit_retries_only_rate_limits(self):
+        class RateLimited(Exception):
+            status_code = 429
+
+        backend = MagicMock()
+        backend.submit.side_effect = [RateLimited(), "batch-a", TimeoutError("read timeout")]
+        client = LLMClient(provider="openai", api_key="bulk_key")
+        client.retry_policy = RetryPolicy(base_delay=0)
+        runner = BulkRunner(client, self.checkpoint, backend=backend, poll_interval=0, max_requests=3)
+
+        # The timeout may have created the second batch, so it is not retried
+        with self.assertRaises(TimeoutError):
+            runner.submit(self.payloads, self.output)
+        self.assertEqual(backend.submit.call_count, 3)
+
+        state = json.loads(Path(self.checkpoint).read_text(encoding="utf-8"))
+        self.assertEqual([batch["id"] for batch in state["batches"]], ["batch-a"])
+        self.assertEqual(len(state["pending"]), 2)
+
+        # Rerunning submits only the pending requests
+        backend.submit.side_effect = ["batch-b"]
+        backend.status.return_value = "ended"
+        backend.results.return_value = iter([])
+        runner.run(self.payloads, self.output)
+        self.assertEqual(len(backend.submit.call_args.args[0]), 2)
+
+    def test_anthropic_message_batches(self):
+        api = LocalAnthropicBatches()
+        runner = BulkRunner(
+            LLMClient(provider="anthropic", api_key="bulk_key"),
+            self.checkpoint,
+            backend=AnthropicBatchBackend(api),
+            poll_interval=0
+        )
+        stats = runner.run(self.payloads[:2], self.output)
+
+        self.assertEqual(stats["ok"], 2)
+        params = api.requests["msgbatch-0"][0]["params"]
+        self.assertEqual(params["system"][0]["cache_control"], {"type": "ephemeral"})
+        usage = self.records()[0]["result"]["metadata"]["usage"]
+        self.assertEqual(usage["input_tokens"], 100)
+
+    def test_google_not_supported(self):
+        with self.assertRaises(ValueError):
+            BulkRunner(LLMClient(provider="google", api_key="bulk_key"), self.checkpoint)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.client_pool import get_client_pool
+
+
+def _choice(text):
+    choice = MagicMock()
+    choice.message.content = text
+    return choice
+
+
+class TestCandidates(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+
+    def test_openai_native_n(self):
+        """OpenAI candidates come from one request with n set."""
+        mock_openai = sys.modules['openai'].OpenAI.return_value
+        mock_response = MagicMock()
+        mock_response.choices = [_choice('{"lyrics": "%d"}' % i) for i in range(3)]
+        mock_openai.chat.completions.create.reset_mock()
+        mock_openai.chat.completions.create.return_value = mock_response
+        self.addCleanup(mock_openai.chat.completions.create.reset_mock)
+
+        client = LLMClient(provider="openai", api_key="n_key")
+        results = client.generate_lyrics("sys", "user", n=3)
+
+        self.assertEqual([r["lyrics"] for r in results], ["0", "1", "2"])
+        mock_openai.chat.completions.create.assert_called_once()
+        self.assertEqual(mock_openai.chat.completions.create.call_args.kwargs["n"], 3)
+
+    def test_google_candidate_count(self):
+        """Gemini candidates use candidate_count in the generation config."""
+        genai = sys.modules['google'].generativeai
+        response = MagicMock()
+        candidates = []
+        for i in range(2):
+            candidate = MagicMock()
+            candidate.content.parts[0].text = '{"lyrics": "g%d"}' % i
+            candidates.append(candidate)
+        response.candidates = candidates
+        genai.GenerativeModel.return_value.generate_content.return_value = response
+
+        client = LLMClient(provider="google", api_key="n_key")
+        results = client.generate_lyrics("sys", "user", n=2)
+
+        self.assertEqual([r["lyrics"] for r in results], ["g0", "g1"])
+        config = genai.GenerativeModel.call_args.kwargs["generation_config"]
+        self.assertEqual(config["candidate_count"], 2)
+
+    def test_anthropic_concurrent_calls(self):
+        """Anthropic has no multi-choice, so candidates are concurrent calls."""
+        mock_async = sys.modules['anthropic'].AsyncAnthropic.return_value
+        mock_response = MagicMock()
+        mock_response.content[0].text = '{"lyrics": "a"}'
+        mock_async.messages.create = AsyncMock(return_value=mock_response)
+
+        client = LLMClient(provider="anthropic", api_key="n_key")
+        results = asyncio.run(client.agenerate_lyrics("sys", "user", n=3))
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual(mock_async.messages.create.await_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+from pathlib import Path
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.client_pool import ClientPool, get_client_pool, run_async
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+
+    def test_reuses_client_for_same_key(self):
+        """Same (provider, key, base_url) returns the same client instance."""
+        pool = ClientPool()
+        factory = MagicMock(side_effect=lambda: object())
+
+        first = pool.get("openai", "k1", factory)
+        second = pool.get("openai", "k1", factory)
+        other = pool.get("openai", "k1", factory, base_url="http://localhost:9000")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(factory.call_count, 2)
+
+        stats = pool.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["live_clients"], 2)
+        self.assertNotIn("k1", str(stats))
+
+    def test_concurrent_get_builds_once(self):
+        """Concurrent first use constructs a single client."""
+        pool = ClientPool()
+        factory = MagicMock(side_effect=lambda: object())
+        threads = [
+            threading.Thread(target=pool.get, args=("anthropic", "k", factory))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(pool.stats()["hits"], 7)
+
+    def test_llm_client_draws_from_pool(self):
+        """LLMClient instances with the same key share one SDK client."""
+        first = LLMClient(provider="openai", api_key="pooled_key")
+        second = LLMClient(provider="openai", api_key="pooled_key")
+
+        self.assertIs(first.client, second.client)
+        self.assertEqual(get_client_pool().stats()["hits"], 1)
+
+    def test_async_clients_are_per_loop_and_closed(self):
+        """Each event loop gets its own async client; run_async closes it."""
+        factory = MagicMock(side_effect=lambda: MagicMock(close=AsyncMock()))
+
+        async def get_twice():
+            first = get_client_pool().get_async("openai", "k", factory)
+            self.assertIs(first, get_client_pool().get_async("openai", "k", factory))
+            return first
+
+        first = run_async(get_twice())
+        second = run_async(get_twice())
+
+        self.assertIsNot(first, second)
+        first.close.assert_awaited_once()
+        second.close.assert_awaited_once()
+        stats = get_client_pool().stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["live_clients"], stats["loop_clients"]), (0, 0, 0, 0))
+
+    def test_closed_loop_clients_are_dropped(self):
+        """Clients of a loop that ended without run_async are not reused."""
+        pool = ClientPool()
+        factory = MagicMock(side_effect=lambda: object())
+
+        async def get():
+            return pool.get_async("anthropic", "k", factory)
+
+        first = asyncio.run(get())
+        second = asyncio.run(get())
+
+        self.assertIsNot(first, second)
+        self.assertEqual(pool.stats()["loop_clients"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
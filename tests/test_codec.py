@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import ResponseParser
+from core import response_parser
+from core.codec import CODECS, load_codec
+
+
+RESPONSE = {"lyrics": {"chorus": "ñ"}, "phonetics": {}, "qa_log": {}, "metadata": {"total_lines": 1}}
+
+
+def _available():
+    codecs = []
+    for name in CODECS:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            continue
+    return codecs
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_every_installed_backend_decodes_the_same(self):
+        text = json.dumps(RESPONSE, ensure_ascii=False)
+        for codec in _available():
+            self.assertEqual(codec.loads(text), RESPONSE, codec.name)
+            with self.assertRaises(ValueError):
+                codec.loads('{"lyrics": ')
+
+    def test_auto_selection_falls_back_to_stdlib(self):
+        with patch.dict(sys.modules, {"orjson": None, "msgspec": None}):
+            self.assertEqual(load_codec().name, "json")
+        with self.assertRaises(ValueError):
+            load_codec("simdjson")
+
+
+class TestDecode(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = load_codec("json")
+        patcher = patch.object(response_parser, "get_codec", return_value=self.codec)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fenced_response_decodes_once(self):
+        result = ResponseParser.decode("```json\n" + json.dumps(RESPONSE) + "\n```")
+        self.assertEqual(result, ResponseParser.parse(RESPONSE))
+        stats = self.codec.stats()
+        self.assertEqual((stats["decodes"], stats["recovered"], stats["failed"]), (1, 0, 0))
+
+    def test_prose_wrapped_response_is_recovered(self):
+        raw = ResponseParser.decode("Here you go: " + json.dumps(RESPONSE) + " Enjoy!", normalize=False)
+        self.assertEqual(raw, RESPONSE)
+        self.assertEqual(self.codec.stats()["recovered"], 1)
+
+    def test_failed_decode_keeps_llm_client_fallback(self):
+        raw = ResponseParser.decode("no json here", normalize=False)
+        self.assertEqual(raw["metadata"], {"error": "Invalid JSON format"})
+        self.assertEqual(raw["lyrics"], "no json here")
+
+        normalized = ResponseParser.decode("no json here")
+        self.assertEqual(normalized["lyrics"], {"full_text": "no json here"})
+        self.assertEqual(self.codec.stats()["failed"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
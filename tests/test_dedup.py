@@ -0,0 +1,144 @@
+import sys
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core.batch import BATCH_KEY_PREFIX, BatchRunner
+from core.dedup import DuplicateIndex, normalize, screen_candidates, shingles
+
+
+CHORUS = """[Chorus]
+Tu perfume sigue en mi moto, bebé
+Me dejaste en visto y no sé por qué
+Bailando sola en la playa otra vez
+Y yo aquí pensando en tu piel"""
+
+VERSE = """[Verse 1]
+La noche empieza cuando apagas la luz
+Te busco en la calle, en el humo, en el bus"""
+
+OTHER_CHORUS = """[Chorus]
+Las estrellas caen sobre la ciudad
+Nadie nos ve, nadie lo sabrá
+Guárdame el secreto hasta el final
+Que mañana todo vuelve a empezar"""
+
+
+def jaccard(a, b):
+    a, b = shingles(a), shingles(b)
+    return len(a & b) / len(a | b)
+
+
+class TestDuplicateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = DuplicateIndex()
+
+    def test_normalize_ignores_tags_accents_and_punctuation(self):
+        self.assertEqual(normalize("[Chorus]\nCorazón, ¡BAILA!"), "corazon baila")
+        self.assertEqual(shingles(CHORUS), shingles(CHORUS.upper().replace("é", "e")))
+
+    def test_signature_estimates_jaccard(self):
+        edited = CHORUS.replace("moto", "carro").replace("playa", "arena")
+        # One signature's estimate has a standard error of ~0.04; average over hash seeds
+        estimates = []
+        for seed in range(1, 9):
+            index = DuplicateIndex(seed=seed)
+            same = sum(a == b for a, b in zip(index.signature(CHORUS), index.signature(edited)))
+            estimates.append(same / index.num_perm)
+        self.assertAlmostEqual(sum(estimates) / len(estimates), jaccard(CHORUS, edited), delta=0.05)
+        self.assertEqual(len(self.index.signature(CHORUS)), 128)
+        self.assertIsNone(self.index.signature("   "))
+
+    def test_query_finds_near_duplicates_only(self):
+        self.index.add_lyrics("song-1", {"verse_1": VERSE, "chorus": CHORUS})
+        self.index.add_lyrics("song-2", {"chorus": OTHER_CHORUS})
+
+        near = {"verse_1": "[Verse 1]\nOtra historia distinta", "chorus": CHORUS.replace("otra vez", "otra ves")}
+        matches = self.index.check_lyrics(near)
+        self.assertEqual([(m["key"], m["part"]) for m in matches], [("song-1", "chorus")])
+        self.assertGreater(matches[0]["similarity"], 0.8)
+
+        self.assertEqual(self.index.check_lyrics({"chorus": "Algo completamente nuevo y diferente"}), [])
+        self.assertEqual(self.index.query(CHORUS, part="song", threshold=0.95), [])
+
+    def test_remove_and_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "minhash.sqlite3")
+            index = DuplicateIndex(path=path)
+            index.add_lyrics("song-1", {"chorus": CHORUS})
+            index.add_lyrics("song-2", {"chorus": OTHER_CHORUS})
+            self.assertEqual(index.remove("song-2"), 2)
+
+            reopened = DuplicateIndex(path=path)
+            self.assertEqual(reopened.keys(), {"song-1"})
+            self.assertEqual(reopened.query(CHORUS)[0]["key"], "song-1")
+            self.assertEqual(reopened.query(OTHER_CHORUS), [])
+
+            # Different parameters make stored signatures incomparable: start over
+            self.assertEqual(len(DuplicateIndex(path=path, shingle_size=4)), 0)
+
+    def test_screen_candidates_flags_or_rejects(self):
+        self.index.add_lyrics("song-1", {"chorus": CHORUS})
+        duplicate = {"lyrics": {"chorus": CHORUS}, "metadata": {}}
+        fresh = {"lyrics": {"chorus": OTHER_CHORUS}, "metadata": {}}
+
+        kept = screen_candidates([duplicate, fresh], self.index, mode="flag")
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(duplicate["metadata"]["duplicate_of"][0]["key"], "song-1")
+        self.assertNotIn("duplicate_of", fresh["metadata"])
+
+        self.assertEqual(screen_candidates([duplicate, fresh], self.index, mode="reject"), [fresh])
+        self.assertEqual(len(screen_candidates([duplicate], self.index, mode="off")), 1)
+        with self.assertRaises(ValueError):
+            screen_candidates([duplicate], self.index, mode="drop")
+
+
+class RepeatingClient:
+    """Returns the same chorus for every payload."""
+
+    provider = "openai"
+    model = "gpt-4o"
+
+    async def agenerate_lyrics(self, system_prompt, user_prompt, temperature=0.8, max_tokens=2500):
+        return {"lyrics": {"verse_1": VERSE, "chorus": CHORUS}, "phonetics": {}, "qa_log": {}, "metadata": {}}
+
+
+class TestBatchDedup(unittest.TestCase):
+
+    def test_reject_mode_records_duplicates(self):
+        payloads = [
+            {"genre": "Reggaeton", "type": "Romantic", "vibe": "Sensual", "energy": "High",
+             "language": "Spanish", "slang_density": "Medium", "keywords": [f"k{i}"]}
+            for i in range(3)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            output = str(Path(tmp) / "results.jsonl")
+            index = DuplicateIndex()
+            runner = BatchRunner(RepeatingClient(), concurrency=1, progress=None, dedup=index, dedup_mode="reject")
+            summary = asyncio.run(runner.run(payloads, output))
+            statuses = [json.loads(line)["status"] for line in open(output, encoding="utf-8")]
+
+            # Duplicates are final: a resumed run regenerates nothing
+            resumed = BatchRunner(RepeatingClient(), concurrency=1, progress=None, dedup=index, dedup_mode="reject")
+            self.assertEqual(asyncio.run(resumed.run(payloads, output))["skipped"], 3)
+
+        self.assertEqual((summary["ok"], summary["duplicate"]), (1, 2))
+        self.assertEqual(statuses.count("duplicate"), 2)
+        self.assertTrue(all(key.startswith(BATCH_KEY_PREFIX) for key in index.keys()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -79,6 +79,29 @@ class TestKAIRAGeneration(unittest.TestCase):
         self.assertEqual(client.provider, "anthropic")
         self.assertEqual(client.model, "claude-3-5-sonnet-20240620")
 
+    def test_llm_client_anthropic_prompt_cache(self):
+        """Test Anthropic system prompt cache breakpoint and cached token usage."""
+        mock_anthropic = sys.modules['anthropic'].Anthropic.return_value
+        mock_response = MagicMock()
+        mock_response.content[0].text = '{"lyrics": "test"}'
+        mock_response.usage = MagicMock(
+            input_tokens=50,
+            output_tokens=400,
+            cache_read_input_tokens=2000,
+            cache_creation_input_tokens=0
+        )
+        mock_anthropic.messages.create.return_value = mock_response
+        
+        client = LLMClient(provider="anthropic", api_key="cache_test_key")
+        result = client.generate_lyrics("sys", "user")
+        
+        system = mock_anthropic.messages.create.call_args.kwargs["system"]
+        self.assertEqual(system[0]["cache_control"], {"type": "ephemeral"})
+        usage = result["metadata"]["usage"]
+        self.assertEqual(usage["input_tokens"], 2050)
+        self.assertEqual(usage["cached_input_tokens"], 2000)
+        self.assertEqual(usage["uncached_input_tokens"], 50)
+
     def test_llm_client_google(self):
         """Test Google client initialization."""
         mock_genai = sys.modules['google.generativeai']
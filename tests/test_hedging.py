@@ -0,0 +1,117 @@
+import sys
+from pathlib import Path
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import HedgedClient, get_hedged_client, hedging_stats
+from core import hedging
+
+
+VALID = {"lyrics": {"verse_1": "a", "chorus": "b"}, "phonetics": {}, "qa_log": {}, "metadata": {}}
+
+
+class FakeClient:
+    """Stand-in for LLMClient with a fixed latency and response."""
+
+    def __init__(self, name, delay, response=None, error=None):
+        self.provider = name
+        self.model = "fake"
+        self.delay = delay
+        self.response = response
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def agenerate_lyrics(self, *args, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return {**self.response, "metadata": {}}
+
+
+class TestHedgedClient(unittest.TestCase):
+
+    def test_fast_primary_never_hedges(self):
+        primary = FakeClient("primary", 0.01, VALID)
+        backup = FakeClient("backup", 0.01, VALID)
+        hedged = HedgedClient(primary, [backup], hedge_delay=0.2)
+
+        result = hedged.generate_lyrics("sys", "user")
+
+        self.assertEqual(result["metadata"]["hedge"]["winner"], "primary:fake")
+        self.assertEqual(backup.calls, 0)
+        self.assertEqual(hedged.stats()["primary_wins"], 1)
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        primary = FakeClient("primary", 5, VALID)
+        backup = FakeClient("backup", 0.01, VALID)
+        hedged = HedgedClient(primary, [backup], hedge_delay=0.05)
+
+        result = hedged.generate_lyrics("sys", "user")
+
+        self.assertEqual(result["metadata"]["hedge"]["winner"], "backup:fake")
+        self.assertTrue(primary.cancelled)
+        stats = hedged.stats()
+        self.assertEqual(stats["hedges_fired"], 1)
+        self.assertEqual(stats["hedge_win_rate"], 1.0)
+
+    def test_invalid_primary_falls_through_to_backup(self):
+        primary = FakeClient("primary", 0.01, {"lyrics": {}})
+        backup = FakeClient("backup", 0.01, VALID)
+        hedged = HedgedClient(primary, [backup], hedge_delay=1)
+
+        result = hedged.generate_lyrics("sys", "user")
+
+        self.assertEqual(result["metadata"]["hedge"]["winner"], "backup:fake")
+
+    def test_per_request_budget_disables_hedging(self):
+        primary = FakeClient("primary", 0.01, error=Exception("boom"))
+        backup = FakeClient("backup", 0.01, VALID)
+        hedged = HedgedClient(primary, [backup], hedge_delay=0.01)
+
+        with self.assertRaises(Exception):
+            hedged.generate_lyrics("sys", "user", max_hedges=0)
+        self.assertEqual(backup.calls, 0)
+
+
+class TestSharedHedgedClient(unittest.TestCase):
+
+    def setUp(self):
+        hedging._hedged_clients.clear()
+        self.addCleanup(hedging._hedged_clients.clear)
+
+    def test_budget_and_stats_span_requests(self):
+        # Every request's primary fails; with a per-request client each would hedge
+        for _ in range(4):
+            primary = FakeClient("primary", 0.01, error=Exception("boom"))
+            backup = FakeClient("backup", 0.01, VALID)
+            hedged = get_hedged_client(primary, [backup], hedge_delay=0.01, budget_ratio=0.25)
+            try:
+                hedged.generate_lyrics("sys", "user", accept=lambda r: True)
+            except Exception:
+                pass
+
+        self.assertIs(get_hedged_client(primary, [backup]), hedged)
+        # Budget: 0.25 * 4 requests + 1 = 2 hedges fleet-wide
+        stats = hedging_stats()["primary:fake -> backup:fake"]
+        self.assertEqual((stats["requests"], stats["hedges_fired"], stats["hedges_denied"]), (4, 2, 2))
+        self.assertEqual(stats["hedge_wins"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import IncrementalParser, ResponseParser
+
+
+RESPONSE = {
+    "lyrics": {
+        "verse_1": "Me dejaste en visto\nA las \"3 AM\"\\ otra vez",
+        "chorus": "Baila conmigo 🎧\nno pares",
+        "verse_2": "Uber, hoodie, batería baja"
+    },
+    "phonetics": {
+        "difficult_phrases": [
+            {"phrase": "te hablo", "phonetic": "tea-blo", "note": "sinalefa"},
+            {"phrase": "pa' ti", "phonetic": "pa-ti", "stress": [1, 2.5, True, None]}
+        ],
+        "rhythm_notes": "short-long"
+    },
+    "qa_log": {
+        "creative_choices": "late night scenes",
+        "slang_used": ["visto", "flow"]
+    },
+    "metadata": {"total_lines": 32, "slang_density": -1.5e1}
+}
+
+
+def _feed(text, size):
+    parser = IncrementalParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+
+class TestIncrementalParser(unittest.TestCase):
+
+    def test_matches_batch_parser_for_any_chunking(self):
+        text = json.dumps(RESPONSE, ensure_ascii=False, indent=2)
+        expected = ResponseParser.parse(text)
+        for size in (1, 2, 5, 17, 256, len(text)):
+            parser, _ = _feed(text, size)
+            self.assertEqual(parser.close(), expected, f"chunk size {size}")
+
+    def test_events_in_stream_order(self):
+        parser, events = _feed(json.dumps(RESPONSE, ensure_ascii=False), 3)
+
+        self.assertEqual(
+            [(e["type"], e.get("section", e.get("index", e.get("field")))) for e in events],
+            [
+                ("lyrics", "verse_1"), ("lyrics", "chorus"), ("lyrics", "verse_2"),
+                ("phrase", 0), ("phrase", 1),
+                ("qa_log", "creative_choices"), ("qa_log", "slang_used")
+            ]
+        )
+        self.assertEqual(events[0]["text"], RESPONSE["lyrics"]["verse_1"])
+        self.assertEqual(events[4]["value"], RESPONSE["phonetics"]["difficult_phrases"][1])
+
+    def test_section_event_fires_on_closing_quote(self):
+        parser = IncrementalParser()
+        self.assertEqual(parser.feed('{"lyrics": {"chorus": "la la'), [])
+        events = parser.feed('"')
+        self.assertEqual(events, [{"type": "lyrics", "section": "chorus", "text": "la la"}])
+
+    def test_tolerates_markdown_fences(self):
+        text = "```json\n" + json.dumps(RESPONSE) + "\n```"
+        parser, events = _feed(text, 7)
+        self.assertEqual(len(events), 7)
+        self.assertEqual(parser.close(), ResponseParser.parse(RESPONSE))
+
+    def test_truncated_stream_falls_back_like_batch_parser(self):
+        text = json.dumps(RESPONSE)[:60]
+        parser, _ = _feed(text, 10)
+        self.assertEqual(parser.close(), ResponseParser.parse(text))
+
+    def test_prose_wrapped_output_matches_batch_parser(self):
+        """A small leading object in the preamble does not win over the response."""
+        text = 'Settings used: {"temperature": 0.8}\nHere are your lyrics:\n' + json.dumps(RESPONSE) + "\nEnjoy!"
+        parser, _ = _feed(text, 9)
+        self.assertEqual(parser.close(), ResponseParser.parse(text))
+        self.assertEqual(parser.close()["lyrics"], RESPONSE["lyrics"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+import subprocess
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+import config
+import core
+import utils
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_every_export_resolves(self):
+        for package in (core, utils, config):
+            for name in package.__all__:
+                self.assertIsNotNone(getattr(package, name), f"{package.__name__}.{name}")
+            self.assertIn("__all__", dir(package))
+            with self.assertRaises(AttributeError):
+                getattr(package, "missing_name")
+
+    def test_import_does_not_load_provider_sdks(self):
+        # Fresh interpreter: this process already has the SDK mocks installed
+        code = (
+            "import sys, core, utils, config\n"
+            "from core import LLMClient, PromptBuilder\n"
+            "from config import GENRES\n"
+            "loaded = [m for m in ('openai', 'anthropic', 'google.generativeai', 'core.gpt_client') if m in sys.modules]\n"
+            "print(','.join(loaded))\n"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import sys
+from pathlib import Path
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient, ledger as ledger_module, llm_client
+from core.client_pool import ClientPool
+from core.ledger import UsageLedger, price_for, usage_context
+from core.response_cache import ResponseCache
+from utils import payload_hash
+
+
+RESPONSE = '{"lyrics": {"verse_1": "a", "chorus": "b"}, "phonetics": {}, "qa_log": {}, "metadata": {}}'
+
+PAYLOAD = {
+    "genre": "Reggaeton",
+    "lyrics_part": "Full Song",
+    "length": "Long",
+    "language": "Spanish",
+    "include_phonetics": True,
+    "include_chanteo": False,
+    "include_bridge": True
+}
+
+
+def usage(input_tokens, output_tokens, cached_input_tokens=0):
+    return {"input_tokens": input_tokens, "cached_input_tokens": cached_input_tokens, "output_tokens": output_tokens}
+
+
+class TestUsageLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.ledger = UsageLedger(str(Path(self.tmp.name) / "ledger.sqlite3"))
+        self.addCleanup(self.ledger.close)
+
+    def test_prices_match_longest_model_prefix(self):
+        self.assertEqual(price_for("gpt-4o-mini"), (0.15, 0.075, 0.60))
+        self.assertEqual(price_for("gpt-4o-2024-08-06"), price_for("gpt-4o"))
+        self.assertEqual(price_for("gemini-1.5-pro-002"), price_for("gemini-1.5-pro"))
+        self.assertIsNone(price_for("unknown-model"))
+
+    def test_cost_and_aggregates_by_payload_attribute(self):
+        with usage_context(PAYLOAD, source="app"):
+            # 1M uncached input + 1M cached input + 1M output at gpt-4o prices
+            self.ledger.record("openai", "gpt-4o", usage(2_000_000, 1_000_000, 1_000_000), 2.0)
+            self.ledger.record("openai", "gpt-4o", None, 0.01, cache_hit=True)
+        self.ledger.record("anthropic", "claude-3-5-haiku-20241022", usage(1000, 500), 1.0,
+                           payload=dict(PAYLOAD, include_phonetics=False, genre="Bachata"), source="batch")
+        self.ledger.record("openai", "mystery-model", usage(10, 10), 0.5, status="error")
+
+        total = self.ledger.aggregate(by=())
+        self.assertEqual(total[0]["calls"], 4)
+        self.assertEqual(total[0]["errors"], 1)
+        self.assertEqual(total[0]["cache_hits"], 1)
+
+        by_model = {row["model"]: row for row in self.ledger.aggregate(by="model")}
+        self.assertAlmostEqual(by_model["gpt-4o"]["cost_usd"], 2.50 + 1.25 + 10.00)
+        self.assertEqual(by_model["gpt-4o"]["calls"], 2)
+        self.assertEqual(by_model["mystery-model"]["cost_usd"], 0.0)
+
+        by_flag = {row["include_phonetics"]: row for row in self.ledger.aggregate(by="include_phonetics")}
+        self.assertEqual(by_flag[1]["output_tokens"], 1_000_000)
+        self.assertEqual(by_flag[0]["input_tokens"], 1000)
+
+        bachata = self.ledger.aggregate(by=("genre", "source"), genre="Bachata")
+        self.assertEqual([(r["genre"], r["source"]) for r in bachata], [("Bachata", "batch")])
+        self.assertEqual(self.ledger.aggregate(by="day", since="2999-01-01"), [])
+        # Rows carry the same payload hash as batch/bulk output records
+        self.assertEqual(self.ledger.aggregate(by=(), payload_hash=payload_hash(PAYLOAD))[0]["calls"], 2)
+        self.assertEqual(self.ledger.stats()["unpriced"], 1)
+
+    def test_rows_are_append_only_and_columns_validated(self):
+        self.ledger.record("openai", "gpt-4o", usage(1, 1), 0.1)
+        with self.assertRaises(sqlite3.DatabaseError):
+            self.ledger._db.execute("DELETE FROM usage")
+        with self.assertRaises(ValueError):
+            self.ledger.aggregate(by="model; DROP TABLE usage")
+        with self.assertRaises(ValueError):
+            self.ledger.aggregate(by="model", prompt="x")
+    def test_shared_ledger_defaults_on_with_opt_out(self):
+        with patch.object(ledger_module, "_default_ledger", None), \
+                patch.object(ledger_module, "DEFAULT_LEDGER_PATH", str(Path(self.tmp.name) / "default.sqlite3")):
+            with patch.dict(os.environ, {"KAIRA_LEDGER_PATH": ""}):
+                shared = ledger_module.get_ledger()
+                self.addCleanup(shared.close)
+                self.assertEqual(shared.path, ledger_module.DEFAULT_LEDGER_PATH)
+            with patch.dict(os.environ, {"KAIRA_LEDGER_PATH": "off"}):
+                self.assertIsNone(ledger_module.get_ledger())
+
+
+class TestClientLedger(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(llm_client, "get_client_pool", return_value=ClientPool())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ledger = UsageLedger(":memory:")
+        self.addCleanup(self.ledger.close)
+
+    def test_generate_translate_and_cache_hits_are_recorded(self):
+        client = LLMClient(provider="openai", api_key="k", cache=ResponseCache("system"), ledger=self.ledger)
+        completion = MagicMock()
+        completion.choices[0].message.content = RESPONSE
+        completion.usage.prompt_tokens = 1200
+        completion.usage.completion_tokens = 300
+        completion.usage.prompt_tokens_details.cached_tokens = 1000
+        client.client.chat.completions.create.return_value = completion
+
+        with usage_context(PAYLOAD, source="app"):
+            client.generate_lyrics("system", "user")
+            client.generate_lyrics("system", "user")
+            client.translate_text("hola")
+
+        rows = {(r["kind"], r["cache_hit"]): r for r in self.ledger.aggregate(by=("kind", "cache_hit", "genre"))}
+        lyrics = rows[("lyrics", 0)]
+        self.assertEqual((lyrics["calls"], lyrics["input_tokens"], lyrics["cached_input_tokens"]), (1, 1200, 1000))
+        self.assertEqual(lyrics["genre"], "Reggaeton")
+        self.assertEqual(rows[("lyrics", 1)]["output_tokens"], 0)
+        self.assertEqual(rows[("translation", 0)]["output_tokens"], 300)
+
+    def test_failed_request_is_recorded_as_error(self):
+        client = LLMClient(provider="openai", api_key="k", ledger=self.ledger)
+        client.client = MagicMock()
+        client.retry_policy = MagicMock(call=lambda attempt: attempt())
+        client.client.chat.completions.create.side_effect = RuntimeError("boom")
+
+        with self.assertRaises(Exception):
+            client.generate_lyrics("system", "user")
+        row = self.ledger.aggregate(by="status")[0]
+        self.assertEqual((row["status"], row["calls"]), ("error", 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import sys
+from pathlib import Path
+import http.client
+import json
+import os
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient, llm_client
+from core.client_pool import ClientPool
+from core.mock_provider import CANNED_RESPONSE, MockProvider
+
+
+def sse_data(body):
+    """JSON payloads of the data: lines of an SSE body."""
+    events = []
+    for line in body.decode("utf-8").splitlines():
+        if line.startswith("data: ") and line != "data: [DONE]":
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+class TestMockProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.provider = MockProvider(ttft=0.05, tokens_per_second=5000, seed=1).start()
+        self.addCleanup(self.provider.stop)
+        host, port = self.provider.server.server_address[:2]
+        self.conn = http.client.HTTPConnection(host, port, timeout=10)
+        self.addCleanup(self.conn.close)
+
+    def post(self, path, body):
+        self.conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json"})
+        response = self.conn.getresponse()
+        return response, response.read()
+
+    def test_openai_completion_and_stream(self):
+        started = time.monotonic()
+        response, body = self.post("/v1/chat/completions", {"model": "gpt-4o", "messages": [{"role": "user", "content": "hola"}], "n": 2})
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        data = json.loads(body)
+        self.assertEqual(len(data["choices"]), 2)
+        self.assertEqual(json.loads(data["choices"][0]["message"]["content"]), CANNED_RESPONSE)
+        self.assertGreater(data["usage"]["completion_tokens"], 0)
+
+        # Same connection: the stream is chunked, so keep-alive survives it
+        response, body = self.post("/v1/chat/completions", {"messages": [], "stream": True, "stream_options": {"include_usage": True}})
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream")
+        events = sse_data(body)
+        text = "".join(e["choices"][0]["delta"].get("content", "") for e in events if e["choices"])
+        self.assertEqual(json.loads(text), CANNED_RESPONSE)
+        self.assertIn("usage", events[-1])
+        self.assertTrue(body.endswith(b"data: [DONE]\n\n"))
+
+    def test_anthropic_stream_events(self):
+        response, body = self.post("/v1/messages", {"model": "claude", "messages": [{"role": "user", "content": "hola"}], "stream": True})
+        events = sse_data(body)
+        self.assertEqual(events[0]["type"], "message_start")
+        self.assertEqual(events[-1]["type"], "message_stop")
+        text = "".join(e["delta"]["text"] for e in events if e["type"] == "content_block_delta")
+        self.assertEqual(json.loads(text), CANNED_RESPONSE)
+
+    def test_google_generate_and_stream(self):
+        response, body = self.post("/v1beta/models/gemini-1.5-pro:generateContent", {"contents": [{"parts": [{"text": "hola"}]}]})
+        data = json.loads(body)
+        self.assertEqual(json.loads(data["candidates"][0]["content"]["parts"][0]["text"]), CANNED_RESPONSE)
+
+        response, body = self.post("/v1beta/models/gemini-1.5-pro:streamGenerateContent?alt=sse", {"contents": []})
+        events = sse_data(body)
+        text = "".join(e["candidates"][0]["content"]["parts"][0]["text"] for e in events)
+        self.assertEqual(json.loads(text), CANNED_RESPONSE)
+        self.assertEqual(events[-1]["candidates"][0]["finishReason"], "STOP")
+
+    def test_injected_errors_and_stats(self):
+        self.provider.inject(429)
+        self.provider.inject(500)
+        response, body = self.post("/v1/messages", {"messages": []})
+        self.assertEqual(response.status, 429)
+        self.assertEqual(response.getheader("Retry-After"), "1")
+        self.assertEqual(json.loads(body)["error"]["type"], "rate_limit_error")
+
+        response, body = self.post("/v1/chat/completions", {"messages": []})
+        self.assertEqual(response.status, 500)
+        response, body = self.post("/v1/chat/completions", {"messages": []})
+        self.assertEqual(response.status, 200)
+
+        stats = self.provider.stats()
+        self.assertEqual((stats["requests"], stats["rate_limited"], stats["errors"]), (3, 1, 1))
+        self.assertEqual(stats["providers"], {"anthropic": 1, "openai": 2})
+        self.assertEqual(stats["in_flight"], 0)
+
+        with self.assertRaises(ValueError):
+            self.provider.inject(418)
+
+
+class TestClientBaseUrl(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(llm_client, "get_client_pool", return_value=ClientPool())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_base_url_from_environment(self):
+        with patch.dict(os.environ, {"OPENAI_BASE_URL": "http://127.0.0.1:8765/v1"}):
+            client = LLMClient(provider="openai", api_key="k")
+        self.assertEqual(client.base_url, "http://127.0.0.1:8765/v1")
+        self.assertEqual(LLMClient(provider="openai", api_key="k", base_url="http://x/v1").base_url, "http://x/v1")
+
+    def test_google_endpoint_uses_rest_transport(self):
+        with patch.object(llm_client, "_genai_active_config", None):
+            genai = LLMClient(provider="google", api_key="k", base_url="http://127.0.0.1:8765").client
+            genai.configure.reset_mock()
+            llm_client._genai_active_config = None
+            LLMClient(provider="google", api_key="k", base_url="http://127.0.0.1:8765")
+            LLMClient(provider="google", api_key="k", base_url="http://127.0.0.1:8765")
+        genai.configure.assert_called_once_with(
+            api_key="k", transport="rest", client_options={"api_endpoint": "http://127.0.0.1:8765"}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core.rate_limiter import RateLimiter, TokenBucket, estimate_tokens
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_bucket_queues_in_arrival_order(self):
+        """Each reservation past capacity waits longer than the one before it."""
+        bucket = TokenBucket(per_minute=60)  # one unit per second
+        waits = [bucket.reserve(30, now=bucket.updated) for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0.0, 0.0])
+        self.assertAlmostEqual(waits[2], 30.0)
+        self.assertAlmostEqual(waits[3], 60.0)
+
+    def test_rpm_and_tpm_buckets(self):
+        """The slower of the RPM and TPM buckets decides the wait."""
+        limiter = RateLimiter({"openai": {"rpm": 2, "tpm": 100000}, "openai:tiny": {"tpm": 600}})
+
+        self.assertEqual(limiter.reserve("openai", "gpt-4o", 10).wait, 0.0)
+        self.assertEqual(limiter.reserve("openai", "gpt-4o", 10).wait, 0.0)
+        self.assertAlmostEqual(limiter.reserve("openai", "gpt-4o", 10).wait, 30.0, places=1)
+
+        self.assertEqual(limiter.reserve("openai", "tiny", 600).wait, 0.0)
+        self.assertAlmostEqual(limiter.reserve("openai", "tiny", 300).wait, 30.0, places=1)
+        self.assertEqual(limiter.stats()["throttled"], 2)
+
+    def test_reconcile_refunds_overestimate(self):
+        """Reported usage below the estimate is returned to the bucket."""
+        limiter = RateLimiter({"anthropic": {"tpm": 1000}})
+        reservation = limiter.reserve("anthropic", "claude", 900)
+        limiter.reconcile(reservation, 300)
+
+        self.assertEqual(limiter.reserve("anthropic", "claude", 650).wait, 0.0)
+
+    def test_refund_and_wait_time(self):
+        """A failed request's tokens are returned; wait_time peeks without reserving."""
+        limiter = RateLimiter({"openai": {"tpm": 600}})
+        reservation = limiter.reserve("openai", "gpt-4o", 600)
+        self.assertAlmostEqual(limiter.wait_time("openai", "gpt-4o", 300), 30.0, places=1)
+        self.assertAlmostEqual(limiter.wait_time("openai", "gpt-4o", 300), 30.0, places=1)
+
+        limiter.refund(reservation)
+        self.assertEqual(limiter.wait_time("openai", "gpt-4o", 600), 0.0)
+        self.assertEqual(limiter.stats()["refunded_tokens"], 600)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 1)
+        self.assertEqual(estimate_tokens("a" * 400), 101)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.client_pool import get_client_pool
+from core.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_memory_lru_and_ttl(self):
+        """Memory tier evicts least recently used entries and honors TTL."""
+        cache = ResponseCache("sys", max_entries=2, ttl_seconds=60)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"v": 1})
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        expiring = ResponseCache("sys", ttl_seconds=0.01)
+        expiring.set("k", "v")
+        time.sleep(0.02)
+        self.assertIsNone(expiring.get("k"))
+
+    def test_disk_tier_versioned_on_system_prompt(self):
+        """Disk entries survive restarts but not a system prompt change."""
+        ResponseCache("dna v1", disk_path=self.db_path).set("k", {"lyrics": "x"})
+
+        reopened = ResponseCache("dna v1", disk_path=self.db_path)
+        self.assertEqual(reopened.get("k"), {"lyrics": "x"})
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+
+        changed = ResponseCache("dna v2", disk_path=self.db_path)
+        self.assertIsNone(changed.get("k"))
+        self.assertEqual(changed.stats()["disk_entries"], 0)
+
+    def test_disk_size_eviction(self):
+        """Disk tier is trimmed to max_disk_entries."""
+        cache = ResponseCache("sys", disk_path=self.db_path, max_disk_entries=3)
+        for i in range(5):
+            cache.set(f"k{i}", i)
+        self.assertEqual(cache.stats()["disk_entries"], 3)
+
+    def test_llm_client_uses_cache(self):
+        """Identical requests hit the cache; use_cache=False bypasses it."""
+        mock_openai = sys.modules['openai'].OpenAI.return_value
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = '{"lyrics": "cached"}'
+        mock_openai.chat.completions.create.reset_mock()
+        mock_openai.chat.completions.create.return_value = mock_response
+
+        client = LLMClient(provider="openai", api_key="cache_key", cache=ResponseCache("sys"))
+        first = client.generate_lyrics("sys", "user")
+        second = client.generate_lyrics("sys", "user")
+        client.generate_lyrics("sys", "user", use_cache=False)
+
+        self.assertEqual(first["lyrics"], second["lyrics"])
+        self.assertTrue(second["metadata"]["cache_hit"])
+        self.assertEqual(second["metadata"]["usage"]["total_tokens"], 0)
+        self.assertEqual(mock_openai.chat.completions.create.call_count, 2)
+        self.assertEqual(client.cache.stats()["memory_hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
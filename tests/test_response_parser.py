@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import ResponseParser
+
+
+RESPONSE = {
+    "lyrics": {"verse_1": "a } { \" b", "chorus": "c"},
+    "phonetics": {"difficult_phrases": [{"phrase": "te hablo", "phonetic": "tea-blo"}]},
+    "qa_log": {"creative_choices": "x"},
+    "metadata": {"total_lines": 2}
+}
+
+
+class TestExtractFromText(unittest.TestCase):
+
+    def test_recovers_deeply_nested_response_from_prose(self):
+        text = 'Sure! Here {is} the song {"draft": 1}:\n' + json.dumps(RESPONSE) + "\nEnjoy {it}!"
+        self.assertEqual(ResponseParser.parse(text), ResponseParser.parse(RESPONSE))
+
+    def test_largest_object_wins(self):
+        text = '{"lyrics": "small"} and then ' + json.dumps(RESPONSE)
+        self.assertEqual(ResponseParser.parse(text)["lyrics"], RESPONSE["lyrics"])
+
+    def test_truncated_outer_object_keeps_complete_children(self):
+        text = '{"wrapper": ' + json.dumps(RESPONSE) + ', "tail": "cut of'
+        self.assertEqual(ResponseParser.parse(text)["lyrics"], RESPONSE["lyrics"])
+
+    def test_plain_text_fallback(self):
+        result = ResponseParser.parse("just some lyrics {with braces}")
+        self.assertEqual(result["metadata"], {"format": "plain_text"})
+        self.assertEqual(result["lyrics"]["full_text"], "just some lyrics {with braces}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.client_pool import get_client_pool
+from core.retry import MalformedResponseError, RetryPolicy
+
+
+class StatusError(Exception):
+    """Mimics an SDK APIStatusError."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = MagicMock(headers=headers or {})
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_classify(self):
+        self.assertEqual(RetryPolicy.classify(StatusError(429)), "rate_limit")
+        self.assertEqual(RetryPolicy.classify(StatusError(503)), "server_error")
+        self.assertEqual(RetryPolicy.classify(TimeoutError()), "timeout")
+        self.assertEqual(RetryPolicy.classify(MalformedResponseError({})), "malformed_json")
+        self.assertIsNone(RetryPolicy.classify(StatusError(400)))
+        self.assertIsNone(RetryPolicy.classify(ValueError("bad key")))
+
+    def test_retry_after_headers(self):
+        self.assertEqual(RetryPolicy.retry_after(StatusError(429, {"retry-after": "7"})), 7.0)
+        self.assertEqual(RetryPolicy.retry_after(StatusError(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertEqual(RetryPolicy.retry_after(StatusError(429, {"x-ratelimit-reset-requests": "1m30s"})), 90.0)
+
+    def test_backoff_honors_retry_after_and_deadline(self):
+        policy = RetryPolicy(max_attempts=5, base_delay=0.01, deadline=10)
+        self.assertEqual(policy.next_delay(StatusError(429, {"retry-after": "3"}), 1, started=time.monotonic()), 3.0)
+        self.assertIsNone(policy.next_delay(StatusError(429, {"retry-after": "60"}), 1, started=time.monotonic()))
+        self.assertIsNone(policy.next_delay(StatusError(400), 1, started=time.monotonic()))
+
+    @patch("core.retry.time.sleep")
+    def test_call_retries_then_succeeds(self, sleep):
+        policy = RetryPolicy(max_attempts=3)
+        fn = MagicMock(side_effect=[StatusError(500), StatusError(429), "ok"])
+
+        self.assertEqual(policy.call(fn), "ok")
+        self.assertEqual(fn.call_count, 3)
+        stats = policy.stats()
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["retries_by_reason"], {"server_error": 1, "rate_limit": 1})
+
+    @patch("core.retry.time.sleep")
+    def test_call_max_attempts_override(self, sleep):
+        policy = RetryPolicy(max_attempts=5)
+        fn = MagicMock(side_effect=[StatusError(500), StatusError(500), "ok"])
+
+        with self.assertRaises(StatusError):
+            policy.call(fn, max_attempts=2)
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual((policy.stats()["retries"], policy.stats()["give_ups"]), (1, 1))
+
+    @patch("core.retry.time.sleep")
+    def test_llm_client_retries_malformed_json_without_growing_prompt(self, sleep):
+        get_client_pool().clear()
+        mock_openai = sys.modules['openai'].OpenAI.return_value
+        bad, good = MagicMock(), MagicMock()
+        bad.choices[0].message.content = "not json"
+        good.choices[0].message.content = '{"lyrics": "ok"}'
+        mock_openai.chat.completions.create.reset_mock()
+        mock_openai.chat.completions.create.side_effect = [bad, good]
+
+        client = LLMClient(provider="openai", api_key="retry_key", retry_policy=RetryPolicy())
+        result = client.generate_lyrics("sys", "user")
+        mock_openai.chat.completions.create.side_effect = None
+
+        self.assertEqual(result["lyrics"], "ok")
+        calls = mock_openai.chat.completions.create.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0].kwargs["messages"], calls[1].kwargs["messages"])
+
+    def test_llm_client_rate_limiter_opt_out(self):
+        get_client_pool().clear()
+        self.assertIsNone(LLMClient(provider="openai", api_key="k", rate_limiter=False).rate_limiter)
+        self.assertIsNotNone(LLMClient(provider="openai", api_key="k").rate_limiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
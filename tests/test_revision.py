@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import RevisionEngine, apply_edits
+
+
+LYRICS = {
+    "verse_1": "v1\nv2\nv3",
+    "chorus": "c1\nc2",
+    "verse_2": "w1\nw2",
+    "pre_chorus": "p1",
+    "chorus_repeat": "c1\nc2"
+}
+
+PAYLOAD = {"genre": "Reggaeton", "type": "Romantic", "vibe": "Sensual", "lyrics_part": "Full Song"}
+
+
+class FakeRevisionClient:
+
+    def __init__(self, response):
+        self.response = response
+        self.prompts = []
+
+    async def agenerate_lyrics(self, system_prompt, user_prompt, temperature=0.8, max_tokens=2500):
+        self.prompts.append(user_prompt)
+        return self.response
+
+
+class TestApplyEdits(unittest.TestCase):
+
+    def test_edits_refer_to_original_lines(self):
+        edits = [
+            {"op": "delete", "section": "verse_1", "line": 1},
+            {"op": "replace", "section": "verse_1", "line": 3, "text": "V3"},
+            {"op": "insert_after", "section": "verse_1", "line": 0, "text": "opening"},
+            {"op": "insert_after", "section": "verse_1", "line": 2, "text": "v2b"}
+        ]
+        revised, applied, rejected = apply_edits(LYRICS, edits)
+
+        self.assertEqual(revised["verse_1"], "opening\nv2\nv2b\nV3")
+        self.assertEqual(len(applied), 4)
+        self.assertEqual(rejected, [])
+        self.assertEqual(LYRICS["verse_1"], "v1\nv2\nv3")  # input untouched
+
+    def test_invalid_edits_are_rejected(self):
+        edits = [
+            {"op": "replace", "section": "verse_1", "line": 9, "text": "x"},
+            {"op": "replace", "section": "chorus", "line": 1, "text": "x"},
+            {"op": "rewrite", "section": "verse_1", "line": 1},
+            {"op": "replace", "section": "verse_1", "line": 1}
+        ]
+        revised, applied, rejected = apply_edits(LYRICS, edits, scope=["verse_1"])
+
+        self.assertEqual(revised, LYRICS)
+        self.assertEqual(applied, [])
+        self.assertEqual(len(rejected), 4)
+
+
+class TestRevisionEngine(unittest.TestCase):
+
+    def test_only_scoped_sections_are_sent(self):
+        client = FakeRevisionClient({
+            "edits": [{"op": "replace", "section": "verse_2", "line": 2, "text": "new w2"}],
+            "notes": "sharper image",
+            "metadata": {"usage": {"output_tokens": 30}}
+        })
+        result = RevisionEngine(client).revise(LYRICS, PAYLOAD, "sharpen verse 2", sections=["verse_2"])
+
+        self.assertEqual(result["lyrics"]["verse_2"], "w1\nnew w2")
+        self.assertEqual(result["lyrics"]["chorus"], LYRICS["chorus"])
+        self.assertEqual(result["usage"], {"output_tokens": 30})
+        self.assertIn("2| w2", client.prompts[0])
+        self.assertNotIn("[chorus]", client.prompts[0])
+
+    def test_structure_breaking_patch_is_rejected(self):
+        client = FakeRevisionClient({"edits": [{"op": "delete", "section": "pre_chorus", "line": 1}]})
+        with self.assertRaises(ValueError):
+            RevisionEngine(client).revise(LYRICS, PAYLOAD, "drop the pre-chorus")
+
+    def test_missing_edit_list_raises(self):
+        client = FakeRevisionClient({"lyrics": "whole new song", "metadata": {}})
+        with self.assertRaises(Exception):
+            RevisionEngine(client).revise(LYRICS, PAYLOAD, "anything")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import sys
+from pathlib import Path
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import PromptBuilder, ResponseParser, SectionEngine
+from core.token_budget import song_sections
+from config import DEFAULT_STRUCTURE
+
+
+PAYLOAD = {
+    "genre": "Reggaeton",
+    "type": "Romantic",
+    "vibe": "Sensual",
+    "energy": "High",
+    "language": "Spanish",
+    "slang_density": "Medium",
+    "include_bridge": True,
+    "structure_override": DEFAULT_STRUCTURE,
+    "lyrics_part": "Full Song"
+}
+
+
+class FakeSectionClient:
+    """Answers chorus/bible and section prompts, each after a fixed delay."""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.prompts = []
+        self.max_tokens = []
+
+    async def agenerate_lyrics(self, system_prompt, user_prompt, temperature=0.8, max_tokens=2500):
+        self.prompts.append(user_prompt)
+        self.max_tokens.append(max_tokens)
+        await asyncio.sleep(self.delay)
+        usage = {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120}
+        if "CHORUS + SONG BIBLE" in user_prompt:
+            return {
+                "lyrics": {"chorus": "hook line\necho line"},
+                "song_bible": {"hook": "hook line", "story": "3 AM, left on read"},
+                "phonetics": {"difficult_phrases": [{"phrase": "te hablo"}]},
+                "metadata": {"usage": usage}
+            }
+        section = user_prompt.split("🎵 TASK: ")[1].split("\n")[0].lower()
+        return {"lyrics": {section: f"{section} text"}, "metadata": {"usage": usage}}
+
+
+class TestSectionEngine(unittest.TestCase):
+
+    def test_sections_run_in_parallel(self):
+        client = FakeSectionClient(delay=0.1)
+        started = time.monotonic()
+        result = SectionEngine(client).generate(PAYLOAD)
+        elapsed = time.monotonic() - started
+
+        # chorus round + one parallel round, not 1 + 4 sequential calls
+        self.assertLess(elapsed, 0.35)
+        self.assertEqual(len(client.prompts), 5)
+
+        lyrics = result["lyrics"]
+        self.assertEqual(list(lyrics), ["verse_1", "chorus", "verse_2", "pre_chorus", "chorus_repeat", "bridge"])
+        self.assertEqual(lyrics["chorus_repeat"], lyrics["chorus"])
+        self.assertEqual(result["metadata"]["usage"]["total_tokens"], 600)
+        self.assertEqual(result["metadata"]["usage"]["calls"], 5)
+
+        # Every section prompt carries the chorus and the bible
+        for prompt in client.prompts[1:]:
+            self.assertIn("hook line", prompt)
+            self.assertIn("left on read", prompt)
+
+        parsed = ResponseParser.parse(result)
+        display = ResponseParser.format_lyrics_display(parsed["lyrics"])
+        self.assertTrue(display.startswith("[VERSE 1]"))
+        self.assertIn("[BRIDGE]", display)
+
+    def test_supports_only_default_full_song(self):
+        self.assertTrue(SectionEngine.supports(PAYLOAD))
+        self.assertFalse(SectionEngine.supports({**PAYLOAD, "lyrics_part": "Chorus Only"}))
+        self.assertFalse(SectionEngine.supports({**PAYLOAD, "structure_override": "[verse 1] → [chorus]"}))
+        self.assertEqual(
+            SectionEngine.sections_for({**PAYLOAD, "include_chanteo": True}),
+            ["verse_1", "chanteo", "pre_chorus", "bridge"]
+        )
+
+    def test_single_call_and_parallel_paths_agree_on_sections(self):
+        kinds = {"verse_1": "verse", "verse_2": "verse", "chanteo": "chanteo", "pre_chorus": "pre-chorus",
+                 "chorus": "chorus", "chorus_repeat": "chorus", "bridge": "bridge"}
+        for chanteo in (False, True):
+            for bridge in (False, True):
+                payload = {**PAYLOAD, "include_chanteo": chanteo, "include_bridge": bridge}
+                lyrics = SectionEngine(FakeSectionClient(delay=0)).generate(payload)["lyrics"]
+                # The budget plans exactly the sections the engine writes
+                self.assertEqual(sorted(kinds[key] for key in lyrics), sorted(song_sections(payload)))
+                self.assertEqual("verse_2" in lyrics, not chanteo)
+
+                # The single-call prompt asks for the same chanteo-for-verse-2 swap
+                prompt = PromptBuilder.build_user_prompt(payload)
+                self.assertEqual('omit "verse_2"' in prompt, chanteo)
+
+    def test_token_limits_follow_the_section_budget(self):
+        client = FakeSectionClient(delay=0)
+        SectionEngine(client).generate({**PAYLOAD, "include_chanteo": True, "length": "Long"})
+
+        # chorus + bible, verse_1, chanteo (16 lines when Long), pre_chorus, bridge
+        self.assertEqual(client.max_tokens, [768, 393, 605, 300, 300])
+
+        pinned = FakeSectionClient(delay=0)
+        SectionEngine(pinned, anchor_max_tokens=1000, section_max_tokens=500).generate(PAYLOAD)
+        self.assertEqual(pinned.max_tokens, [1000, 500, 500, 500, 500])
+
+    def test_missing_section_raises(self):
+        class NoChorus(FakeSectionClient):
+            async def agenerate_lyrics(self, *args, **kwargs):
+                return {"lyrics": {}}
+
+        with self.assertRaises(Exception) as ctx:
+            SectionEngine(NoChorus()).generate(PAYLOAD)
+        self.assertIn("no chorus", str(ctx.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core.song_store import SongStore
+
+
+def candidate(chorus, verse="[Verse 1]\nLa noche empieza"):
+    return {
+        "lyrics": {"verse_1": verse, "chorus": chorus},
+        "phonetics": {},
+        "qa_log": {},
+        "metadata": {}
+    }
+
+
+def payload(genre="Reggaeton", vibe="Sensual", **extra):
+    return {"genre": genre, "type": "Romantic", "vibe": vibe, "lyrics_part": "Full Song", **extra}
+
+
+class TestSongStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = str(Path(self.tmp.name) / "songs.sqlite3")
+        self.store = SongStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_save_and_get_survive_reopen(self):
+        song_id = self.store.save(
+            payload(keywords=["moto"]),
+            [candidate("Tu perfume en mi moto"), candidate("Otra opción")],
+            provider="openai",
+            model="gpt-4o"
+        )
+        self.store.close()
+        self.store = SongStore(self.path)
+
+        song = self.store.get(song_id)
+        self.assertEqual(song["title"], "Tu perfume en mi moto")
+        self.assertEqual((song["provider"], song["genre"]), ("openai", "Reggaeton"))
+        self.assertEqual(song["payload"]["keywords"], ["moto"])
+        self.assertEqual(len(song["candidates"]), 2)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_search_by_keyword_genre_and_vibe(self):
+        beach = self.store.save(payload(notes="beach story"), [candidate("Corazón en la playa")])
+        self.store.save(payload(genre="Bachata", vibe="Melancholic"), [candidate("Lloro por ti")])
+        self.store.save(payload(genre="Bachata"), [candidate("Bailando en la playa")])
+
+        # Accent-insensitive, prefix match on the last word, notes are indexed too
+        self.assertEqual([i["id"] for i in self.store.search(query="corazon pla")["items"]], [beach])
+        self.assertEqual([i["id"] for i in self.store.search(query="beach")["items"]], [beach])
+        self.assertIn("**", self.store.search(query="corazon")["items"][0]["snippet"])
+
+        self.assertEqual(len(self.store.search(query="playa")["items"]), 2)
+        self.assertEqual(len(self.store.search(query="playa", genre="Bachata")["items"]), 1)
+        self.assertEqual(len(self.store.search(genre="Bachata", vibe="Melancholic")["items"]), 1)
+        # Quotes and FTS operators in user input are treated as plain words
+        self.assertEqual(self.store.search(query='"OR playa NEAR(')["items"], [])
+
+    def test_keyset_pagination_newest_first(self):
+        ids = [self.store.save(payload(), [candidate(f"Línea {i}")]) for i in range(5)]
+
+        seen, cursor = [], None
+        while True:
+            page = self.store.search(limit=2, cursor=cursor)
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(reversed(ids)))
+        self.assertEqual(self.store.count(), 5)
+
+    def test_update_reindexes_and_delete(self):
+        song_id = self.store.save(payload(), [candidate("Primera versión")])
+        revised = [candidate("Segunda versión")]
+        self.assertTrue(self.store.update(song_id, candidates=revised, translation="Second version"))
+
+        song = self.store.get(song_id)
+        self.assertEqual((song["title"], song["translation"]), ("Segunda versión", "Second version"))
+        self.assertEqual(self.store.search(query="primera")["items"], [])
+        self.assertEqual(len(self.store.search(query="segunda")["items"]), 1)
+        self.assertFalse(self.store.update("missing", translation="x"))
+
+        self.assertTrue(self.store.delete(song_id))
+        self.assertIsNone(self.store.get(song_id))
+        self.assertEqual(self.store.search(query="segunda")["items"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
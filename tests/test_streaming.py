@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient
+from core.client_pool import get_client_pool
+from core.rate_limiter import RateLimiter
+
+
+RESPONSE = json.dumps({
+    "lyrics": {"verse_1": "Línea uno\nLínea \"dos\"", "chorus": "Oh oh"},
+    "phonetics": {},
+    "qa_log": {},
+    "metadata": {}
+}, ensure_ascii=False)
+
+
+def _openai_chunk(text=None, usage=None):
+    chunk = MagicMock()
+    if text is None:
+        chunk.choices = []
+    else:
+        chunk.choices[0].delta.content = text
+    chunk.usage = usage
+    return chunk
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        get_client_pool().clear()
+
+    def test_stream_openai_deltas_and_usage(self):
+        """stream_lyrics yields deltas, then the parsed response and usage."""
+        usage = MagicMock(prompt_tokens=120, completion_tokens=40)
+        pieces = [RESPONSE[i:i + 7] for i in range(0, len(RESPONSE), 7)]
+        chunks = [_openai_chunk(p) for p in pieces] + [_openai_chunk(usage=usage)]
+        mock_openai = sys.modules['openai'].OpenAI.return_value
+        mock_openai.chat.completions.create.return_value = iter(chunks)
+
+        client = LLMClient(provider="openai", api_key="stream_key")
+        events = list(client.stream_lyrics("sys", "user"))
+
+        deltas = [e["text"] for e in events if e["type"] == "delta"]
+        done = events[-1]
+        self.assertEqual("".join(deltas), RESPONSE)
+        self.assertEqual(done["type"], "done")
+        self.assertEqual(done["response"]["lyrics"]["chorus"], "Oh oh")
+        self.assertEqual(done["usage"]["total_tokens"], 160)
+
+    @patch("core.llm_client.time.sleep")
+    def test_failed_attempt_tokens_are_refunded(self, sleep):
+        """A retried stream attempt returns its reserved tokens to the TPM bucket."""
+        usage = MagicMock(prompt_tokens=120, completion_tokens=40)
+        mock_openai = sys.modules['openai'].OpenAI.return_value
+        mock_openai.chat.completions.create.side_effect = [
+            TimeoutError("read timeout"),
+            iter([_openai_chunk(RESPONSE), _openai_chunk(usage=usage)])
+        ]
+        limiter = RateLimiter({"openai": {"tpm": 100000}})
+
+        client = LLMClient(provider="openai", api_key="stream_key", rate_limiter=limiter)
+        events = list(client.stream_lyrics("sys", "user", max_tokens=1000))
+        mock_openai.chat.completions.create.side_effect = None
+
+        self.assertEqual(events[-1]["usage"]["total_tokens"], 160)
+        stats = limiter.stats()
+        self.assertEqual((stats["requests"], stats["reconciled_tokens"]), (2, 160))
+        self.assertEqual(stats["refunded_tokens"], 1000 + len("sysuser") // 4 + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import token_budget
+from core.token_budget import count_tokens, plan_token_budget, song_sections
+
+
+PAYLOAD = {
+    "genre": "Reggaeton",
+    "type": "Romantic",
+    "vibe": "Sensual",
+    "energy": "High",
+    "language": "Spanish",
+    "slang_density": "Medium"
+}
+
+
+class TestTokenBudget(unittest.TestCase):
+
+    def plan(self, payload, provider="openai", model="gpt-4o"):
+        return plan_token_budget(payload, provider, model, "system prompt", "user prompt")
+
+    def test_single_part_needs_less_than_full_song(self):
+        full = self.plan(PAYLOAD)
+        chorus = self.plan({**PAYLOAD, "lyrics_part": "Chorus Only"})
+
+        self.assertEqual(chorus["sections"], ["chorus"])
+        self.assertLess(chorus["max_tokens"], full["max_tokens"])
+        self.assertGreaterEqual(full["max_tokens"], full["expected_output_tokens"])
+        self.assertEqual(full["warnings"], [])
+
+    def test_flags_and_length_grow_the_budget(self):
+        base = self.plan(PAYLOAD)
+        extended = self.plan({**PAYLOAD, "include_bridge": True, "include_chanteo": True, "length": "Long"})
+
+        self.assertIn("bridge", extended["sections"])
+        self.assertIn("chanteo", extended["sections"])
+        self.assertGreater(extended["max_tokens"], base["max_tokens"])
+
+    def test_expected_numbers_count_length_once(self):
+        """36 lines (verse, chorus, verse, pre-chorus, chorus) at 14 tokens a line plus phonetics and JSON."""
+        self.assertEqual(token_budget.expected_output_tokens(PAYLOAD), 1394)
+        self.assertEqual(self.plan(PAYLOAD)["max_tokens"], 1742)
+        # Long scales the fixed 8/4-line sections by 1.2 once: 43.2 lines
+        self.assertEqual(token_budget.expected_output_tokens({**PAYLOAD, "length": "Long"}), 1534)
+        self.assertEqual(token_budget.expected_output_tokens({**PAYLOAD, "include_phonetics": False}), 914)
+
+    def test_chanteo_is_budgeted_in_place_of_verse_2(self):
+        chanteo = {**PAYLOAD, "include_chanteo": True}
+        self.assertEqual(song_sections(chanteo), ["verse", "chorus", "chanteo", "pre-chorus", "chorus"])
+        # A ranged section takes its line count from the length (12 for Medium, 16 for Long)
+        self.assertEqual(token_budget.expected_output_tokens(chanteo), 1490)
+        self.assertEqual(token_budget.expected_output_tokens({**chanteo, "length": "Long"}), 1704)
+        # Without a "[verse 2 / chanteo]" slot the chanteo is an extra section
+        custom = {**chanteo, "structure_override": "[verse 1] → [chorus] → [verse 2] → [chorus]"}
+        self.assertEqual(song_sections(custom), ["verse", "chorus", "verse", "chorus", "chanteo"])
+
+    def test_provider_display_names_are_normalized_and_unknown_rejected(self):
+        self.assertEqual(self.plan(PAYLOAD, provider="OpenAI"), self.plan(PAYLOAD))
+        with self.assertRaises(ValueError):
+            self.plan(PAYLOAD, provider="OpenAI GPT")
+
+    def test_freestyle_structure_uses_default_sections(self):
+        freestyle = {**PAYLOAD, "structure_override": "Freestyle"}
+        self.assertEqual(song_sections(freestyle), song_sections(PAYLOAD))
+
+    def test_output_limit_is_clamped_with_warning(self):
+        with patch.dict(token_budget.MODEL_LIMITS, {"openai": {"context": 128000, "output": 500}}):
+            plan = self.plan(PAYLOAD)
+        self.assertEqual(plan["max_tokens"], 500)
+        self.assertEqual(len(plan["warnings"]), 1)
+
+    def test_count_tokens_estimates_without_tokenizer(self):
+        with patch.object(token_budget, "_tiktoken_encoding", return_value=None):
+            self.assertEqual(count_tokens("a" * 36, "openai", "gpt-4o"), 11)
+        self.assertGreater(count_tokens("mami " * 100, "anthropic"), count_tokens("mami " * 100, "google"))
+
+
+if __name__ == '__main__':
+    unittest.main()
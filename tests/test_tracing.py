@@ -0,0 +1,161 @@
+import sys
+from pathlib import Path
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Mock dependencies BEFORE importing core
+sys.modules['openai'] = MagicMock()
+sys.modules['anthropic'] = MagicMock()
+sys.modules['google'] = MagicMock()
+sys.modules['google.generativeai'] = MagicMock()
+
+from core import LLMClient, llm_client, tracing
+from core.client_pool import ClientPool
+from core.tracing import Tracer
+
+
+RESPONSE = '{"lyrics": {"verse_1": "a", "chorus": "b"}, "phonetics": {}, "qa_log": {}, "metadata": {}}'
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "spans.jsonl"
+        self.tracer = Tracer(enabled=True, path=str(self.path))
+        self.addCleanup(self.tracer.disable)
+
+    def spans(self):
+        return [json.loads(line) for line in self.path.read_text(encoding="utf-8").splitlines()]
+
+    def test_disabled_tracer_returns_shared_noop(self):
+        tracer = Tracer()
+        span = tracer.span("llm.request", provider="openai")
+        self.assertIs(span, tracer.span("other"))
+        with span as s:
+            s.set(response_chars=10)
+        self.assertEqual(tracer.stats()["spans"], 0)
+
+    def test_nested_spans_share_trace_and_export_jsonl(self):
+        with self.tracer.span("app.generate", provider="openai", lyrics_part="Full Song") as root:
+            with self.tracer.span("llm.request", provider="openai"):
+                pass
+            root.set(lyrics_chars=42)
+        with self.assertRaises(ValueError):
+            with self.tracer.span("llm.decode"):
+                raise ValueError("bad json")
+
+        child, parent, failed = self.spans()
+        self.assertEqual(child["trace_id"], parent["trace_id"])
+        self.assertEqual(child["parent_id"], parent["span_id"])
+        self.assertIsNone(parent["parent_id"])
+        self.assertEqual(parent["attributes"]["lyrics_chars"], 42)
+        self.assertNotEqual(failed["trace_id"], parent["trace_id"])
+        self.assertEqual((failed["status"], failed["attributes"]["error"]), ("error", "ValueError"))
+        self.assertEqual(self.tracer.stats()["traces"], 2)
+
+    def test_prometheus_snapshot(self):
+        with self.tracer.span("llm.request", provider="openai"):
+            pass
+        self.tracer.observe("llm.first_token", 0.3, provider="openai")
+        self.tracer.observe("llm.first_token", 200.0, provider="openai")
+
+        text = self.tracer.prometheus()
+        self.assertIn('kaira_stage_duration_seconds_bucket{stage="llm.first_token",provider="openai",le="0.5"} 1', text)
+        self.assertIn('kaira_stage_duration_seconds_bucket{stage="llm.first_token",provider="openai",le="+Inf"} 2', text)
+        self.assertIn('kaira_stage_duration_seconds_count{stage="llm.request",provider="openai"} 1', text)
+        self.assertIn('kaira_stage_errors_total{stage="llm.request",provider="openai"} 0', text)
+
+        metrics = Path(self.tmp.name) / "metrics.prom"
+        self.tracer.write_prometheus(str(metrics))
+        self.assertEqual(metrics.read_text(encoding="utf-8"), self.tracer.prometheus())
+
+    def test_concurrent_root_spans_export_metrics(self):
+        metrics = Path(self.tmp.name) / "metrics.prom"
+        tracer = Tracer(enabled=True, metrics_path=str(metrics))
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(50):
+                    with tracer.span("llm.request", provider="openai"):
+                        pass
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertIn('kaira_stage_duration_seconds_count{stage="llm.request",provider="openai"} 400', metrics.read_text(encoding="utf-8"))
+        self.assertEqual([p.name for p in Path(self.tmp.name).iterdir() if p.suffix == ".tmp"], [])
+
+        with patch.object(tracing.os, "replace", side_effect=OSError("disk full")):
+            with tracer.span("llm.request"):
+                pass
+
+    def test_spans_are_separate_per_asyncio_task(self):
+        async def item(i):
+            with self.tracer.span("batch.item", index=i):
+                await asyncio.sleep(0.01)
+                with self.tracer.span("llm.request"):
+                    await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*[item(i) for i in range(3)])
+
+        asyncio.run(main())
+        spans = self.spans()
+        roots = {s["span_id"]: s["trace_id"] for s in spans if s["name"] == "batch.item"}
+        self.assertEqual(len(set(roots.values())), 3)
+        for s in spans:
+            if s["name"] == "llm.request":
+                self.assertEqual(s["trace_id"], roots[s["parent_id"]])
+
+
+class TestClientSpans(unittest.TestCase):
+
+    def test_generate_records_request_and_decode_spans(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "spans.jsonl"
+        tracer = Tracer(enabled=True, path=str(path))
+        self.addCleanup(tracer.disable)
+
+        with patch.object(llm_client, "get_client_pool", return_value=ClientPool()), \
+                patch.object(llm_client, "get_tracer", return_value=tracer), \
+                patch.object(tracing, "_default_tracer", tracer):
+            client = LLMClient(provider="openai", api_key="k")
+            completion = MagicMock()
+            completion.choices[0].message.content = RESPONSE
+            completion.usage.prompt_tokens = 100
+            completion.usage.completion_tokens = 20
+            completion.usage.prompt_tokens_details.cached_tokens = 0
+            client.client.chat.completions.create.return_value = completion
+            client.generate_lyrics("system", "user", use_cache=False)
+
+        spans = {s["name"]: s for s in (json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())}
+        self.assertEqual(set(spans), {"llm.generate", "llm.request", "llm.decode"})
+        generate = spans["llm.generate"]
+        self.assertEqual(generate["attributes"]["provider"], "openai")
+        self.assertEqual(generate["attributes"]["prompt_chars"], len("system") + len("user"))
+        self.assertEqual(generate["attributes"]["output_tokens"], 20)
+        self.assertEqual(spans["llm.decode"]["attributes"]["response_chars"], len(RESPONSE))
+        # Decoding is timed inside the request it belongs to
+        self.assertEqual(spans["llm.request"]["parent_id"], generate["span_id"])
+        self.assertEqual(spans["llm.decode"]["parent_id"], spans["llm.request"]["span_id"])
+
+
+if __name__ == '__main__':
+    unittest.main()
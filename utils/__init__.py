@@ -1,14 +1,32 @@
 """
 Utils package for KAIRA 2025.
 Contains formatting and helper utilities.
+
+Names are resolved on first access (PEP 562).
 """
 
-from .formatters import format_download_txt, format_download_json
-from .helpers import build_json_payload, extract_keywords
+import importlib
+from typing import Any, List
+
+# Public name -> defining submodule
+_EXPORTS = {
+    'format_download_txt': '.formatters',
+    'format_download_json': '.formatters',
+    'build_json_payload': '.helpers',
+    'extract_keywords': '.helpers',
+    'payload_hash': '.helpers'
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'format_download_txt',
-    'format_download_json',
-    'build_json_payload',
-    'extract_keywords'
-]
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
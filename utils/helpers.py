@@ -3,6 +3,8 @@ Helper functions for KAIRA 2025.
 """
 
 from typing import Dict, Any, List
+import hashlib
+import json
 import re
 
 
@@ -70,6 +72,20 @@ def build_json_payload(
     return payload
 
 
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """
+    Stable identifier for a payload (independent of key order).
+    
+    Args:
+        payload: Payload dictionary
+        
+    Returns:
+        Hex digest of the canonical JSON payload
+    """
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def extract_keywords(text: str) -> List[str]:
     """
     Extract keywords from comma-separated text.